@@ -0,0 +1,235 @@
+"""불량 원인 분석 (/api/dashboard/analytics) 계산.
+
+조회 구간(ANALYTICS_WINDOWS 중 하나)의 최근 ANALYTICS_MAX_ROWS 행을 numpy 행렬로 읽어
+상관행렬(Pearson/Spearman), 불량 여부 대비 변수 중요도(point-biserial, 상호정보량), 불량 LOT 를 계산한다.
+불량률 추이는 샘플이 아니라 롤업(daily_totals)으로 구간 전체를 집계한다.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from config import ANALYTICS_MAX_ROWS, ANALYTICS_MI_BINS
+from async_db import fetch_all
+from dashboard_db import (
+    defect_value_expr,
+    escape_sql_id,
+    is_safe_column_name,
+    date_range_condition,
+    get_today_date_string,
+    next_date_string,
+)
+from rollup import get_watermark, daily_totals
+
+
+def parse_windows(spec: str) -> dict:
+    """"1d,7d,30d" -> {"1d": 1, "7d": 7, "30d": 30} (일 단위)."""
+    windows = {}
+    for token in spec.split(","):
+        token = token.strip().lower()
+        if token.endswith("d") and token[:-1].isdigit() and int(token[:-1]) > 0:
+            windows[token] = int(token[:-1])
+    return windows
+
+
+def to_matrix(rows: list[dict], columns: list[str]) -> np.ndarray:
+    """DB 행 -> (n, p) float 행렬 (None 은 NaN)."""
+    if not rows:
+        return np.empty((0, len(columns)))
+    return np.array([[r.get(c) for c in columns] for r in rows], dtype=float)
+
+
+def pairwise_pearson(X: np.ndarray) -> np.ndarray:
+    """결측을 쌍별로 제외한 Pearson 상관행렬 (행렬곱 몇 번으로 모든 쌍을 계산)."""
+    M = (~np.isnan(X)).astype(float)
+    # 상관계수는 이동에 불변이므로 컬럼 평균을 빼서 n*sxx - sx^2 의 자릿수 손실을 줄인다
+    counts = M.sum(axis=0)
+    means = np.where(M > 0, X, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    X0 = np.where(M > 0, X - means, 0.0)
+    n = M.T @ M
+    sx = X0.T @ M          # sx[i, j] = i 컬럼 합 (j 도 값이 있는 행만)
+    sy = sx.T
+    sxy = X0.T @ X0
+    sxx = (X0 * X0).T @ M
+    syy = sxx.T
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(var)
+    corr[~np.isfinite(corr) | (n < 2)] = 0.0
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def rank_columns(X: np.ndarray) -> np.ndarray:
+    """컬럼별 평균 순위 (동순위는 평균, NaN 유지)."""
+    R = np.full(X.shape, np.nan)
+    for j in range(X.shape[1]):
+        valid = ~np.isnan(X[:, j])
+        if not valid.any():
+            continue
+        _, inverse, counts = np.unique(X[valid, j], return_inverse=True, return_counts=True)
+        ends = np.cumsum(counts)
+        R[valid, j] = (ends - (counts - 1) / 2.0)[inverse]
+    return R
+
+
+def pairwise_spearman(X: np.ndarray) -> np.ndarray:
+    """쌍별 공통 행에서 다시 순위를 매긴 Spearman 상관행렬 (DataFrame.corr("spearman") 과 같은 정의).
+
+    결측 위치가 같은 컬럼끼리는 컬럼별 순위 한 번으로 정확하므로, 결측 패턴이 다른 컬럼 묶음 쌍만
+    공통 행으로 다시 순위를 매겨 그 블록을 덮어쓴다. 다시 매기는 순위는 컬럼별 정렬 코드(np.unique)를
+    재사용해 bincount 로 구한다 (다시 정렬하지 않음).
+    """
+    corr = pairwise_pearson(rank_columns(X))
+    valid = ~np.isnan(X)
+    patterns, group = np.unique(valid.T, axis=0, return_inverse=True)
+    if len(patterns) < 2:
+        return corr
+    group = group.ravel()
+    codes = np.full(X.shape, -1, dtype=np.int64)
+    n_codes = np.zeros(X.shape[1], dtype=np.int64)
+    for j in range(X.shape[1]):
+        values, inverse = np.unique(X[valid[:, j], j], return_inverse=True)
+        codes[valid[:, j], j] = inverse
+        n_codes[j] = len(values)
+
+    for a in range(len(patterns)):
+        for b in range(a + 1, len(patterns)):
+            rows = patterns[a] & patterns[b]
+            ia, ib = np.flatnonzero(group == a), np.flatnonzero(group == b)
+            cols = np.concatenate([ia, ib])
+            R = np.empty((int(rows.sum()), len(cols)))
+            for k, j in enumerate(cols):
+                code = codes[rows, j]
+                counts = np.bincount(code, minlength=n_codes[j])
+                R[:, k] = (np.cumsum(counts) - (counts - 1) / 2.0)[code]
+            block = pairwise_pearson(R)
+            k = len(ia)
+            corr[np.ix_(ia, ib)] = block[:k, k:]
+            corr[np.ix_(ib, ia)] = block[k:, :k]
+    return corr
+
+
+def mutual_information(R: np.ndarray, y: np.ndarray, bins: int) -> np.ndarray:
+    """분위수 구간화한 각 컬럼과 이진 y 사이의 상호정보량(bit). R 은 rank_columns 결과."""
+    n, p = R.shape
+    valid = ~np.isnan(R) & ~np.isnan(y)[:, None]
+    n_valid = valid.sum(axis=0)
+    safe_n = np.maximum(n_valid, 1)
+    b = np.floor((np.where(valid, R, 1.0) - 0.5) / safe_n * bins).astype(int)
+    np.clip(b, 0, bins - 1, out=b)
+    yy = np.broadcast_to(np.nan_to_num(y).astype(int)[:, None], (n, p))
+    cols = np.broadcast_to(np.arange(p), (n, p))
+    codes = (cols * bins + b) * 2 + yy
+    joint = np.bincount(codes[valid], minlength=p * bins * 2).reshape(p, bins, 2).astype(float)
+    joint /= safe_n[:, None, None]
+    px = joint.sum(axis=2, keepdims=True)
+    py = joint.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        terms = joint * np.log2(joint / (px * py))
+    mi = np.nansum(np.where(joint > 0, terms, 0.0), axis=(1, 2))
+    mi[n_valid < 2] = 0.0
+    return mi
+
+
+def defect_lots(lots: np.ndarray, defect: np.ndarray, X: np.ndarray, columns: list[str], limit: int = 10) -> list:
+    """LOT 별 불량률(%)·변수 평균 상위 limit 개."""
+    if lots.size == 0:
+        return []
+    keys, inverse = np.unique(lots, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(keys)).astype(float)
+    rate = np.bincount(inverse, weights=np.nan_to_num(defect), minlength=len(keys)) / counts
+    M = ~np.isnan(X)
+    sums = np.zeros((len(keys), X.shape[1]))
+    np.add.at(sums, inverse, np.where(M, X, 0.0))
+    cnts = np.zeros((len(keys), X.shape[1]))
+    np.add.at(cnts, inverse, M)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(cnts > 0, sums / np.maximum(cnts, 1), 0.0)
+    top = [i for i in np.argsort(-rate, kind="stable")[:limit] if rate[i] > 0]
+    return [
+        {
+            "lot": str(keys[i]),
+            "defectRate": float(rate[i]),
+            "records": int(counts[i]),
+            "variables": {c: float(means[i, j]) for j, c in enumerate(columns)},
+        }
+        for i in top
+    ]
+
+
+def _window_range(days: int) -> tuple[str, str]:
+    today = get_today_date_string()
+    start = (date.fromisoformat(today) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    return start, next_date_string(today)
+
+
+async def compute_analytics(conn, table: str, m: dict, window: str, days: int) -> dict:
+    numeric = [c for c in m["numericCols"] if is_safe_column_name(c)][:30]
+    target = m["resultCol"] or m["defectCol"] or m["passRateCol"]
+    date_col = m["dateCol"]
+    start, end = _window_range(days)
+    lot_col = m["lotCol"]
+
+    selects = [escape_sql_id(c) for c in numeric]
+    has_defect = bool(target)
+    if has_defect:
+        selects.append(f"{defect_value_expr(m)} as `__defect`")
+    if lot_col:
+        selects.append(f"{escape_sql_id(lot_col)} as `__lot`")
+    sql = f"SELECT {', '.join(selects)} FROM {escape_sql_id(table)}"
+    params: list = []
+    if date_col:
+        where, params = date_range_condition(date_col, start, end)
+        sql += f" WHERE {where} ORDER BY {escape_sql_id(date_col)} DESC"
+    sql += " LIMIT %s"
+    rows = await fetch_all(conn, sql, params + [ANALYTICS_MAX_ROWS])
+
+    X = to_matrix(rows, numeric)
+    pearson = pairwise_pearson(X) if len(rows) >= 2 else np.eye(len(numeric))
+    R = rank_columns(X)
+    spearman = pairwise_spearman(X) if len(rows) >= 2 else np.eye(len(numeric))
+
+    importance = []
+    lots_out = []
+    if has_defect and rows:
+        defect = np.array([r.get("__defect") for r in rows], dtype=float)
+        y = np.where(np.isnan(defect), np.nan, (defect > 0).astype(float))
+        pb = pairwise_pearson(np.column_stack([X, y]))[-1, :-1] if len(rows) >= 2 else np.zeros(len(numeric))
+        mi = mutual_information(R, y, ANALYTICS_MI_BINS)
+        importance = [
+            {"name": c, "importance": abs(float(pb[j])), "pointBiserial": float(pb[j]), "mutualInfo": float(mi[j])}
+            for j, c in enumerate(numeric)
+            if c != target
+        ]
+        importance.sort(key=lambda x: (-x["importance"], -x["mutualInfo"]))
+        if lot_col:
+            lots = np.array([str(r.get("__lot") or "") for r in rows])
+            lots_out = defect_lots(lots, defect, X, numeric)
+
+    trend = []
+    if date_col and has_defect:
+        watermark = await get_watermark(conn, table, m)
+        for day, t in sorted((await daily_totals(conn, table, m, start, end, watermark)).items()):
+            count = t["record_count"]
+            rate = t["defect_sum"] / count if count else 0.0
+            trend.append({"time": day.strftime("%Y-%m-%d"), "defectRate": rate, "passRate": 100 - rate, "records": int(count)})
+
+    return {
+        "success": True,
+        "window": window,
+        "range": {"start": start, "endExclusive": end} if date_col else None,
+        "sampledRows": len(rows),
+        "truncated": len(rows) >= ANALYTICS_MAX_ROWS,
+        "correlation": {
+            "columns": numeric,
+            "matrix": pearson.round(6).tolist(),
+            "spearman": spearman.round(6).tolist(),
+        },
+        "importance": importance,
+        "confusionMatrix": None,
+        "defectLots": lots_out,
+        "defectTrend": trend,
+        "targetColumn": target,
+    }
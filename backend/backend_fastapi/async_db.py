@@ -0,0 +1,155 @@
+"""aiomysql 기반 비동기 DB 접근 계층 (라우터용, 이벤트 루프를 막지 않음)."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import aiomysql
+from config import AUTH_DB, PROCESS_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from db import PoolTimeoutError
+
+
+class AsyncConnectionPool:
+    """aiomysql 풀 래퍼: 지연 생성, 체크아웃 타임아웃, ping 재연결, 대기 지표."""
+
+    def __init__(self, name: str, params: dict, size: int, timeout: float, recycle: float):
+        self.name = name
+        self.params = params
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self._pool = None
+        self._create_lock = None
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _get_pool(self):
+        if self._pool is None:
+            if self._create_lock is None:
+                self._create_lock = asyncio.Lock()
+            async with self._create_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(
+                        minsize=1,
+                        maxsize=self.size,
+                        pool_recycle=int(self.recycle) if self.recycle else -1,
+                        host=self.params["host"],
+                        port=self.params["port"],
+                        user=self.params["user"],
+                        password=self.params["password"],
+                        db=self.params["database"],
+                        cursorclass=aiomysql.DictCursor,
+                        connect_timeout=10,
+                    )
+        return self._pool
+
+    @asynccontextmanager
+    async def connection(self):
+        pool = await self._get_pool()
+        started = time.monotonic()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"{self.name} pool exhausted ({self.size} connections busy for {self.timeout}s)"
+            )
+        waited = time.monotonic() - started
+        self._checkouts += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        broken = False
+        try:
+            await conn.ping(reconnect=True)
+            yield conn
+        except (aiomysql.OperationalError, aiomysql.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if broken:
+                conn.close()
+            else:
+                try:
+                    await conn.rollback()
+                except Exception:
+                    conn.close()
+            pool.release(conn)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self) -> dict:
+        pool = self._pool
+        total = pool.size if pool else 0
+        idle = pool.freesize if pool else 0
+        return {
+            "size": self.size,
+            "inUse": total - idle,
+            "idle": idle,
+            "saturation": (total - idle) / self.size,
+            "checkouts": self._checkouts,
+            "timeouts": self._timeouts,
+            "avgWaitMs": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+            "maxWaitMs": self._wait_max * 1000,
+        }
+
+
+auth_pool = AsyncConnectionPool("auth", AUTH_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+process_pool = AsyncConnectionPool("process", PROCESS_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+
+
+def get_auth_connection():
+    """`async with get_auth_connection() as conn:` 형태로 사용."""
+    return auth_pool.connection()
+
+
+def get_process_connection():
+    """`async with get_process_connection() as conn:` 형태로 사용."""
+    return process_pool.connection()
+
+
+async def fetch_all(conn, sql: str, params=None) -> list:
+    async with conn.cursor() as cur:
+        await cur.execute(sql, params or ())
+        return list(await cur.fetchall() or [])
+
+
+async def fetch_one(conn, sql: str, params=None):
+    async with conn.cursor() as cur:
+        await cur.execute(sql, params or ())
+        return await cur.fetchone()
+
+
+async def auth_query(sql: str, params=None):
+    async with get_auth_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params or ())
+            if sql.strip().upper().startswith("SELECT"):
+                return await cur.fetchall()
+            await conn.commit()
+    return None
+
+
+async def health_check() -> dict:
+    result = {}
+    for pool in (auth_pool, process_pool):
+        try:
+            async with pool.connection() as conn:
+                await fetch_one(conn, "SELECT 1")
+            result[pool.name] = True
+        except Exception:
+            result[pool.name] = False
+    return result
+
+
+def pool_stats() -> dict:
+    return {"auth": auth_pool.stats(), "process": process_pool.stats()}
+
+
+async def close_pools() -> None:
+    await auth_pool.close()
+    await process_pool.close()
@@ -33,3 +33,48 @@ PROCESS_DB = {
 }
 
 BACKEND_DATE_TZ = os.getenv("BACKEND_DATE_TZ", "Asia/Seoul")
+
+# 커넥션 풀 (uvicorn 워커 프로세스당 크기, 총 커넥션 = 워커 수 × DB_POOL_SIZE × 2)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+# information_schema 컬럼 메타 캐시 TTL(초)
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+
+# 대시보드 롤업 테이블 (dashboard_rollup_*) 백그라운드 갱신
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "1") == "1"
+ROLLUP_REFRESH_SECONDS = float(os.getenv("ROLLUP_REFRESH_SECONDS", "60"))
+ROLLUP_LOOKBACK_HOURS = int(os.getenv("ROLLUP_LOOKBACK_HOURS", "2"))
+ROLLUP_CHUNK_DAYS = int(os.getenv("ROLLUP_CHUNK_DAYS", "7"))
+
+# 대시보드 응답 캐시 (엔드포인트별 TTL 초, 0 이면 캐시 안 함)
+CACHE_TTL = {
+    "summary": float(os.getenv("CACHE_TTL_SUMMARY", "10")),
+    "realtime": float(os.getenv("CACHE_TTL_REALTIME", "2")),
+    "alerts": float(os.getenv("CACHE_TTL_ALERTS", "5")),
+    "calendar-month": float(os.getenv("CACHE_TTL_CALENDAR", "60")),
+    "analytics": float(os.getenv("CACHE_TTL_ANALYTICS", "300")),
+}
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# 워커 간 공유 캐시 (예: redis://localhost:6379/0, redis 패키지 필요)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "").strip()
+
+# 실시간 센서 스트림 (SSE / WebSocket)
+REALTIME_POLL_SECONDS = float(os.getenv("REALTIME_POLL_SECONDS", "1"))
+REALTIME_WINDOW = int(os.getenv("REALTIME_WINDOW", "30"))
+REALTIME_TREND_THRESHOLD = float(os.getenv("REALTIME_TREND_THRESHOLD", "1.0"))
+
+# SPC 알림 엔진 (/api/dashboard/alerts)
+SPC_ENABLED = os.getenv("SPC_ENABLED", "1") == "1"
+SPC_POLL_SECONDS = float(os.getenv("SPC_POLL_SECONDS", "5"))
+SPC_BASELINE = int(os.getenv("SPC_BASELINE", "100"))
+SPC_CLEAR_POINTS = int(os.getenv("SPC_CLEAR_POINTS", "5"))
+SPC_HISTORY_SIZE = int(os.getenv("SPC_HISTORY_SIZE", "500"))
+
+# 불량 원인 분석 (/api/dashboard/analytics?window=7d)
+ANALYTICS_WINDOWS = os.getenv("ANALYTICS_WINDOWS", "1d,7d,30d")
+ANALYTICS_DEFAULT_WINDOW = os.getenv("ANALYTICS_DEFAULT_WINDOW", "7d").strip().lower()
+ANALYTICS_MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "20000"))
+ANALYTICS_MI_BINS = int(os.getenv("ANALYTICS_MI_BINS", "10"))
@@ -1,10 +1,11 @@
 """공정 대시보드용 DB 헬퍼 (Next.js lib/dashboard-db.ts 포팅)."""
 import re
+import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from config import PROCESS_DB, BACKEND_DATE_TZ
-from db import get_process_connection
+from config import PROCESS_DB, BACKEND_DATE_TZ, SCHEMA_CACHE_TTL
+from async_db import fetch_all
 
 
 def escape_sql_id(name: str) -> str:
@@ -16,27 +17,76 @@ def is_safe_column_name(name: str) -> bool:
     return bool(name and re.match(r"^[a-zA-Z0-9_\s]+$", name))
 
 
-def get_tables(conn) -> list:
-    with conn.cursor() as cur:
-        cur.execute("SHOW TABLES")
-        rows = cur.fetchall()
+async def get_tables(conn) -> list:
+    rows = await fetch_all(conn, "SHOW TABLES")
     if not rows:
         return []
     key = list(rows[0].keys())[0]
     return [r[key] for r in rows if r.get(key)]
 
 
-def get_columns(conn, table: str) -> list[dict]:
+# (database, table) -> {"expires": float, "columns": list, "columnMap": dict | None}
+_schema_cache: dict = {}
+_schema_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def invalidate_schema_cache(table: str | None = None) -> int:
+    """table 이 None 이면 전체, 아니면 해당 테이블 캐시만 비운다. 비운 항목 수를 반환."""
+    if table is None:
+        keys = list(_schema_cache)
+    else:
+        keys = [k for k in _schema_cache if k[1] == table]
+    for k in keys:
+        _schema_cache.pop(k, None)
+    _schema_stats["invalidations"] += len(keys)
+    return len(keys)
+
+
+def schema_cache_stats() -> dict:
+    lookups = _schema_stats["hits"] + _schema_stats["misses"]
+    return {
+        **_schema_stats,
+        "hitRatio": _schema_stats["hits"] / lookups if lookups else 0.0,
+        "entries": len(_schema_cache),
+        "ttl": SCHEMA_CACHE_TTL,
+    }
+
+
+def _cached_schema(table: str) -> dict | None:
+    entry = _schema_cache.get((PROCESS_DB["database"], table))
+    if entry is None or entry["expires"] <= time.monotonic():
+        return None
+    return entry
+
+
+async def get_columns(conn, table: str) -> list[dict]:
+    entry = _cached_schema(table)
+    if entry is not None:
+        _schema_stats["hits"] += 1
+        return entry["columns"]
+    _schema_stats["misses"] += 1
+    columns = await _fetch_columns(conn, table)
+    if not columns:
+        # 아직 없는 테이블은 캐시하지 않음 (생성 직후 바로 보이도록)
+        return columns
+    _schema_cache[(PROCESS_DB["database"], table)] = {
+        "expires": time.monotonic() + SCHEMA_CACHE_TTL,
+        "columns": columns,
+        "columnMap": None,
+    }
+    return columns
+
+
+async def _fetch_columns(conn, table: str) -> list[dict]:
     db = PROCESS_DB["database"]
-    with conn.cursor() as cur:
-        cur.execute(
-            """SELECT COLUMN_NAME as name, DATA_TYPE as type
-               FROM information_schema.COLUMNS
-               WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-               ORDER BY ORDINAL_POSITION""",
-            (db, table),
-        )
-        return cur.fetchall() or []
+    return await fetch_all(
+        conn,
+        """SELECT COLUMN_NAME as name, DATA_TYPE as type
+           FROM information_schema.COLUMNS
+           WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+           ORDER BY ORDINAL_POSITION""",
+        (db, table),
+    )
 
 
 def _pick_column(columns: list[dict], candidates: list[str]) -> str | None:
@@ -79,8 +129,18 @@ def _find_date_column(columns: list[dict]) -> str | None:
     return None
 
 
-def get_process_column_map(conn, table_name: str) -> dict:
-    columns = get_columns(conn, table_name)
+async def get_process_column_map(conn, table_name: str) -> dict:
+    columns = await get_columns(conn, table_name)
+    entry = _cached_schema(table_name)
+    if entry is not None and entry["columnMap"] is not None and entry["columns"] is columns:
+        return entry["columnMap"]
+    column_map = _build_column_map(columns, table_name)
+    if entry is not None and entry["columns"] is columns:
+        entry["columnMap"] = column_map
+    return column_map
+
+
+def _build_column_map(columns: list[dict], table_name: str) -> dict:
     date_col = _find_date_column(columns)
     quantity_col = _pick_column(columns, ["quantity", "amount", "count", "qty", "output", "생산", "수량"])
     pass_rate_col = _pick_column(columns, ["pass_rate", "pass", "quality", "ok_rate", "양품률", "품질"])
@@ -113,6 +173,90 @@ def get_process_column_map(conn, table_name: str) -> dict:
     }
 
 
+def next_date_string(date_str: str, days: int = 1) -> str:
+    from datetime import date, timedelta
+    return (date.fromisoformat(date_str) + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def date_range_condition(date_col: str, start: str, end_exclusive: str) -> tuple[str, list]:
+    """[start, end_exclusive) 범위 조건. DATE(col) 로 감싸지 않아 date_col 인덱스를 사용할 수 있다."""
+    col = escape_sql_id(date_col)
+    return f"{col} >= %s AND {col} < %s", [start, end_exclusive]
+
+
+def defect_value_expr(m: dict) -> str:
+    """행 단위 불량 값(%) 식: 판정 컬럼 > 불량률 컬럼 > 100 - 양품률 순으로 사용."""
+    if m["resultCol"]:
+        return f"COALESCE(CAST({escape_sql_id(m['resultCol'])} AS DECIMAL(10,4)), 0) * 100"
+    if m["defectCol"]:
+        return f"COALESCE({escape_sql_id(m['defectCol'])}, 0)"
+    if m["passRateCol"]:
+        return f"100 - COALESCE({escape_sql_id(m['passRateCol'])}, 100)"
+    return "0"
+
+
+def aggregate_selects(m: dict) -> list[tuple[str, str]]:
+    """합산 가능한(sum/count) 대시보드 집계 목록. summary·calendar·롤업이 같은 식을 공유한다."""
+    def sum_of(key: str) -> str:
+        return f"COALESCE(SUM({escape_sql_id(m[key])}), 0)" if m[key] else "0"
+
+    def count_of(key: str) -> str:
+        return f"COUNT({escape_sql_id(m[key])})" if m[key] else "0"
+
+    return [
+        ("record_count", "COUNT(*)"),
+        ("production_sum", sum_of("quantityCol")),
+        ("defect_sum", f"COALESCE(SUM({defect_value_expr(m)}), 0)"),
+        ("energy_sum", sum_of("consumptionCol")),
+        ("efficiency_sum", sum_of("efficiencyCol")),
+        ("efficiency_count", count_of("efficiencyCol")),
+        ("pass_rate_sum", sum_of("passRateCol")),
+        ("pass_rate_count", count_of("passRateCol")),
+    ]
+
+
+def lot_result_column(m: dict) -> str | None:
+    return m["resultCol"] or (m["defectCol"] if m["defectCol"] and "rate" not in (m["defectCol"] or "").lower() else None)
+
+
+def lot_param_columns(m: dict, columns: list[dict]) -> list[str]:
+    """LOT 현황에 평균으로 보여줄 파라미터 컬럼 (숫자 컬럼 + 알려진 공정 파라미터)."""
+    exclude = {m["lotCol"], m["dateCol"], lot_result_column(m)} - {None}
+    numeric_cols = [c for c in m["numericCols"] if c not in exclude]
+    known = ["process_time", "process time", "ProcessTime", "processing_time", "humidity", "tank_pressure", "lithium_input", "additive_ratio"]
+    extra = []
+    for c in columns:
+        name = c["name"]
+        if name in exclude or name in numeric_cols:
+            continue
+        norm = name.lower().replace(" ", "_")
+        for k in known:
+            if norm == k.lower().replace(" ", "_") or k.lower() in norm or norm in k.lower():
+                extra.append(name)
+                break
+    return [c for c in numeric_cols + extra if is_safe_column_name(c)]
+
+
+def build_range_query(
+    table: str,
+    date_col: str,
+    selects: list[tuple[str, str]],
+    start: str,
+    end_exclusive: str,
+    group_by: str | None = None,
+    order_by: str | None = None,
+) -> tuple[str, list]:
+    """selects 전체를 [start, end_exclusive) 범위에서 한 번의 스캔으로 집계하는 쿼리를 만든다."""
+    where, params = date_range_condition(date_col, start, end_exclusive)
+    select_sql = ", ".join(f"{expr} as {escape_sql_id(alias)}" for alias, expr in selects)
+    sql = f"SELECT {select_sql} FROM {escape_sql_id(table)} WHERE {where}"
+    if group_by:
+        sql += f" GROUP BY {group_by}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return sql, params
+
+
 def get_today_date_string() -> str:
     try:
         tz = ZoneInfo(BACKEND_DATE_TZ)
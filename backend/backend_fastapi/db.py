@@ -1,43 +1,193 @@
+"""MariaDB 커넥션 풀 (워커 프로세스당 auth / process 풀 1개씩)."""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 import pymysql
-from config import AUTH_DB, PROCESS_DB
+from config import AUTH_DB, PROCESS_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
 
-_auth_conn = None
-_process_conn = None
 
+class PoolTimeoutError(RuntimeError):
+    pass
 
-def get_auth_connection():
-    global _auth_conn
-    if _auth_conn is None:
-        _auth_conn = pymysql.connect(
-            host=AUTH_DB["host"],
-            port=AUTH_DB["port"],
-            user=AUTH_DB["user"],
-            password=AUTH_DB["password"],
-            database=AUTH_DB["database"],
+
+class ConnectionPool:
+    """스레드 안전 커넥션 풀.
+
+    체크아웃 시 ping(reconnect=True)으로 끊긴 커넥션을 복구하고,
+    recycle 초가 지난 커넥션은 새로 연결한다. 풀이 가득 차면 timeout 초까지 대기한다.
+    """
+
+    def __init__(self, name: str, params: dict, size: int, timeout: float, recycle: float):
+        self.name = name
+        self.params = params
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._created = 0
+        self._reconnects = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        conn = pymysql.connect(
+            host=self.params["host"],
+            port=self.params["port"],
+            user=self.params["user"],
+            password=self.params["password"],
+            database=self.params["database"],
             cursorclass=pymysql.cursors.DictCursor,
+            connect_timeout=10,
         )
-    return _auth_conn
+        conn._pool_created_at = time.monotonic()
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _close(self, conn) -> None:
+        with self._lock:
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"{self.name} pool exhausted ({self.size} connections busy for {self.timeout}s)"
+                )
+        waited = time.monotonic() - started
+        try:
+            conn = None
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if conn is not None and self.recycle and time.monotonic() - conn._pool_created_at > self.recycle:
+                self._close(conn)
+                conn = None
+            if conn is not None:
+                try:
+                    if not conn.open:
+                        with self._lock:
+                            self._reconnects += 1
+                    conn.ping(reconnect=True)
+                except Exception:
+                    self._close(conn)
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _checkin(self, conn, broken: bool = False) -> None:
+        try:
+            if not broken:
+                try:
+                    # 읽기 트랜잭션 스냅샷이 다음 요청으로 넘어가지 않도록 종료
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            if broken:
+                self._close(conn)
+            else:
+                self._idle.put(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            self._checkin(conn, broken=True)
+            raise
+        except BaseException:
+            self._checkin(conn)
+            raise
+        else:
+            self._checkin(conn)
+
+    def health_check(self) -> bool:
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "inUse": self._in_use,
+                "idle": self._idle.qsize(),
+                "peakInUse": self._peak_in_use,
+                "saturation": self._in_use / self.size,
+                "created": self._created,
+                "reconnects": self._reconnects,
+                "discarded": self._discarded,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avgWaitMs": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "maxWaitMs": self._wait_max * 1000,
+            }
+
+
+auth_pool = ConnectionPool("auth", AUTH_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+process_pool = ConnectionPool("process", PROCESS_DB, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+
+
+def get_auth_connection():
+    """`with get_auth_connection() as conn:` 형태로 사용 (블록 종료 시 풀에 반납)."""
+    return auth_pool.connection()
 
 
 def get_process_connection():
-    global _process_conn
-    if _process_conn is None:
-        _process_conn = pymysql.connect(
-            host=PROCESS_DB["host"],
-            port=PROCESS_DB["port"],
-            user=PROCESS_DB["user"],
-            password=PROCESS_DB["password"],
-            database=PROCESS_DB["database"],
-            cursorclass=pymysql.cursors.DictCursor,
-        )
-    return _process_conn
+    """`with get_process_connection() as conn:` 형태로 사용 (블록 종료 시 풀에 반납)."""
+    return process_pool.connection()
+
+
+def pool_stats() -> dict:
+    return {"auth": auth_pool.stats(), "process": process_pool.stats()}
 
 
 def auth_query(sql: str, params=None):
-    conn = get_auth_connection()
-    with conn.cursor() as cur:
-        cur.execute(sql, params or ())
-        if sql.strip().upper().startswith("SELECT"):
-            return cur.fetchall()
-        conn.commit()
+    with get_auth_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params or ())
+            if sql.strip().upper().startswith("SELECT"):
+                return cur.fetchall()
+            conn.commit()
     return None
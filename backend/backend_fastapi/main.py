@@ -1,10 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import PORT, CORS_ORIGIN
+from config import PORT, CORS_ORIGIN, ROLLUP_ENABLED, SPC_ENABLED
+from async_db import close_pools, health_check, pool_stats
+from rollup import run_refresher
+from realtime_stream import realtime_hub
+from spc_alerts import run_spc_poller
 from routers import auth_router, dashboard_router
 
-app = FastAPI(title="AZAS Dashboard API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = asyncio.create_task(run_refresher()) if ROLLUP_ENABLED else None
+    spc_poller = asyncio.create_task(run_spc_poller()) if SPC_ENABLED else None
+    yield
+    if refresher:
+        refresher.cancel()
+    if spc_poller:
+        spc_poller.cancel()
+    await realtime_hub.stop()
+    await close_pools()
+
+
+app = FastAPI(title="AZAS Dashboard API", version="1.0.0", lifespan=lifespan)
 
 origins = [o.strip() for o in CORS_ORIGIN.split(",") if o.strip()]
 
@@ -25,6 +46,12 @@ async def health():
     return {"ok": True}
 
 
+@app.get("/health/db")
+async def health_db():
+    ok = await health_check()
+    return {"ok": all(ok.values()), "ping": ok, "pools": pool_stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True)
@@ -0,0 +1,196 @@
+"""실시간 센서 스트림 허브 (워커당 폴러 1개 → 모든 SSE/WebSocket 구독자에게 fan-out).
+
+구독자가 있는 동안만 폴러가 돌며 (마지막 구독자가 나가면 윈도우/센서 상태도 비운다), 새 행이 들어오면 컬럼별 롤링 윈도우로 trend/changePercent 를 계산해
+값이 바뀐 센서만 delta 로 보낸다. 새 구독자는 먼저 전체 snapshot 을 받는다.
+"""
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+
+from config import REALTIME_POLL_SECONDS, REALTIME_WINDOW, REALTIME_TREND_THRESHOLD
+from async_db import get_process_connection, fetch_all
+from dashboard_db import escape_sql_id, get_process_data_table, get_process_column_map
+
+
+class _Subscriber:
+    def __init__(self, maxsize: int = 64):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RealtimeHub:
+    def __init__(self, poll_seconds: float, window: int, trend_threshold: float):
+        self.poll_seconds = poll_seconds
+        self.window = window
+        self.trend_threshold = trend_threshold
+        self._subscribers: set = set()
+        self._task = None
+        self._last_ts = None
+        self._windows: dict = {}
+        self._sensors: dict = {}
+        self._columns: list = []
+        self.ticks = 0
+        self.rows_read = 0
+        self.last_error = None
+
+    # -- 상태 계산 ---------------------------------------------------------
+
+    def _apply_row(self, row: dict) -> list:
+        """행 하나를 롤링 윈도우에 반영하고 바뀐 센서 목록을 반환."""
+        changed = []
+        for col in self._columns:
+            val = _to_float(row.get(col))
+            win = self._windows.setdefault(col, deque(maxlen=self.window))
+            prev = win[-1] if win else None
+            mean = sum(win) / len(win) if win else val
+            win.append(val)
+            change = ((val - prev) / abs(prev) * 100) if prev not in (None, 0) else 0.0
+            drift = ((val - mean) / abs(mean) * 100) if mean else 0.0
+            if drift > self.trend_threshold:
+                trend = "up"
+            elif drift < -self.trend_threshold:
+                trend = "down"
+            else:
+                trend = "stable"
+            sensor = {
+                "name": col,
+                "nameKorean": col,
+                "currentValue": val,
+                "trend": trend,
+                "changePercent": round(change, 4),
+                "unit": "",
+            }
+            if self._sensors.get(col) != sensor:
+                self._sensors[col] = sensor
+                changed.append(sensor)
+        return changed
+
+    def _reset_state(self) -> None:
+        """폴러가 멈출 때: 다음 구독자가 낡은 값을 받거나 _last_ts 이후의 오래된 행을 다시 읽지 않도록."""
+        self._windows.clear()
+        self._sensors.clear()
+        self._last_ts = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def snapshot(self) -> dict | None:
+        if not self._sensors:
+            return None
+        return {
+            "type": "snapshot",
+            "ts": str(self._last_ts) if self._last_ts is not None else None,
+            "sensors": [self._sensors[c] for c in self._columns if c in self._sensors],
+        }
+
+    # -- 폴링 --------------------------------------------------------------
+
+    async def _poll_once(self) -> None:
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            date_col = m["dateCol"]
+            columns = m["numericCols"][:15]
+            if not date_col or not columns:
+                return
+            if columns != self._columns:
+                self._columns = columns
+                self._reset_state()
+            cols_sql = ", ".join(escape_sql_id(c) for c in columns)
+            tbl, dc = escape_sql_id(table), escape_sql_id(date_col)
+            if self._last_ts is None:
+                # 최초에는 윈도우를 채울 만큼 최근 행을 읽어 과거 순으로 반영
+                rows = await fetch_all(
+                    conn, f"SELECT {cols_sql}, {dc} as ts FROM {tbl} ORDER BY {dc} DESC LIMIT %s", (self.window,)
+                )
+                rows.reverse()
+            else:
+                rows = await fetch_all(
+                    conn,
+                    f"SELECT {cols_sql}, {dc} as ts FROM {tbl} WHERE {dc} > %s ORDER BY {dc} ASC LIMIT 500",
+                    (self._last_ts,),
+                )
+        self.ticks += 1
+        self.rows_read += len(rows)
+        changed: dict = {}
+        for row in rows:
+            for sensor in self._apply_row(row):
+                changed[sensor["name"]] = sensor
+            self._last_ts = row["ts"]
+        if changed:
+            self._publish({"type": "delta", "ts": str(self._last_ts), "sensors": list(changed.values())})
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self._poll_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = str(exc)
+            await asyncio.sleep(self.poll_seconds)
+        self._task = None
+        self._reset_state()
+
+    def _publish(self, message: dict) -> None:
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # 느린 구독자: 밀린 delta 를 버리고 최신 snapshot 으로 다시 맞춘다
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                snap = self.snapshot()
+                if snap:
+                    sub.queue.put_nowait(snap)
+
+    # -- 구독 --------------------------------------------------------------
+
+    def subscribe(self) -> _Subscriber:
+        sub = _Subscriber()
+        snap = self.snapshot()
+        if snap:
+            sub.queue.put_nowait(snap)
+        self._subscribers.add(sub)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    async def stop(self) -> None:
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._reset_state()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "running": self.running,
+            "ticks": self.ticks,
+            "rowsRead": self.rows_read,
+            "lastTs": str(self._last_ts) if self._last_ts is not None else None,
+            "lastError": self.last_error,
+        }
+
+
+def encode_message(message: dict) -> str:
+    def _default(o):
+        return o.isoformat() if isinstance(o, datetime) else str(o)
+
+    return json.dumps(message, ensure_ascii=False, default=_default)
+
+
+realtime_hub = RealtimeHub(REALTIME_POLL_SECONDS, REALTIME_WINDOW, REALTIME_TREND_THRESHOLD)
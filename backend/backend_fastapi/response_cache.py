@@ -0,0 +1,223 @@
+"""사용자와 무관한 대시보드 응답 캐시 (엔드포인트별 TTL, single-flight, LRU, ETag/304).
+
+기본은 워커 프로세스 내 메모리 캐시이고, CACHE_REDIS_URL 이 있으면 워커 간 공유 백엔드(redis)를 2차로 사용한다.
+공유 백엔드는 get/set/delete_prefix 세 메서드만 있으면 되므로 MemoryBackend 같은 로컬 대체물로 바꿔 끼울 수 있다.
+get 은 (값, 남은 TTL 초) 를 돌려주고, 공유 hit 은 로컬에도 그 남은 시간만큼만 둔다.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from config import CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_REDIS_URL
+
+
+class MemoryBackend:
+    """공유 백엔드 인터페이스의 로컬 구현 (개발/테스트용 redis 대체물)."""
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, key: str):
+        """(값, 남은 TTL 초) 또는 None."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        remaining = item[1] - time.time()
+        if remaining <= 0:
+            return None
+        return item[0], remaining
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (value, time.time() + ttl)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str):
+        """(값, 남은 TTL 초) 또는 None."""
+        async with self._client.pipeline(transaction=False) as pipe:
+            value, pttl = await pipe.get(key).pttl(key).execute()
+        if value is None or pttl == -2:
+            return None
+        # 만료 없는 키(-1)는 없지만 있으면 바로 다시 읽도록 0 으로 본다
+        return value, max(pttl, 0) / 1000
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        batch = []
+        async for key in self._client.scan_iter(match=prefix + "*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self._client.delete(*batch)
+                batch = []
+        if batch:
+            await self._client.delete(*batch)
+
+
+def _make_shared_backend():
+    if not CACHE_REDIS_URL:
+        return None
+    try:
+        return RedisBackend(CACHE_REDIS_URL)
+    except ImportError:
+        print("CACHE_REDIS_URL is set but the redis package is not installed; using in-process cache only")
+        return None
+
+
+def _encode(content) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, shared=None, prefix: str = "azas:dash:"):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.prefix = prefix
+        # key -> (expires, body, etag)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._inflight: dict = {}
+        self._evictions = 0
+        self._stats: dict = {}
+
+    def _stat(self, endpoint: str) -> dict:
+        s = self._stats.get(endpoint)
+        if s is None:
+            s = self._stats[endpoint] = {"hits": 0, "sharedHits": 0, "misses": 0, "coalesced": 0, "notModified": 0}
+        return s
+
+    def _get_local(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _put_local(self, key: str, body: bytes, ttl: float):
+        self._remove(key)
+        entry = (time.monotonic() + ttl, body, '"' + hashlib.sha1(body).hexdigest() + '"')
+        if len(body) > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self._bytes += len(body)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+        return entry
+
+    async def _load(self, endpoint: str, key: str, ttl: float, compute):
+        if self.shared is not None:
+            try:
+                item = await self.shared.get(self.prefix + key)
+            except Exception:
+                item = None
+            if item is not None:
+                body, remaining = item
+                self._stat(endpoint)["sharedHits"] += 1
+                # 다른 워커가 만든 항목: 공유 백엔드에 남은 시간만큼만 (TTL 의 두 배까지 낡지 않게)
+                return self._put_local(key, bytes(body), min(ttl, remaining))
+        self._stat(endpoint)["misses"] += 1
+        content = await compute()
+        body = _encode(content)
+        if not (isinstance(content, dict) and content.get("success") is False):
+            # 실패 응답은 캐시하지 않음
+            entry = self._put_local(key, body, ttl)
+            if self.shared is not None:
+                try:
+                    await self.shared.set(self.prefix + key, body, ttl)
+                except Exception:
+                    pass
+            return entry
+        return (0.0, body, '"' + hashlib.sha1(body).hexdigest() + '"')
+
+    async def get_or_compute(self, endpoint: str, key: str, ttl: float, compute):
+        """(body, etag) 반환. 같은 key 의 동시 miss 는 compute 를 한 번만 실행한다."""
+        if ttl <= 0:
+            body = _encode(await compute())
+            return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = self._get_local(key)
+        if entry is not None:
+            self._stat(endpoint)["hits"] += 1
+            return entry[1], entry[2]
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stat(endpoint)["coalesced"] += 1
+            entry = await asyncio.shield(future)
+            return entry[1], entry[2]
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._load(endpoint, key, ttl, compute)
+            future.set_result(entry)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 대기자가 없으면 "exception was never retrieved" 경고가 나지 않도록 소비
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        return entry[1], entry[2]
+
+    async def respond(self, request: Request, endpoint: str, key: str, ttl: float, compute) -> Response:
+        body, etag = await self.get_or_compute(endpoint, key, ttl, compute)
+        headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(ttl)}"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            self._stat(endpoint)["notModified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def clear(self) -> None:
+        """로컬 항목과 공유 백엔드의 prefix 키를 모두 지운다 (스키마/롤업 갱신, 알림 초기화 후)."""
+        self._entries.clear()
+        self._bytes = 0
+        if self.shared is not None:
+            try:
+                await self.shared.delete_prefix(self.prefix)
+            except Exception as exc:
+                print(f"Shared cache clear failed: {exc}")
+
+    def stats(self) -> dict:
+        endpoints = {}
+        for endpoint, s in self._stats.items():
+            served = s["hits"] + s["sharedHits"] + s["coalesced"]
+            total = served + s["misses"]
+            endpoints[endpoint] = {**s, "hitRatio": served / total if total else 0.0}
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "evictions": self._evictions,
+            "sharedBackend": type(self.shared).__name__ if self.shared is not None else None,
+            "endpoints": endpoints,
+        }
+
+
+dashboard_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, shared=_make_shared_backend())
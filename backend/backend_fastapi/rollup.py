@@ -0,0 +1,524 @@
+"""공정 테이블(preprocessing) 시간/일 단위 롤업.
+
+- dashboard_rollup_hourly   : 시간 버킷별 합계(sum/count)
+- dashboard_rollup_daily    : 일 버킷별 합계 (hourly 에서 재집계)
+- dashboard_rollup_lot_daily: 일 × LOT 별 레코드 수, 최신 판정, 파라미터 합계/개수
+- dashboard_rollup_state    : 테이블별 워터마크(이 시각 이전 행은 모두 롤업됨)
+
+워터마크는 항상 정시(완료된 시간)까지만 전진한다. 대시보드 조회는
+[start, watermark) 구간을 롤업에서, [watermark, end) 구간(현재 진행 중인 시간)을 원본에서 읽어 합친다.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from config import (
+    BACKEND_DATE_TZ,
+    ROLLUP_ENABLED,
+    ROLLUP_REFRESH_SECONDS,
+    ROLLUP_LOOKBACK_HOURS,
+    ROLLUP_CHUNK_DAYS,
+)
+from async_db import get_process_connection, fetch_all, fetch_one
+from dashboard_db import (
+    escape_sql_id,
+    get_columns,
+    get_process_data_table,
+    get_process_column_map,
+    aggregate_selects,
+    build_range_query,
+    lot_param_columns,
+    lot_result_column,
+)
+
+HOURLY_TABLE = "dashboard_rollup_hourly"
+DAILY_TABLE = "dashboard_rollup_daily"
+LOT_DAILY_TABLE = "dashboard_rollup_lot_daily"
+STATE_TABLE = "dashboard_rollup_state"
+
+_AGGREGATE_DDL = """
+  record_count BIGINT NOT NULL,
+  production_sum DOUBLE NOT NULL,
+  defect_sum DOUBLE NOT NULL,
+  energy_sum DOUBLE NOT NULL,
+  efficiency_sum DOUBLE NOT NULL,
+  efficiency_count BIGINT NOT NULL,
+  pass_rate_sum DOUBLE NOT NULL,
+  pass_rate_count BIGINT NOT NULL,"""
+
+_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+  source_table VARCHAR(64) NOT NULL PRIMARY KEY,
+  watermark DATETIME NULL,
+  signature CHAR(32) NOT NULL,
+  refreshed_at DATETIME NOT NULL
+) ENGINE=InnoDB""",
+    f"""CREATE TABLE IF NOT EXISTS {HOURLY_TABLE} (
+  source_table VARCHAR(64) NOT NULL,
+  bucket DATETIME NOT NULL,{_AGGREGATE_DDL}
+  PRIMARY KEY (source_table, bucket)
+) ENGINE=InnoDB""",
+    f"""CREATE TABLE IF NOT EXISTS {DAILY_TABLE} (
+  source_table VARCHAR(64) NOT NULL,
+  bucket DATE NOT NULL,{_AGGREGATE_DDL}
+  PRIMARY KEY (source_table, bucket)
+) ENGINE=InnoDB""",
+    f"""CREATE TABLE IF NOT EXISTS {LOT_DAILY_TABLE} (
+  source_table VARCHAR(64) NOT NULL,
+  bucket DATE NOT NULL,
+  lot_id VARCHAR(191) NOT NULL,
+  record_count BIGINT NOT NULL,
+  latest_date DATETIME NULL,
+  latest_result VARCHAR(64) NULL,
+  param_sums TEXT NOT NULL,
+  param_counts TEXT NOT NULL,
+  PRIMARY KEY (source_table, bucket, lot_id)
+) ENGINE=InnoDB""",
+]
+
+_status = {"lastRefresh": None, "lastDurationMs": None, "lastError": None, "refreshes": 0}
+_tables_ready = False
+
+
+def _now_local() -> datetime:
+    try:
+        return datetime.now(ZoneInfo(BACKEND_DATE_TZ)).replace(tzinfo=None)
+    except Exception:
+        return datetime.utcnow()
+
+
+def _hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_floor(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+
+def _signature(m: dict, param_cols: list[str]) -> str:
+    """롤업 정의(컬럼 매핑)가 바뀌면 워터마크를 버리고 처음부터 다시 쌓는다."""
+    key = json.dumps([aggregate_selects(m), m["dateCol"], m["lotCol"], lot_result_column(m), param_cols])
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def _num(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+async def _ensure_tables(conn) -> None:
+    global _tables_ready
+    if _tables_ready:
+        return
+    async with conn.cursor() as cur:
+        for ddl in _DDL:
+            await cur.execute(ddl)
+    await conn.commit()
+    _tables_ready = True
+
+
+async def _load_definition(conn):
+    table = get_process_data_table(conn)
+    m = await get_process_column_map(conn, table)
+    param_cols = lot_param_columns(m, await get_columns(conn, table)) if m["lotCol"] else []
+    return table, m, param_cols
+
+
+# ---------------------------------------------------------------------------
+# 원본 스캔 (롤업 갱신과 워터마크 이후 구간 조회가 같은 쿼리를 쓴다)
+# ---------------------------------------------------------------------------
+
+def _scan_conditions(m: dict, start, end, lots: list | None, alias: str = "") -> tuple[str, list]:
+    """원본 LOT 스캔용 WHERE 조건 ([start, end) 날짜 범위 + LOT 목록, None 이면 생략)."""
+    prefix = f"{alias}." if alias else ""
+    conds, params = [], []
+    if m["dateCol"] and start is not None:
+        date_col = prefix + escape_sql_id(m["dateCol"])
+        conds.append(f"{date_col} >= %s")
+        params.append(start)
+        if end is not None:
+            conds.append(f"{date_col} < %s")
+            params.append(end)
+    if lots is not None:
+        conds.append(f"{prefix}{escape_sql_id(m['lotCol'])} IN ({', '.join(['%s'] * len(lots))})")
+        params.extend(lots)
+    return " AND ".join(conds) or "1=1", params
+
+
+async def scan_lot_aggregates(conn, table: str, m: dict, param_cols: list[str], start, end, lots: list | None = None) -> dict:
+    """[start, end) 원본 행을 LOT 별로 집계. 최신 판정은 GROUP_CONCAT 대신 MAX(date) 조인으로 구한다.
+
+    start/end 가 None 이면 그쪽 날짜 경계 없이, lots 가 있으면 해당 LOT 만 집계한다.
+    """
+    if lots is not None and not lots:
+        return {}
+    tbl = escape_sql_id(table)
+    lot_col = escape_sql_id(m["lotCol"])
+    date_col = escape_sql_id(m["dateCol"]) if m["dateCol"] else None
+    result_col = lot_result_column(m)
+    selects = [f"{lot_col} as lot_id", "COUNT(*) as record_count"]
+    if date_col:
+        selects.append(f"MAX({date_col}) as latest_date")
+    elif result_col:
+        selects.append(f"CAST(MAX({escape_sql_id(result_col)}) AS CHAR) as latest_result")
+    for i, col in enumerate(param_cols):
+        selects.append(f"SUM({escape_sql_id(col)}) as s{i}")
+        selects.append(f"COUNT({escape_sql_id(col)}) as c{i}")
+    where, params = _scan_conditions(m, start, end, lots)
+    out = {}
+    for r in await fetch_all(conn, f"SELECT {', '.join(selects)} FROM {tbl} WHERE {where} GROUP BY {lot_col}", params):
+        out[str(r["lot_id"])] = {
+            "lot_id": r["lot_id"],
+            "record_count": int(r["record_count"] or 0),
+            "latest_date": r.get("latest_date"),
+            "latest_result": r.get("latest_result"),
+            "sums": {col: _num(r[f"s{i}"]) for i, col in enumerate(param_cols)},
+            "counts": {col: int(r[f"c{i}"] or 0) for i, col in enumerate(param_cols)},
+        }
+    if out and result_col and date_col:
+        outer_where, outer_params = _scan_conditions(m, start, end, lots, alias="t")
+        rows = await fetch_all(
+            conn,
+            f"""SELECT t.{lot_col} as lot_id, CAST(t.{escape_sql_id(result_col)} AS CHAR) as latest_result
+                FROM {tbl} t
+                JOIN (SELECT {lot_col} as lot_key, MAX({date_col}) as max_date
+                      FROM {tbl} WHERE {where} GROUP BY {lot_col}) x
+                  ON t.{lot_col} = x.lot_key AND t.{date_col} = x.max_date
+                WHERE {outer_where}""",
+            params + outer_params,
+        )
+        for r in rows:
+            lot = out.get(str(r["lot_id"]))
+            if lot is not None:
+                lot["latest_result"] = r["latest_result"]
+    return out
+
+
+def _merge_lot(into: dict, lot: dict) -> None:
+    into["record_count"] += lot["record_count"]
+    if lot["latest_date"] is not None and (
+        into["latest_date"] is None or _as_datetime(lot["latest_date"]) >= _as_datetime(into["latest_date"])
+    ):
+        into["latest_date"] = lot["latest_date"]
+        into["latest_result"] = lot["latest_result"]
+    for col, v in lot["sums"].items():
+        into["sums"][col] = into["sums"].get(col, 0.0) + v
+    for col, n in lot["counts"].items():
+        into["counts"][col] = into["counts"].get(col, 0) + n
+
+
+# ---------------------------------------------------------------------------
+# 갱신
+# ---------------------------------------------------------------------------
+
+async def _refresh_range(conn, table: str, m: dict, param_cols: list[str], start: datetime, end: datetime) -> None:
+    """[start, end) 를 다시 집계. start/end 는 정시여야 한다."""
+    date_col = escape_sql_id(m["dateCol"])
+    selects = aggregate_selects(m)
+    keys = ", ".join(alias for alias, _ in selects)
+    bucket = f"TIMESTAMP(DATE({date_col}), MAKETIME(HOUR({date_col}), 0, 0))"
+    hourly_sql, hourly_params = build_range_query(
+        table, m["dateCol"], [("source_table", "%s"), ("bucket", bucket)] + selects, start, end, group_by=bucket,
+    )
+    first_day = _day_floor(start)
+    last_day = _day_floor(end - timedelta(microseconds=1))
+    async with conn.cursor() as cur:
+        await cur.execute(
+            f"DELETE FROM {HOURLY_TABLE} WHERE source_table = %s AND bucket >= %s AND bucket < %s",
+            (table, start, end),
+        )
+        await cur.execute(
+            f"INSERT INTO {HOURLY_TABLE} (source_table, bucket, {keys}) {hourly_sql}",
+            [table] + hourly_params,
+        )
+        await cur.execute(
+            f"DELETE FROM {DAILY_TABLE} WHERE source_table = %s AND bucket >= %s AND bucket <= %s",
+            (table, first_day.date(), last_day.date()),
+        )
+        sums = ", ".join(f"SUM({alias})" for alias, _ in selects)
+        await cur.execute(
+            f"""INSERT INTO {DAILY_TABLE} (source_table, bucket, {keys})
+                SELECT source_table, DATE(bucket), {sums} FROM {HOURLY_TABLE}
+                WHERE source_table = %s AND bucket >= %s AND bucket < %s
+                GROUP BY source_table, DATE(bucket)""",
+            (table, first_day, last_day + timedelta(days=1)),
+        )
+    if not m["lotCol"]:
+        return
+    day = first_day
+    while day <= last_day:
+        day_end = min(day + timedelta(days=1), end)
+        lots = await scan_lot_aggregates(conn, table, m, param_cols, day, day_end)
+        async with conn.cursor() as cur:
+            await cur.execute(
+                f"DELETE FROM {LOT_DAILY_TABLE} WHERE source_table = %s AND bucket = %s",
+                (table, day.date()),
+            )
+            if lots:
+                await cur.executemany(
+                    f"""INSERT INTO {LOT_DAILY_TABLE}
+                        (source_table, bucket, lot_id, record_count, latest_date, latest_result, param_sums, param_counts)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+                    [
+                        (
+                            table, day.date(), key, lot["record_count"], lot["latest_date"], lot["latest_result"],
+                            json.dumps(lot["sums"]), json.dumps(lot["counts"]),
+                        )
+                        for key, lot in lots.items()
+                    ],
+                )
+        day += timedelta(days=1)
+
+
+async def refresh_rollups() -> dict:
+    """워터마크 이후 완료된 시간 구간을 롤업에 반영. 워커가 여럿이어도 GET_LOCK 으로 한 곳만 갱신한다."""
+    started = time.monotonic()
+    async with get_process_connection() as conn:
+        table, m, param_cols = await _load_definition(conn)
+        if not m["dateCol"]:
+            return {"success": False, "reason": "NO_DATE_COLUMN"}
+        await _ensure_tables(conn)
+        lock = await fetch_one(conn, "SELECT GET_LOCK(%s, 0) as ok", (f"dashboard_rollup:{table}",))
+        if not lock or not lock["ok"]:
+            return {"success": True, "skipped": True}
+        try:
+            sig = _signature(m, param_cols)
+            state = await fetch_one(
+                conn, f"SELECT watermark, signature FROM {STATE_TABLE} WHERE source_table = %s", (table,)
+            )
+            if state is None or state["signature"] != sig or state["watermark"] is None:
+                async with conn.cursor() as cur:
+                    for t in (HOURLY_TABLE, DAILY_TABLE, LOT_DAILY_TABLE):
+                        await cur.execute(f"DELETE FROM {t} WHERE source_table = %s", (table,))
+                first = await fetch_one(
+                    conn, f"SELECT MIN({escape_sql_id(m['dateCol'])}) as first FROM {escape_sql_id(table)}"
+                )
+                if not first or first["first"] is None:
+                    await conn.commit()
+                    return {"success": True, "watermark": None}
+                start = _day_floor(_as_datetime(first["first"]))
+            else:
+                start = _as_datetime(state["watermark"]) - timedelta(hours=ROLLUP_LOOKBACK_HOURS)
+            target = _hour_floor(_now_local())
+            watermark = start
+            while watermark < target:
+                chunk_end = min(watermark + timedelta(days=ROLLUP_CHUNK_DAYS), target)
+                await _refresh_range(conn, table, m, param_cols, watermark, chunk_end)
+                await _save_state(conn, table, chunk_end, sig)
+                await conn.commit()
+                watermark = chunk_end
+        finally:
+            await fetch_one(conn, "SELECT RELEASE_LOCK(%s) as ok", (f"dashboard_rollup:{table}",))
+    _status["lastRefresh"] = _now_local().isoformat(timespec="seconds")
+    _status["lastDurationMs"] = (time.monotonic() - started) * 1000
+    _status["refreshes"] += 1
+    return {"success": True, "watermark": str(watermark)}
+
+
+async def _save_state(conn, table: str, watermark: datetime, sig: str) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute(
+            f"""REPLACE INTO {STATE_TABLE} (source_table, watermark, signature, refreshed_at)
+                VALUES (%s, %s, %s, %s)""",
+            (table, watermark, sig, _now_local()),
+        )
+
+
+async def run_refresher() -> None:
+    """lifespan 에서 띄우는 백그라운드 루프."""
+    while True:
+        try:
+            await refresh_rollups()
+            _status["lastError"] = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _status["lastError"] = str(exc)
+            print(f"rollup refresh failed: {exc}")
+        await asyncio.sleep(ROLLUP_REFRESH_SECONDS)
+
+
+def rollup_status() -> dict:
+    return {"enabled": ROLLUP_ENABLED, **_status}
+
+
+# ---------------------------------------------------------------------------
+# 조회 (롤업 + 워터마크 이후 원본)
+# ---------------------------------------------------------------------------
+
+async def get_watermark(conn, table: str, m: dict, param_cols: list[str] | None = None):
+    """롤업을 쓸 수 있으면 워터마크(datetime), 아니면 None (원본 스캔으로 대체)."""
+    if not ROLLUP_ENABLED or not _tables_ready or not m["dateCol"]:
+        return None
+    if param_cols is None:
+        param_cols = lot_param_columns(m, await get_columns(conn, table)) if m["lotCol"] else []
+    try:
+        state = await fetch_one(
+            conn, f"SELECT watermark, signature FROM {STATE_TABLE} WHERE source_table = %s", (table,)
+        )
+    except Exception:
+        return None
+    if not state or state["watermark"] is None or state["signature"] != _signature(m, param_cols):
+        return None
+    return _as_datetime(state["watermark"])
+
+
+def _empty_totals(m: dict) -> dict:
+    return {alias: 0.0 for alias, _ in aggregate_selects(m)}
+
+
+def _add_totals(into: dict, row: dict) -> None:
+    for key in into:
+        into[key] += _num(row.get(key))
+
+
+async def range_totals(conn, table: str, m: dict, start: str, end: str, watermark=None) -> dict:
+    """[start, end) 전체 합계 (sum/count)."""
+    totals = _empty_totals(m)
+    start_dt, end_dt = _as_datetime(start), _as_datetime(end)
+    raw_start = start_dt
+    if watermark is not None and watermark > start_dt:
+        row = await fetch_one(
+            conn,
+            f"""SELECT {", ".join(f"SUM({k}) as {k}" for k in totals)} FROM {HOURLY_TABLE}
+                WHERE source_table = %s AND bucket >= %s AND bucket < %s""",
+            (table, start_dt, min(end_dt, watermark)),
+        )
+        _add_totals(totals, row or {})
+        raw_start = min(end_dt, watermark)
+    if raw_start < end_dt:
+        sql, params = build_range_query(table, m["dateCol"], aggregate_selects(m), raw_start, end_dt)
+        _add_totals(totals, await fetch_one(conn, sql, params) or {})
+    return totals
+
+
+async def daily_totals(conn, table: str, m: dict, start: str, end: str, watermark=None) -> dict:
+    """[start, end) 일자별 합계. {date: totals}"""
+    by_day: dict = {}
+    start_dt, end_dt = _as_datetime(start), _as_datetime(end)
+    raw_start = start_dt
+    keys = list(_empty_totals(m))
+    if watermark is not None and watermark > start_dt:
+        rows = await fetch_all(
+            conn,
+            f"""SELECT bucket, {", ".join(keys)} FROM {DAILY_TABLE}
+                WHERE source_table = %s AND bucket >= %s AND bucket < %s""",
+            (table, start_dt.date(), end_dt.date()),
+        )
+        for r in rows:
+            _add_totals(by_day.setdefault(_as_datetime(r["bucket"]).date(), _empty_totals(m)), r)
+        raw_start = min(end_dt, watermark)
+    if raw_start < end_dt:
+        date_col = escape_sql_id(m["dateCol"])
+        sql, params = build_range_query(
+            table, m["dateCol"], [("bucket", f"DATE({date_col})")] + aggregate_selects(m), raw_start, end_dt,
+            group_by=f"DATE({date_col})",
+        )
+        for r in await fetch_all(conn, sql, params):
+            _add_totals(by_day.setdefault(_as_datetime(r["bucket"]).date(), _empty_totals(m)), r)
+    return by_day
+
+
+async def lot_aggregates(
+    conn, table: str, m: dict, param_cols: list[str], start: str, end: str, watermark=None, only: list | None = None
+) -> dict:
+    """[start, end) LOT 별 집계. {lot_key: {record_count, latest_date, latest_result, sums, counts}}
+
+    only 가 있으면 해당 LOT 만 집계한다 (lot-status 페이지 단위 조회).
+    """
+    lots: dict = {}
+    if only is not None and not only:
+        return lots
+    start_dt, end_dt = _as_datetime(start), _as_datetime(end)
+    raw_start = start_dt
+    if watermark is not None and watermark > start_dt:
+        lot_filter = f" AND lot_id IN ({', '.join(['%s'] * len(only))})" if only is not None else ""
+        rows = await fetch_all(
+            conn,
+            f"""SELECT lot_id, record_count, latest_date, latest_result, param_sums, param_counts
+                FROM {LOT_DAILY_TABLE} WHERE source_table = %s AND bucket >= %s AND bucket < %s{lot_filter}""",
+            (table, start_dt.date(), end_dt.date(), *[str(k) for k in (only or [])]),
+        )
+        for r in rows:
+            lot = {
+                "lot_id": r["lot_id"],
+                "record_count": int(r["record_count"] or 0),
+                "latest_date": r["latest_date"],
+                "latest_result": r["latest_result"],
+                "sums": json.loads(r["param_sums"] or "{}"),
+                "counts": json.loads(r["param_counts"] or "{}"),
+            }
+            into = lots.get(r["lot_id"])
+            if into is None:
+                lots[r["lot_id"]] = lot
+            else:
+                _merge_lot(into, lot)
+        raw_start = min(end_dt, watermark)
+    if raw_start < end_dt:
+        for key, lot in (await scan_lot_aggregates(conn, table, m, param_cols, raw_start, end_dt, only)).items():
+            into = lots.get(key)
+            if into is None:
+                lots[key] = lot
+            else:
+                _merge_lot(into, lot)
+    return lots
+
+
+def lot_order_key(m: dict):
+    """LOT 키 정렬 기준 (SQL ORDER BY lot 과 같은 순서: 숫자 컬럼이면 수치, 아니면 대소문자 무시 문자열)."""
+    if m["lotCol"] in m["numericCols"]:
+        return lambda key: (float(key), str(key))
+    return lambda key: (str(key).casefold(), str(key))
+
+
+async def lot_keys(conn, table: str, m: dict, start, end, watermark=None, after=None, limit: int = 100) -> list:
+    """[start, end) 에 등장한 LOT 키를 정렬 순서대로 after 다음부터 최대 limit 개 (keyset 페이지).
+
+    원본은 lot 컬럼 인덱스로 `lot > after ORDER BY lot LIMIT n` 만 읽고, 워터마크 이전 구간은 롤업에서 읽어 합친다.
+    """
+    lot_col = escape_sql_id(m["lotCol"])
+    numeric = m["lotCol"] in m["numericCols"]
+    keys: dict = {}
+    raw_start = start
+    if watermark is not None and start is not None and watermark > _as_datetime(start):
+        start_dt, end_dt = _as_datetime(start), _as_datetime(end)
+        rolled = "CAST(lot_id AS DECIMAL(65,10))" if numeric else "lot_id"
+        cond, params = "", [table, start_dt.date(), end_dt.date()]
+        if after is not None:
+            cond = f" AND {rolled} > %s"
+            params.append(after)
+        rows = await fetch_all(
+            conn,
+            f"""SELECT DISTINCT lot_id FROM {LOT_DAILY_TABLE}
+                WHERE source_table = %s AND bucket >= %s AND bucket < %s{cond}
+                ORDER BY {rolled} LIMIT %s""",
+            (*params, limit),
+        )
+        for r in rows:
+            keys.setdefault(str(r["lot_id"]), r["lot_id"])
+        raw_start = min(end_dt, watermark)
+    if raw_start is None or end is None or _as_datetime(raw_start) < _as_datetime(end):
+        where, params = _scan_conditions(m, raw_start, end, None)
+        where += f" AND {lot_col} IS NOT NULL"
+        if after is not None:
+            where += f" AND {lot_col} > %s"
+            params.append(after)
+        rows = await fetch_all(
+            conn,
+            f"SELECT {lot_col} as lot_id FROM {escape_sql_id(table)} WHERE {where} GROUP BY {lot_col} ORDER BY {lot_col} LIMIT %s",
+            (*params, limit),
+        )
+        for r in rows:
+            keys.setdefault(str(r["lot_id"]), r["lot_id"])
+    order = lot_order_key(m)
+    return sorted(keys, key=order)[:limit]
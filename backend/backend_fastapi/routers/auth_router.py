@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import bcrypt
 
-from db import auth_query
+from async_db import auth_query
 from auth_jwt import sign_token, verify_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -47,13 +48,14 @@ async def get_current_user(
 async def login(body: LoginBody):
     if not body.employeeNumber or not body.password:
         raise HTTPException(status_code=400, detail="사원번호와 비밀번호를 입력해주세요.")
-    rows = auth_query("SELECT * FROM users WHERE employee_number = %s", (body.employeeNumber,))
+    rows = await auth_query("SELECT * FROM users WHERE employee_number = %s", (body.employeeNumber,))
     if not rows:
         raise HTTPException(status_code=401, detail="사원번호 또는 비밀번호가 올바르지 않습니다.")
     user = rows[0]
     pw = user["password"]
     pw_b = pw.encode("utf-8") if isinstance(pw, str) else pw
-    if not bcrypt.checkpw(body.password.encode("utf-8"), pw_b):
+    # bcrypt 는 CPU 바운드라 이벤트 루프 밖에서 실행
+    if not await run_in_threadpool(bcrypt.checkpw, body.password.encode("utf-8"), pw_b):
         raise HTTPException(status_code=401, detail="사원번호 또는 비밀번호가 올바르지 않습니다.")
     user_data = {
         "employeeNumber": user["employee_number"],
@@ -73,12 +75,12 @@ async def signup(body: SignupBody):
     if len(body.password) < 4:
         raise HTTPException(status_code=400, detail="비밀번호는 최소 4자 이상이어야 합니다.")
     emp = str(body.employeeNumber).strip()
-    existing = auth_query("SELECT employee_number FROM users WHERE employee_number = %s", (emp,))
+    existing = await auth_query("SELECT employee_number FROM users WHERE employee_number = %s", (emp,))
     if existing:
         raise HTTPException(status_code=409, detail="이미 사용 중인 사원번호입니다.")
-    hashed = bcrypt.hashpw(body.password.encode("utf-8"), bcrypt.gensalt(rounds=10)).decode("utf-8")
+    hashed = (await run_in_threadpool(bcrypt.hashpw, body.password.encode("utf-8"), bcrypt.gensalt(rounds=10))).decode("utf-8")
     try:
-        auth_query(
+        await auth_query(
             "INSERT INTO users (employee_number, name, password, role) VALUES (%s, %s, %s, %s)",
             (emp, "사용자", hashed, "user"),
         )
@@ -96,8 +98,8 @@ async def update_name(body: UpdateNameBody, user=Depends(get_current_user)):
     ok, err, value = validate_name(body.name)
     if not ok:
         raise HTTPException(status_code=400, detail=err)
-    auth_query("UPDATE users SET name = %s WHERE employee_number = %s", (value, user["employeeNumber"]))
-    rows = auth_query(
+    await auth_query("UPDATE users SET name = %s WHERE employee_number = %s", (value, user["employeeNumber"]))
+    rows = await auth_query(
         "SELECT employee_number, name, role FROM users WHERE employee_number = %s",
         (user["employeeNumber"],),
     )
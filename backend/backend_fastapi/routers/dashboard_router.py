@@ -1,20 +1,47 @@
 """대시보드 API (summary, calendar-month, lot-status 등)."""
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from auth_jwt import verify_token
-from db import get_process_connection
+from config import CACHE_TTL, ANALYTICS_WINDOWS, ANALYTICS_DEFAULT_WINDOW
+from async_db import get_process_connection, fetch_one
 from dashboard_db import (
     get_process_data_table,
     get_process_column_map,
     get_today_date_string,
     get_dashboard_date_strings,
     escape_sql_id,
-    is_safe_column_name,
     get_columns,
+    invalidate_schema_cache,
+    schema_cache_stats,
+    next_date_string,
+    lot_param_columns,
+    lot_result_column,
+)
+from response_cache import dashboard_cache
+from realtime_stream import realtime_hub, encode_message
+from spc_alerts import spc_engine
+from analytics import compute_analytics, parse_windows
+from rollup import (
+    get_watermark,
+    range_totals,
+    daily_totals,
+    lot_aggregates,
+    lot_keys,
+    scan_lot_aggregates,
+    refresh_rollups,
+    rollup_status,
 )
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+ANALYTICS_WINDOW_DAYS = parse_windows(ANALYTICS_WINDOWS)
+LOT_STATUS_DEFAULT_LIMIT = 30
+LOT_STATUS_MAX_PAGE = 500
+
 security = HTTPBearer(auto_error=False)
 
 
@@ -27,282 +54,364 @@ async def require_auth(credentials: HTTPAuthorizationCredentials = Depends(secur
     return user
 
 
+async def require_admin(user=Depends(require_auth)):
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return user
+
+
+@router.get("/schema/stats")
+async def schema_stats(user=Depends(require_auth)):
+    return {"success": True, "cache": schema_cache_stats()}
+
+
+@router.post("/schema/refresh")
+async def schema_refresh(table: str = "", user=Depends(require_admin)):
+    """컬럼 추가/변경 후 캐시된 컬럼 메타를 즉시 무효화."""
+    removed = invalidate_schema_cache(table or None)
+    await dashboard_cache.clear()
+    return {"success": True, "invalidated": removed, "cache": schema_cache_stats()}
+
+
+@router.get("/rollup/status")
+async def rollup_state(user=Depends(require_auth)):
+    return {"success": True, "rollup": rollup_status()}
+
+
+@router.post("/rollup/refresh")
+async def rollup_refresh(user=Depends(require_admin)):
+    """롤업을 워터마크 이후로 즉시 갱신 (백그라운드 주기를 기다리지 않음)."""
+    try:
+        result = await refresh_rollups()
+        await dashboard_cache.clear()
+        return result
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@router.get("/cache/stats")
+async def cache_stats(user=Depends(require_auth)):
+    return {"success": True, "cache": dashboard_cache.stats()}
+
+
+# summary / calendar-month / alerts / realtime 응답은 사용자와 무관하므로 dashboard_cache 로 공유한다.
 @router.get("/summary")
-async def summary(user=Depends(require_auth)):
-    conn = get_process_connection()
+async def summary(request: Request, user=Depends(require_auth)):
+    return await dashboard_cache.respond(request, "summary", "summary", CACHE_TTL["summary"], _summary_payload)
+
+
+async def _summary_payload():
     try:
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        today_str = get_today_date_string()
-        date_col = m["dateCol"]
-        date_condition = f"WHERE DATE({escape_sql_id(date_col)}) = %s" if date_col else ""
-        production_today = None
-        equipment_rate = None
-        quality_rate = None
-        energy_today = None
-        with conn.cursor() as cur:
-            if m["quantityCol"] and date_col:
-                cur.execute(
-                    f"SELECT COALESCE(SUM({escape_sql_id(m['quantityCol'])}), 0) as total FROM {escape_sql_id(table)} {date_condition}",
-                    (today_str,),
-                )
-                row = cur.fetchone()
-                production_today = float(row["total"] or 0) if row else None
-            if m["efficiencyCol"] and date_col:
-                cur.execute(
-                    f"SELECT AVG({escape_sql_id(m['efficiencyCol'])}) as avg_rate FROM {escape_sql_id(table)} {date_condition}",
-                    (today_str,),
-                )
-                row = cur.fetchone()
-                if row and row.get("avg_rate") is not None:
-                    equipment_rate = float(row["avg_rate"])
-            if m["passRateCol"] and date_col:
-                cur.execute(
-                    f"SELECT AVG({escape_sql_id(m['passRateCol'])}) as avg_rate FROM {escape_sql_id(table)} {date_condition}",
-                    (today_str,),
-                )
-                row = cur.fetchone()
-                if row and row.get("avg_rate") is not None:
-                    quality_rate = float(row["avg_rate"])
-            if m["consumptionCol"] and date_col:
-                cur.execute(
-                    f"SELECT COALESCE(SUM({escape_sql_id(m['consumptionCol'])}), 0) as total FROM {escape_sql_id(table)} {date_condition}",
-                    (today_str,),
-                )
-                row = cur.fetchone()
-                energy_today = float(row["total"] or 0) if row else None
-        from_db = any(x is not None for x in [production_today, equipment_rate, quality_rate, energy_today])
-        return {
-            "success": True,
-            "data": {
-                "productionToday": production_today,
-                "equipmentRate": equipment_rate,
-                "qualityRate": quality_rate,
-                "energyToday": energy_today,
-            },
-            "fromDb": from_db,
-            "tables": [table],
-            "usedTables": [table],
-        }
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            today_str = get_today_date_string()
+            date_col = m["dateCol"]
+            production_today = None
+            equipment_rate = None
+            quality_rate = None
+            energy_today = None
+            if date_col:
+                watermark = await get_watermark(conn, table, m)
+                t = await range_totals(conn, table, m, today_str, next_date_string(today_str), watermark)
+                if m["quantityCol"]:
+                    production_today = t["production_sum"]
+                if m["efficiencyCol"] and t["efficiency_count"]:
+                    equipment_rate = t["efficiency_sum"] / t["efficiency_count"]
+                if m["passRateCol"] and t["pass_rate_count"]:
+                    quality_rate = t["pass_rate_sum"] / t["pass_rate_count"]
+                if m["consumptionCol"]:
+                    energy_today = t["energy_sum"]
+            from_db = any(x is not None for x in [production_today, equipment_rate, quality_rate, energy_today])
+            return {
+                "success": True,
+                "data": {
+                    "productionToday": production_today,
+                    "equipmentRate": equipment_rate,
+                    "qualityRate": quality_rate,
+                    "energyToday": energy_today,
+                },
+                "fromDb": from_db,
+                "tables": [table],
+                "usedTables": [table],
+            }
     except Exception as e:
         return {"success": False, "error": str(e), "data": None, "fromDb": False, "tables": [], "usedTables": []}
 
 
 @router.get("/calendar-month")
-async def calendar_month(year: int = None, month: int = None, user=Depends(require_auth)):
+async def calendar_month(request: Request, year: int = None, month: int = None, user=Depends(require_auth)):
     from datetime import datetime
     now = datetime.now()
     year = year or now.year
     month = month or now.month
-    conn = get_process_connection()
+    return await dashboard_cache.respond(
+        request, "calendar-month", f"calendar-month:{year}-{month:02d}", CACHE_TTL["calendar-month"],
+        lambda: _calendar_month_payload(year, month),
+    )
+
+
+async def _calendar_month_payload(year: int, month: int):
     try:
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        date_col = m["dateCol"]
-        if not date_col:
-            return {"success": True, "year": year, "month": month, "days": [], "productionUnit": "개", "productionUnitEn": "ea"}
-        month_start = f"{year}-{month:02d}-01"
-        from calendar import monthrange
-        last_d = monthrange(year, month)[1]
-        month_end = f"{year}-{month:02d}-{last_d:02d}"
-        qty_col = m["quantityCol"] or "id"
-        has_qty = m["quantityCol"] is not None
-        quantity_sel = f"COALESCE(SUM({escape_sql_id(qty_col)}), 0)" if has_qty else "COUNT(*)"
-        if m["resultCol"]:
-            defect_sel = f"AVG(COALESCE(CAST({escape_sql_id(m['resultCol'])} AS DECIMAL(10,4)), 0)) * 100"
-        elif m["defectCol"]:
-            defect_sel = f"AVG(COALESCE({escape_sql_id(m['defectCol'])}, 0))"
-        elif m["passRateCol"]:
-            defect_sel = f"100 - AVG(COALESCE({escape_sql_id(m['passRateCol'])}, 100))"
-        else:
-            defect_sel = "0"
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""SELECT DAY({escape_sql_id(date_col)}) as d, {quantity_sel} as production, {defect_sel} as defect_rate
-                    FROM {escape_sql_id(table)}
-                    WHERE {escape_sql_id(date_col)} >= %s AND {escape_sql_id(date_col)} < DATE_ADD(%s, INTERVAL 1 MONTH)
-                    GROUP BY DATE({escape_sql_id(date_col)})
-                    ORDER BY d""",
-                (month_start, month_start),
-            )
-            rows = cur.fetchall()
-        by_day = {int(r["d"]): {"production": float(r["production"] or 0), "defectRate": float(r["defect_rate"] or 0)} for r in rows}
-        days = [{"day": d, "production": by_day.get(d, {}).get("production", 0), "defectRate": by_day.get(d, {}).get("defectRate", 0)} for d in range(1, last_d + 1)]
-        unit_ko = "kg" if (m["quantityCol"] or "").lower() in ("lithium_input", "lithium") else "개"
-        unit_en = "kg" if unit_ko == "kg" else "ea"
-        return {"success": True, "year": year, "month": month, "lastDay": last_d, "days": days, "productionUnit": unit_ko, "productionUnitEn": unit_en}
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            date_col = m["dateCol"]
+            if not date_col:
+                return {"success": True, "year": year, "month": month, "days": [], "productionUnit": "개", "productionUnitEn": "ea"}
+            month_start = f"{year}-{month:02d}-01"
+            from calendar import monthrange
+            last_d = monthrange(year, month)[1]
+            next_month_start = next_date_string(f"{year}-{month:02d}-{last_d:02d}")
+            watermark = await get_watermark(conn, table, m)
+            totals = await daily_totals(conn, table, m, month_start, next_month_start, watermark)
+            by_day = {}
+            for day, t in totals.items():
+                count = t["record_count"]
+                by_day[day.day] = {
+                    "production": t["production_sum"] if m["quantityCol"] else count,
+                    "defectRate": t["defect_sum"] / count if count else 0.0,
+                }
+            days = [{"day": d, "production": by_day.get(d, {}).get("production", 0), "defectRate": by_day.get(d, {}).get("defectRate", 0)} for d in range(1, last_d + 1)]
+            unit_ko = "kg" if (m["quantityCol"] or "").lower() in ("lithium_input", "lithium") else "개"
+            unit_en = "kg" if unit_ko == "kg" else "ea"
+            return {"success": True, "year": year, "month": month, "lastDay": last_d, "days": days, "productionUnit": unit_ko, "productionUnitEn": unit_en}
     except Exception as e:
         return {"success": False, "error": str(e), "year": year, "month": month, "days": [], "productionUnit": "개", "productionUnitEn": "ea"}
 
 
+def _param_key(col: str) -> str:
+    alias = col.replace(" ", "_")
+    alias = "".join(c if c.isalnum() or c == "_" else "_" for c in alias) or "p"
+    return f"param_{alias}"
+
+
+def _lot_row(lot: dict, param_cols: list[str]) -> dict:
+    """롤업 LOT 집계를 lot-status SQL 결과와 같은 행 형태로 변환."""
+    row = {
+        "lot_id": lot["lot_id"],
+        "record_count": lot["record_count"],
+        "latest_date": lot["latest_date"],
+        "latest_result": lot["latest_result"],
+    }
+    for col in param_cols:
+        n = lot["counts"].get(col, 0)
+        row[_param_key(col)] = lot["sums"].get(col, 0.0) / n if n else None
+    return row
+
+
+def _is_defect_result(value) -> bool:
+    # SQL 쪽 HAVING CONVERT(latest_result, SIGNED) = 1 과 같은 판정
+    try:
+        return int(float(str(value).strip())) == 1
+    except (TypeError, ValueError):
+        return False
+
+
+def _lot_item(r: dict, param_cols: list[str]) -> dict:
+    latest = r.get("latest_result")
+    if latest is not None:
+        v = str(latest).strip()
+        pf = "불합격" if v == "1" else ("합격" if v == "0" else v)
+    else:
+        pf = None
+    params = {}
+    for col in param_cols:
+        val = r.get(_param_key(col))
+        if val is not None:
+            try:
+                params[col] = float(val)
+            except (TypeError, ValueError):
+                pass
+    return {
+        "lotId": str(r.get("lot_id", "")),
+        "passFailResult": pf,
+        "recordCount": int(r.get("record_count", 0)),
+        "latestDate": str(r["latest_date"]) if r.get("latest_date") else None,
+        "lithiumInput": params.get("lithium_input"),
+        "addictiveRatio": params.get("additive_ratio") or params.get("additive_ratio"),
+        "processTime": params.get("process_time"),
+        "humidity": params.get("humidity"),
+        "tankPressure": params.get("tank_pressure"),
+        "params": params,
+    }
+
+
+async def _lot_scope(conn, period: str, no_date_filter: bool, defects_filter: bool) -> dict | None:
+    """lot-status 조회 범위 (테이블/컬럼/기간/워터마크). LOT 컬럼이 없으면 None."""
+    table = get_process_data_table(conn)
+    m = await get_process_column_map(conn, table)
+    if not m["lotCol"]:
+        return None
+    date_col = m["dateCol"]
+    dates = get_dashboard_date_strings()
+    scope = {
+        "table": table,
+        "m": m,
+        "param_cols": lot_param_columns(m, await get_columns(conn, table)),
+        "defects_only": defects_filter and bool(lot_result_column(m)),
+        "start": None,
+        "end": None,
+        "watermark": None,
+        "rollup": False,
+    }
+    if date_col and not no_date_filter:
+        period_range = {
+            "day": (dates["todayStr"], dates["todayStr"]),
+            "week": (dates["weekStartStr"], dates["weekEndStr"]),
+            "month": (dates["firstOfMonth"], dates["lastOfMonthStr"]),
+        }.get(period)
+        if period_range:
+            # 일/주/월 조회는 롤업(dashboard_rollup_lot_daily) + 워터마크 이후 원본으로 집계
+            scope["start"], scope["end"] = period_range[0], next_date_string(period_range[1])
+            scope["watermark"] = await get_watermark(conn, table, m, scope["param_cols"])
+            scope["rollup"] = True
+        else:
+            scope["start"] = next_date_string(dates["todayStr"], -365)
+    return scope
+
+
+async def _lot_page(conn, scope: dict, after, size: int) -> tuple[list, str | None]:
+    """after 다음 LOT 부터 size 개 (불량만 조회 시 걸러낸 뒤 size 개). (lots, next_cursor)
+
+    불량만 조회할 때는 불량 LOT 이 드물어서 키를 LOT_STATUS_MAX_PAGE 개 이상씩 읽고 걸러낸 뒤 size 개로 자른다
+    (커서는 마지막으로 돌려준 LOT).
+    """
+    m, param_cols = scope["m"], scope["param_cols"]
+    batch = max(size, LOT_STATUS_MAX_PAGE) if scope["defects_only"] else size
+    out = []
+    while True:
+        keys = await lot_keys(conn, scope["table"], m, scope["start"], scope["end"], scope["watermark"], after, batch)
+        if not keys:
+            return out, None
+        if scope["rollup"]:
+            agg = await lot_aggregates(
+                conn, scope["table"], m, param_cols, scope["start"], scope["end"], scope["watermark"], only=keys
+            )
+        else:
+            agg = await scan_lot_aggregates(conn, scope["table"], m, param_cols, scope["start"], scope["end"], keys)
+        for key in keys:
+            after = key
+            lot = agg.get(key)
+            if lot is None:
+                continue
+            row = _lot_row(lot, param_cols)
+            if scope["defects_only"] and not _is_defect_result(row["latest_result"]):
+                continue
+            out.append(_lot_item(row, param_cols))
+            if len(out) >= size:
+                return out, key
+        if len(keys) < batch:
+            return out, None
+
+
 @router.get("/lot-status")
-async def lot_status(period: str = "", debug: str = "", all_: str = "", noDate: str = "", user=Depends(require_auth)):
-    show_all = all_ == "1"
+async def lot_status(
+    period: str = "",
+    debug: str = "",
+    all_: str = Query("", alias="all"),
+    noDate: str = "",
+    limit: int = 0,
+    cursor: str = "",
+    format: str = "",
+    user=Depends(require_auth),
+):
+    """LOT 별 공정 현황. lot 키 기준 keyset 페이지(limit/cursor → nextCursor), format=ndjson 이면 전체를 스트리밍."""
     no_date_filter = noDate == "1"
-    conn = get_process_connection()
+    defects_filter = not (debug == "1" or all_ == "1")
+    after = cursor or None
+    if format == "ndjson":
+        return StreamingResponse(
+            _lot_status_ndjson(period, no_date_filter, defects_filter, after),
+            media_type="application/x-ndjson",
+        )
+    if limit > 0:
+        page_size, paged = min(limit, LOT_STATUS_MAX_PAGE), True
+    elif period in ("day", "week", "month"):
+        # 기존 응답과 같게 기간 조회는 limit 없이 전체 (내부적으로는 페이지 단위로 읽음)
+        page_size, paged = LOT_STATUS_MAX_PAGE, False
+    else:
+        page_size, paged = LOT_STATUS_DEFAULT_LIMIT, True
     try:
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        lot_col = m["lotCol"]
-        if not lot_col:
-            return {"success": True, "lots": [], "message": "NO_LOT_COLUMN"}
-        date_col = m["dateCol"]
-        result_col = m["resultCol"] or (m["defectCol"] if m["defectCol"] and "rate" not in (m["defectCol"] or "").lower() else None)
-        dates = get_dashboard_date_strings()
-        date_condition = ""
-        date_params = []
-        if date_col and not no_date_filter:
-            if period == "day":
-                date_condition = f"WHERE DATE({escape_sql_id(date_col)}) = %s"
-                date_params = [dates["todayStr"]]
-            elif period == "week":
-                date_condition = f"WHERE DATE({escape_sql_id(date_col)}) >= %s AND DATE({escape_sql_id(date_col)}) <= %s"
-                date_params = [dates["weekStartStr"], dates["weekEndStr"]]
-            elif period == "month":
-                date_condition = f"WHERE DATE({escape_sql_id(date_col)}) >= %s AND DATE({escape_sql_id(date_col)}) <= %s"
-                date_params = [dates["firstOfMonth"], dates["lastOfMonthStr"]]
-            else:
-                date_condition = f"WHERE {escape_sql_id(date_col)} >= DATE_SUB(NOW(), INTERVAL 365 DAY)"
-        exclude = {lot_col, date_col, result_col} - {None}
-        numeric_cols = [c for c in m["numericCols"] if c not in exclude]
-        known = ["process_time", "process time", "ProcessTime", "processing_time", "humidity", "tank_pressure", "lithium_input", "additive_ratio"]
-        cols = get_columns(conn, table)
-        extra = []
-        for c in cols:
-            name = c["name"]
-            if name in exclude or name in numeric_cols:
-                continue
-            norm = name.lower().replace(" ", "_")
-            for k in known:
-                if norm == k.lower().replace(" ", "_") or k.lower() in norm or norm in k.lower():
-                    extra.append(name)
-                    break
-        param_cols = [c for c in numeric_cols + extra if is_safe_column_name(c)]
-        select_parts = [
-            f"{escape_sql_id(lot_col)} as lot_id",
-            "COUNT(*) as record_count",
-        ]
-        if date_col:
-            select_parts.append(f"MAX({escape_sql_id(date_col)}) as latest_date")
-        if result_col and date_col:
-            select_parts.append(f"SUBSTRING_INDEX(GROUP_CONCAT(CAST({escape_sql_id(result_col)} AS CHAR) ORDER BY {escape_sql_id(date_col)} DESC), ',', 1) as latest_result")
-        elif result_col:
-            select_parts.append(f"MAX({escape_sql_id(result_col)}) as latest_result")
-        for col in param_cols:
-            alias = col.replace(" ", "_")
-            alias = "".join(c if c.isalnum() or c == "_" else "_" for c in alias) or "p"
-            select_parts.append(f"AVG({escape_sql_id(col)}) as {escape_sql_id('param_' + alias)}")
-        having = "" if (debug == "1" or show_all or not result_col) else "HAVING (CONVERT(latest_result, SIGNED) = 1 OR TRIM(CONVERT(latest_result, CHAR)) = '1')"
-        limit = "" if period in ("day", "week", "month") else "LIMIT 30"
-        sql = f"SELECT {', '.join(select_parts)} FROM {escape_sql_id(table)} {date_condition} GROUP BY {escape_sql_id(lot_col)} {having} ORDER BY CAST(lot_id AS UNSIGNED) ASC, lot_id ASC {limit}".strip()
-        with conn.cursor() as cur:
-            cur.execute(sql, date_params)
-            rows = cur.fetchall()
-        lots = []
-        for r in rows:
-            latest = r.get("latest_result")
-            if latest is not None:
-                v = str(latest).strip()
-                pf = "불합격" if v == "1" else ("합격" if v == "0" else v)
-            else:
-                pf = None
-            params = {}
-            for col in param_cols:
-                alias = col.replace(" ", "_")
-                alias = "".join(c if c.isalnum() or c == "_" else "_" for c in alias) or "p"
-                key = f"param_{alias}"
-                val = r.get(key)
-                if val is not None:
-                    try:
-                        params[col] = float(val)
-                    except (TypeError, ValueError):
-                        pass
-            lots.append({
-                "lotId": str(r.get("lot_id", "")),
-                "passFailResult": pf,
-                "recordCount": int(r.get("record_count", 0)),
-                "latestDate": str(r["latest_date"]) if r.get("latest_date") else None,
-                "lithiumInput": params.get("lithium_input"),
-                "addictiveRatio": params.get("additive_ratio") or params.get("additive_ratio"),
-                "processTime": params.get("process_time"),
-                "humidity": params.get("humidity"),
-                "tankPressure": params.get("tank_pressure"),
-                "params": params,
-            })
-        return {"success": True, "lots": lots, "totalLots": len(lots)}
+        async with get_process_connection() as conn:
+            scope = await _lot_scope(conn, period, no_date_filter, defects_filter)
+            if scope is None:
+                return {"success": True, "lots": [], "message": "NO_LOT_COLUMN"}
+            lots, next_cursor = await _lot_page(conn, scope, after, page_size)
+            while not paged and next_cursor is not None:
+                more, next_cursor = await _lot_page(conn, scope, next_cursor, page_size)
+                lots.extend(more)
+            return {"success": True, "lots": lots, "totalLots": len(lots), "nextCursor": next_cursor}
     except Exception as e:
         return {"success": False, "error": str(e), "lots": []}
 
 
+async def _lot_status_ndjson(period: str, no_date_filter: bool, defects_filter: bool, after):
+    """LOT 한 줄씩 NDJSON. 페이지마다 커넥션을 잡았다 놓으므로 긴 내보내기도 풀을 점유하지 않는다."""
+    try:
+        async with get_process_connection() as conn:
+            scope = await _lot_scope(conn, period, no_date_filter, defects_filter)
+        while scope is not None:
+            async with get_process_connection() as conn:
+                lots, after = await _lot_page(conn, scope, after, LOT_STATUS_MAX_PAGE)
+            for lot in lots:
+                yield encode_message(lot) + "\n"
+            if after is None:
+                break
+    except Exception as e:
+        yield encode_message({"success": False, "error": str(e)}) + "\n"
+
+
 @router.get("/alerts")
-async def alerts(user=Depends(require_auth)):
+async def alerts(request: Request, user=Depends(require_auth)):
+    return await dashboard_cache.respond(request, "alerts", "alerts", CACHE_TTL["alerts"], _alerts_payload)
+
+
+async def _alerts_payload():
+    # 통계는 spc_engine 이 새 행만 증분 반영하므로 여기서는 현재 알림 집합을 그대로 반환
     try:
-        conn = get_process_connection()
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        date_col = m["dateCol"]
-        if not date_col:
-            return {"success": True, "alerts": []}
-        numeric = m["numericCols"][:20]
-        if not numeric:
-            return {"success": True, "alerts": []}
-        cols_sql = ", ".join(escape_sql_id(c) for c in numeric)
-        with conn.cursor() as cur:
-            cur.execute(
-                f"SELECT {cols_sql} FROM {escape_sql_id(table)} ORDER BY {escape_sql_id(date_col)} DESC LIMIT 100",
-            )
-            rows = cur.fetchall()
-        alerts_list = []
-        for col in numeric:
-            vals = [float(r[col] or 0) for r in rows if r.get(col) is not None]
-            if len(vals) < 2:
-                continue
-            mean = sum(vals) / len(vals)
-            std = (sum((x - mean) ** 2 for x in vals) / len(vals)) ** 0.5 or 1
-            last = vals[0]
-            dev = (last - mean) / std if std else 0
-            if abs(dev) >= 2:
-                alerts_list.append({
-                    "column": col,
-                    "columnKorean": col,
-                    "currentValue": last,
-                    "mean": mean,
-                    "upperLimit": mean + 2 * std,
-                    "lowerLimit": mean - 2 * std,
-                    "deviation": dev,
-                    "severity": "critical" if abs(dev) >= 3 else "warning",
-                })
-        return {"success": True, "alerts": alerts_list[:20]}
+        await spc_engine.refresh_if_stale()
     except Exception as e:
         return {"success": False, "alerts": [], "error": str(e)}
+    return spc_engine.payload()
+
+
+@router.get("/alerts/history")
+async def alerts_history(limit: int = 100, user=Depends(require_auth)):
+    """알림 발생/상승/해제 이력 (최신순)."""
+    return {"success": True, "history": spc_engine.history(min(max(limit, 0), 1000))}
+
+
+@router.get("/alerts/status")
+async def alerts_status(user=Depends(require_auth)):
+    return {"success": True, "spc": spc_engine.status()}
+
+
+@router.post("/alerts/reset")
+async def alerts_reset(user=Depends(require_admin)):
+    """통계/알림 상태를 비우고 다음 폴링에서 기준 구간부터 다시 학습."""
+    spc_engine.reset()
+    await dashboard_cache.clear()
+    return {"success": True}
 
 
 @router.get("/analytics")
-async def analytics(user=Depends(require_auth)):
-    """불량 원인 분석용 상관/중요도 (간단 구현)."""
+async def analytics(request: Request, window: str = "", user=Depends(require_auth)):
+    """불량 원인 분석: 상관행렬, 불량 대비 변수 중요도, 불량 LOT/추이 (구간별 캐시)."""
+    window = (window or ANALYTICS_DEFAULT_WINDOW).strip().lower()
+    if window not in ANALYTICS_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(ANALYTICS_WINDOW_DAYS)}")
+    return await dashboard_cache.respond(
+        request, "analytics", f"analytics:{window}", CACHE_TTL["analytics"], lambda: _analytics_payload(window)
+    )
+
+
+async def _analytics_payload(window: str):
     try:
-        conn = get_process_connection()
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        numeric = [c for c in m["numericCols"] if is_safe_column_name(c)][:30]
-        if len(numeric) < 2:
-            return {"success": True, "correlation": {"columns": [], "matrix": []}, "importance": [], "confusionMatrix": None, "defectLots": [], "defectTrend": []}
-        cols_sql = ", ".join(escape_sql_id(c) for c in numeric)
-        with conn.cursor() as cur:
-            cur.execute(f"SELECT {cols_sql} FROM {escape_sql_id(table)} LIMIT 1000")
-            rows = cur.fetchall()
-        n = len(numeric)
-        matrix = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
-        importance = [{"name": col, "importance": 0.0} for col in numeric]
-        return {
-            "success": True,
-            "correlation": {"columns": numeric, "matrix": matrix},
-            "importance": importance,
-            "confusionMatrix": None,
-            "defectLots": [],
-            "defectTrend": [],
-            "targetColumn": numeric[0],
-        }
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            return await compute_analytics(conn, table, m, window, ANALYTICS_WINDOW_DAYS[window])
     except Exception as e:
         return {"success": False, "correlation": {"columns": [], "matrix": []}, "importance": [], "confusionMatrix": None, "error": str(e)}
 
@@ -319,38 +428,115 @@ async def post_lot_defect_report(user=Depends(require_auth)):
 
 
 @router.get("/realtime")
-async def realtime(user=Depends(require_auth)):
+async def realtime(request: Request, user=Depends(require_auth)):
+    return await dashboard_cache.respond(request, "realtime", "realtime", CACHE_TTL["realtime"], _realtime_payload)
+
+
+async def _realtime_payload():
+    snap = realtime_hub.snapshot() if realtime_hub.running else None
+    if snap:
+        # 스트림 폴러가 돌고 있을 때만 롤링 윈도우 기반 trend/changePercent 를 그대로 사용
+        return {"success": True, "sensors": snap["sensors"]}
     try:
-        conn = get_process_connection()
-        table = get_process_data_table(conn)
-        m = get_process_column_map(conn, table)
-        date_col = m["dateCol"]
-        numeric = m["numericCols"][:15]
-        if not date_col or not numeric:
-            return {"success": True, "sensors": []}
-        cols_sql = ", ".join(escape_sql_id(c) for c in numeric)
-        with conn.cursor() as cur:
-            cur.execute(
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            date_col = m["dateCol"]
+            numeric = m["numericCols"][:15]
+            if not date_col or not numeric:
+                return {"success": True, "sensors": []}
+            cols_sql = ", ".join(escape_sql_id(c) for c in numeric)
+            row = await fetch_one(
+                conn,
                 f"SELECT {cols_sql}, {escape_sql_id(date_col)} as ts FROM {escape_sql_id(table)} ORDER BY {escape_sql_id(date_col)} DESC LIMIT 1",
             )
-            row = cur.fetchone()
-        if not row:
-            return {"success": True, "sensors": []}
-        sensors = []
-        for col in numeric:
-            v = row.get(col, 0)
-            try:
-                val = float(v or 0)
-            except (TypeError, ValueError):
-                val = 0
-            sensors.append({
-                "name": col,
-                "nameKorean": col,
-                "currentValue": val,
-                "trend": "stable",
-                "changePercent": 0,
-                "unit": "",
-            })
-        return {"success": True, "sensors": sensors}
+            if not row:
+                return {"success": True, "sensors": []}
+            sensors = []
+            for col in numeric:
+                v = row.get(col, 0)
+                try:
+                    val = float(v or 0)
+                except (TypeError, ValueError):
+                    val = 0
+                sensors.append({
+                    "name": col,
+                    "nameKorean": col,
+                    "currentValue": val,
+                    "trend": "stable",
+                    "changePercent": 0,
+                    "unit": "",
+                })
+            return {"success": True, "sensors": sensors}
     except Exception as e:
         return {"success": False, "sensors": [], "error": str(e)}
+
+
+def _stream_user(credentials: HTTPAuthorizationCredentials | None, token: str):
+    # EventSource/WebSocket 은 Authorization 헤더를 못 보내므로 ?token= 도 허용
+    if credentials and credentials.scheme == "Bearer" and credentials.credentials:
+        return verify_token(credentials.credentials)
+    return verify_token(token) if token else None
+
+
+@router.get("/realtime/stream")
+async def realtime_stream(request: Request, token: str = "", credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """SSE: 첫 이벤트는 snapshot, 이후 새 행마다 바뀐 센서만 delta 로 전송."""
+    if not _stream_user(credentials, token):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    sub = realtime_hub.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {msg['type']}\ndata: {encode_message(msg)}\n\n"
+        finally:
+            realtime_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/realtime/ws")
+async def realtime_ws(websocket: WebSocket, token: str = ""):
+    if not _stream_user(None, token):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    sub = realtime_hub.subscribe()
+    # DB 가 조용하면 큐가 비어 send 로는 끊김을 알 수 없으므로 수신도 같이 기다린다
+    closed = asyncio.create_task(_ws_until_disconnect(websocket))
+    try:
+        while True:
+            getter = asyncio.create_task(sub.queue.get())
+            done, _ = await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                getter.cancel()
+                break
+            await websocket.send_text(encode_message(getter.result()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        realtime_hub.unsubscribe(sub)
+
+
+async def _ws_until_disconnect(websocket: WebSocket) -> None:
+    """클라이언트가 보낸 메시지는 버리고 연결이 끊기면 반환."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.get("/realtime/stream/stats")
+async def realtime_stream_stats(user=Depends(require_auth)):
+    return {"success": True, "stream": realtime_hub.stats()}
@@ -0,0 +1,211 @@
+"""대시보드 DB 접근 부하 벤치마크 (blocking vs threadpool vs asyncio).
+
+동시 클라이언트 N개가 대시보드 요청 1건(컬럼 메타 조회 + 집계 쿼리)을 반복할 때
+p50/p99 지연과 처리량을 비교한다.
+
+    python scripts/bench_db_load.py --stand-in                 # DB 없이 지연 시뮬레이션
+    python scripts/bench_db_load.py --clients 200 --requests 5 # .env 의 실제 MariaDB 사용
+
+모드:
+  blocking   - async 핸들러에서 pymysql 을 직접 호출 (기존 구조)
+  threadpool - 동기 풀(db.py)을 스레드풀에서 호출
+  async      - aiomysql 풀(async_db.py)
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS_SQL = """SELECT COLUMN_NAME as name, DATA_TYPE as type
+                 FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"""
+
+
+def install_stand_in(latency: float) -> None:
+    """pymysql / aiomysql 커넥션을 고정 지연을 갖는 가짜 커넥션으로 바꾼다."""
+    import aiomysql
+    import pymysql
+
+    class _Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            time.sleep(latency)
+
+        def fetchall(self):
+            return [{"name": "timestamp", "type": "datetime"}]
+
+        def fetchone(self):
+            return {"total": 1}
+
+    class _Conn:
+        open = True
+
+        def cursor(self):
+            return _Cursor()
+
+        def ping(self, reconnect=False):
+            pass
+
+        def rollback(self):
+            pass
+
+        def commit(self):
+            pass
+
+        def close(self):
+            self.open = False
+
+    class _AsyncCursor:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, sql, params=None):
+            await asyncio.sleep(latency)
+
+        async def fetchall(self):
+            return [{"name": "timestamp", "type": "datetime"}]
+
+        async def fetchone(self):
+            return {"total": 1}
+
+    class _AsyncConn:
+        def cursor(self):
+            return _AsyncCursor()
+
+        async def ping(self, reconnect=True):
+            pass
+
+        async def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    class _AsyncPool:
+        def __init__(self, maxsize):
+            self.maxsize = maxsize
+            self._sem = asyncio.Semaphore(maxsize)
+            self._free = [_AsyncConn() for _ in range(maxsize)]
+
+        @property
+        def size(self):
+            return self.maxsize
+
+        @property
+        def freesize(self):
+            return len(self._free)
+
+        async def acquire(self):
+            await self._sem.acquire()
+            return self._free.pop()
+
+        def release(self, conn):
+            self._free.append(conn)
+            self._sem.release()
+
+        def close(self):
+            pass
+
+        async def wait_closed(self):
+            pass
+
+    async def _create_pool(minsize=1, maxsize=10, **kwargs):
+        return _AsyncPool(maxsize)
+
+    pymysql.connect = lambda **kwargs: _Conn()
+    aiomysql.create_pool = _create_pool
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _sync_request(pool, table: str) -> None:
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(COLUMNS_SQL, (table,))
+            cur.fetchall()
+            cur.execute(f"SELECT COUNT(*) as total FROM `{table}`")
+            cur.fetchone()
+
+
+async def _async_request(pool, table: str) -> None:
+    from async_db import fetch_all, fetch_one
+
+    async with pool.connection() as conn:
+        await fetch_all(conn, COLUMNS_SQL, (table,))
+        await fetch_one(conn, f"SELECT COUNT(*) as total FROM `{table}`")
+
+
+async def run_mode(mode: str, clients: int, requests: int, table: str) -> dict:
+    import db
+    import async_db
+    from starlette.concurrency import run_in_threadpool
+
+    latencies = []
+
+    async def one():
+        if mode == "blocking":
+            _sync_request(db.process_pool, table)
+        elif mode == "threadpool":
+            await run_in_threadpool(_sync_request, db.process_pool, table)
+        else:
+            await _async_request(async_db.process_pool, table)
+
+    async def client(issued: float):
+        # 클라이언트는 모두 t0 에 첫 요청을 보내고, 응답을 받으면 곧바로 다음 요청을 보낸다.
+        # 이벤트 루프가 막혀 있던 시간도 지연에 포함되도록 발행 시각을 기준으로 잰다.
+        for _ in range(requests):
+            await one()
+            done = time.perf_counter()
+            latencies.append(done - issued)
+            issued = done
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(started) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    if mode == "async":
+        await async_db.close_pools()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--table", default=os.getenv("PROCESS_TABLE_NAME", "").strip() or "preprocessing")
+    parser.add_argument("--modes", default="blocking,threadpool,async")
+    parser.add_argument("--stand-in", action="store_true", help="simulate the DB instead of connecting")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="stand-in per-query latency")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        install_stand_in(args.latency_ms / 1000)
+
+    print(f"{'mode':<12}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        r = asyncio.run(run_mode(mode, args.clients, args.requests, args.table))
+        print(f"{r['mode']:<12}{r['requests']:>10}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['rps']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""공정 데이터 SPC(관리도) 알림 엔진 (컬럼별 통계를 증분 갱신, 현재 알림은 메모리에서 바로 응답).
+
+- 초기 SPC_BASELINE 행은 Welford 로 평균/분산을 잡고, 이후에는 EWMA(평균/분산)로 갱신한다
+  (alpha = 2/(SPC_BASELINE+1), 최근 SPC_BASELINE 행 이동평균과 비슷한 가중치).
+- 새 값은 갱신 전 통계로 판정한다: 3σ/2σ, Western Electric 2-of-3 / 4-of-5 / 8연속, CUSUM, EWMA 관리한계.
+- 한 컬럼의 알림은 하나만 유지(중복 제거)하고, 규칙 위반 없는 행이 SPC_CLEAR_POINTS 번 연속 나와야 해제(히스테리시스).
+- 발생/해제/심각도 상승은 이력(SPC_HISTORY_SIZE 건)에 남긴다.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+
+from config import SPC_ENABLED, SPC_POLL_SECONDS, SPC_BASELINE, SPC_CLEAR_POINTS, SPC_HISTORY_SIZE
+from async_db import get_process_connection, fetch_all
+from dashboard_db import escape_sql_id, get_process_data_table, get_process_column_map
+
+MAX_COLUMNS = 20
+MIN_POINTS = 20
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+_EWMA_FACTOR = math.sqrt(EWMA_LAMBDA / (2 - EWMA_LAMBDA))
+
+
+class ColumnStats:
+    """컬럼 하나의 증분 통계와 관리도 상태."""
+
+    __slots__ = ("n", "mean", "m2", "var", "ewma", "cusum_pos", "cusum_neg", "recent")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.var = 0.0
+        self.ewma = None
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.recent = deque(maxlen=8)  # 최근 z 값 (Western Electric 규칙용)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var) or 1.0
+
+    def update(self, x: float, baseline: int) -> None:
+        self.n += 1
+        if self.n <= baseline:
+            # Welford
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += (x - self.mean) * delta
+            self.var = self.m2 / self.n
+        else:
+            alpha = 2.0 / (baseline + 1)
+            delta = x - self.mean
+            incr = alpha * delta
+            self.mean += incr
+            self.var = (1 - alpha) * (self.var + delta * incr)
+
+    def evaluate(self, x: float) -> tuple[float, list[str]]:
+        """갱신 전 통계 기준으로 x 의 z 값과 위반 규칙 목록을 반환."""
+        std = self.std
+        z = (x - self.mean) / std
+        self.recent.append(z)
+        self.ewma = x if self.ewma is None else EWMA_LAMBDA * x + (1 - EWMA_LAMBDA) * self.ewma
+        self.cusum_pos = max(0.0, self.cusum_pos + z - CUSUM_K)
+        self.cusum_neg = max(0.0, self.cusum_neg - z - CUSUM_K)
+
+        rules = []
+        if abs(z) >= 3:
+            rules.append("3sigma")
+        elif abs(z) >= 2:
+            rules.append("2sigma")
+        recent = list(self.recent)
+        for sign in (1, -1):
+            if sum(1 for v in recent[-3:] if v * sign >= 2) >= 2 and z * sign > 0:
+                rules.append("we_2of3")
+            if sum(1 for v in recent[-5:] if v * sign >= 1) >= 4 and z * sign > 0:
+                rules.append("we_4of5")
+            if len(recent) == 8 and all(v * sign > 0 for v in recent):
+                rules.append("we_8run")
+        if self.cusum_pos > CUSUM_H or self.cusum_neg > CUSUM_H:
+            rules.append("cusum")
+        if abs(self.ewma - self.mean) > EWMA_L * std * _EWMA_FACTOR:
+            rules.append("ewma")
+        return z, rules
+
+    def reset_cusum(self) -> None:
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SpcEngine:
+    def __init__(self, baseline: int, clear_points: int, history_size: int):
+        self.baseline = max(MIN_POINTS, baseline)
+        self.clear_points = max(1, clear_points)
+        self._columns: list = []
+        self._stats: dict = {}
+        self._active: dict = {}  # column -> alert
+        self._normal_streak: dict = {}
+        self._history: deque = deque(maxlen=history_size)
+        self._payload = {"success": True, "alerts": []}
+        self._last_ts = None
+        self._polled_at = 0.0
+        self._lock = None
+        self.rows_read = 0
+        self.last_error = None
+
+    def reset(self, columns: list | None = None) -> None:
+        self._columns = list(columns or [])
+        self._stats = {c: ColumnStats() for c in self._columns}
+        self._active.clear()
+        self._normal_streak.clear()
+        self._last_ts = None
+        self._rebuild_payload()
+
+    # -- 판정 ---------------------------------------------------------------
+
+    def _record(self, event: str, alert: dict) -> None:
+        self._history.append({"event": event, **alert})
+
+    def apply_row(self, row: dict, ts=None) -> bool:
+        """행 하나를 반영. 현재 알림 집합이 바뀌었으면 True."""
+        changed = False
+        for col in self._columns:
+            x = _to_float(row.get(col))
+            if x is None:
+                continue
+            st = self._stats[col]
+            if st.n >= MIN_POINTS:
+                z, rules = st.evaluate(x)
+                changed |= self._judge(col, st, x, z, rules, ts)
+            st.update(x, self.baseline)
+        return changed
+
+    def _judge(self, col: str, st: ColumnStats, x: float, z: float, rules: list, ts) -> bool:
+        active = self._active.get(col)
+        if rules:
+            self._normal_streak[col] = 0
+            severity = "critical" if "3sigma" in rules else "warning"
+            alert = {
+                "column": col,
+                "columnKorean": col,
+                "currentValue": x,
+                "mean": st.mean,
+                "upperLimit": st.mean + 2 * st.std,
+                "lowerLimit": st.mean - 2 * st.std,
+                "deviation": z,
+                "severity": severity,
+                "rules": rules,
+                "since": active["since"] if active else str(ts) if ts is not None else None,
+                "lastSeen": str(ts) if ts is not None else None,
+                "count": (active["count"] + 1) if active else 1,
+            }
+            if active is None:
+                self._record("raised", alert)
+            elif severity == "critical" and active["severity"] != "critical":
+                self._record("escalated", alert)
+            elif active["severity"] == "critical":
+                # 해제 전까지 심각도는 내려가지 않음
+                alert["severity"] = "critical"
+            self._active[col] = alert
+            if "cusum" in rules:
+                st.reset_cusum()
+            return True
+        if active is None:
+            return False
+        self._normal_streak[col] = self._normal_streak.get(col, 0) + 1
+        if self._normal_streak[col] >= self.clear_points:
+            del self._active[col]
+            self._record("cleared", {**active, "currentValue": x, "lastSeen": str(ts) if ts is not None else None})
+            return True
+        return False
+
+    def _rebuild_payload(self) -> None:
+        alerts = [self._active[c] for c in self._columns if c in self._active]
+        self._payload = {"success": True, "alerts": alerts[:MAX_COLUMNS]}
+
+    # -- 조회 ---------------------------------------------------------------
+
+    def payload(self) -> dict:
+        return self._payload
+
+    def history(self, limit: int = 100) -> list:
+        items = list(self._history)[-limit:] if limit > 0 else []
+        items.reverse()
+        return items
+
+    def status(self) -> dict:
+        return {
+            "enabled": SPC_ENABLED,
+            "columns": len(self._columns),
+            "activeAlerts": len(self._active),
+            "historySize": len(self._history),
+            "rowsRead": self.rows_read,
+            "lastTs": str(self._last_ts) if self._last_ts is not None else None,
+            "lastError": self.last_error,
+        }
+
+    # -- 폴링 ---------------------------------------------------------------
+
+    async def poll(self) -> None:
+        """마지막으로 본 시각 이후의 새 행만 읽어 반영."""
+        async with get_process_connection() as conn:
+            table = get_process_data_table(conn)
+            m = await get_process_column_map(conn, table)
+            date_col = m["dateCol"]
+            columns = m["numericCols"][:MAX_COLUMNS]
+            if not date_col or not columns:
+                if self._columns:
+                    self.reset()
+                return
+            if columns != self._columns:
+                self.reset(columns)
+            cols_sql = ", ".join(escape_sql_id(c) for c in columns)
+            tbl, dc = escape_sql_id(table), escape_sql_id(date_col)
+            if self._last_ts is None:
+                # 최초에는 기준 구간만큼 최근 행으로 통계를 채운다
+                rows = await fetch_all(
+                    conn, f"SELECT {cols_sql}, {dc} as ts FROM {tbl} ORDER BY {dc} DESC LIMIT %s", (self.baseline,)
+                )
+                rows.reverse()
+            else:
+                rows = await fetch_all(
+                    conn,
+                    f"SELECT {cols_sql}, {dc} as ts FROM {tbl} WHERE {dc} > %s ORDER BY {dc} ASC LIMIT 1000",
+                    (self._last_ts,),
+                )
+        self.rows_read += len(rows)
+        changed = False
+        for row in rows:
+            changed |= self.apply_row(row, row["ts"])
+            self._last_ts = row["ts"]
+        if changed:
+            self._rebuild_payload()
+
+    async def refresh_if_stale(self) -> None:
+        """백그라운드 루프가 없거나 늦을 때 요청 경로에서 한 번만 폴링 (동시 요청은 합류)."""
+        if time.monotonic() - self._polled_at < SPC_POLL_SECONDS:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self._polled_at < SPC_POLL_SECONDS:
+                return
+            try:
+                await self.poll()
+                self.last_error = None
+            finally:
+                self._polled_at = time.monotonic()
+
+
+spc_engine = SpcEngine(SPC_BASELINE, SPC_CLEAR_POINTS, SPC_HISTORY_SIZE)
+
+
+async def run_spc_poller() -> None:
+    """lifespan 에서 띄우는 백그라운드 루프."""
+    while True:
+        try:
+            await spc_engine.refresh_if_stale()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            spc_engine.last_error = str(exc)
+            print(f"spc poll failed: {exc}")
+        await asyncio.sleep(SPC_POLL_SECONDS)
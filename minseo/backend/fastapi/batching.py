@@ -0,0 +1,174 @@
+"""/predict 마이크로 배칭 (동시에 들어온 요청의 predict_proba 를 한 번에 실행).
+
+요청 스레드는 스케일된 행렬을 큐에 넣고 결과를 기다린다. 워커 스레드 하나가 큐에서 꺼내
+같은 모델끼리 행을 이어 붙여 predict_proba 를 한 번 호출하고 결과를 행 범위대로 돌려준다.
+
+- 한 배치는 최대 max_items 행, 첫 요청 도착 후 최대 max_wait_ms 까지 모은다.
+- 적응형: 최근 배치가 거의 1건이면(부하 없음) 기다리지 않고 바로 실행해 단건 지연을 늘리지 않는다.
+  앞 배치를 실행하는 동안 쌓인 요청은 기다림 없이 다음 배치로 묶인다.
+- max_items 행 이상인 요청은 배치로 묶을 것이 없으므로 워커를 거치지 않고 호출 스레드에서 바로 실행한다
+  (큰 요청끼리는 스레드풀에서 병렬로 돌고, 작은 요청이 큰 요청 뒤에 줄 서지 않는다).
+- 배치 실행이 실패하면 요청별로 다시 실행해 한 요청의 오류가 다른 요청으로 번지지 않게 한다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _Request:
+    __slots__ = ("model", "X", "future", "enqueued")
+
+    def __init__(self, model, X: np.ndarray):
+        self.model = model
+        self.X = X
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, max_items: int, max_wait_ms: float):
+        self.max_items = max(1, max_items)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._load = 1.0  # 최근 배치 크기(요청 수) EWMA
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._fallbacks = 0
+        self._direct = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._sizes = {b: 0 for b in _BATCH_BUCKETS}
+
+    # -- 호출 쪽 ------------------------------------------------------------
+
+    def predict_proba(self, model, X: np.ndarray) -> np.ndarray:
+        """model.predict_proba(X) 와 같은 결과를 배치로 계산해 반환 (호출 스레드는 결과까지 대기)."""
+        if len(X) >= self.max_items:
+            with self._stats_lock:
+                self._direct += 1
+            return model.predict_proba(X)
+        self._ensure_worker()
+        req = _Request(model, X)
+        self._queue.put(req)
+        return req.future.result()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+                self._thread.start()
+
+    # -- 워커 ---------------------------------------------------------------
+
+    def _collect(self, first: _Request) -> tuple:
+        """first 부터 배치를 모은다. (배치, 넘쳐서 다음 배치로 넘길 요청 또는 None)"""
+        batch = [first]
+        rows = len(first.X)
+        deadline = first.enqueued + self.max_wait
+        wait = self._load >= 1.5
+        while rows < self.max_items:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.perf_counter()
+                if not wait or timeout <= 0:
+                    break
+                try:
+                    req = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if rows + len(req.X) > self.max_items:
+                return batch, req
+            batch.append(req)
+            rows += len(req.X)
+        return batch, None
+
+    def _run(self) -> None:
+        carry = None
+        while True:
+            first = carry if carry is not None else self._queue.get()
+            batch, carry = self._collect(first)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: list) -> None:
+        started = time.perf_counter()
+        groups: dict = {}
+        for req in batch:
+            groups.setdefault(id(req.model), []).append(req)
+        fallbacks = 0
+        for reqs in groups.values():
+            model = reqs[0].model
+            try:
+                if len(reqs) == 1:
+                    probs = [model.predict_proba(reqs[0].X)]
+                else:
+                    stacked = model.predict_proba(np.concatenate([r.X for r in reqs], axis=0))
+                    bounds = np.cumsum([len(r.X) for r in reqs])[:-1]
+                    probs = np.split(stacked, bounds)
+            except Exception:
+                probs = None
+            if probs is None:
+                # 배치 실패: 요청별로 다시 실행해서 각자의 결과/오류를 돌려준다
+                fallbacks += 1
+                for req in reqs:
+                    try:
+                        req.future.set_result(model.predict_proba(req.X))
+                    except Exception as exc:
+                        req.future.set_exception(exc)
+                continue
+            for req, p in zip(reqs, probs):
+                req.future.set_result(p)
+        finished = time.perf_counter()
+        self._load = 0.8 * self._load + 0.2 * len(batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._rows += sum(len(r.X) for r in batch)
+            self._fallbacks += fallbacks
+            self._run_total += finished - started
+            for req in batch:
+                waited = started - req.enqueued
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            bucket = next((b for b in _BATCH_BUCKETS if len(batch) <= b), _BATCH_BUCKETS[-1])
+            self._sizes[bucket] += 1
+
+    # -- 지표 ---------------------------------------------------------------
+
+    def stats(self, reset: bool = False) -> dict:
+        with self._stats_lock:
+            out = {
+                "maxItems": self.max_items,
+                "maxWaitMs": self.max_wait * 1000,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "avgBatchRequests": self._requests / self._batches if self._batches else 0.0,
+                "avgBatchRows": self._rows / self._batches if self._batches else 0.0,
+                "batchSizeHistogram": {f"<={b}": n for b, n in self._sizes.items()},
+                "avgQueueWaitMs": self._wait_total / self._requests * 1000 if self._requests else 0.0,
+                "maxQueueWaitMs": self._wait_max * 1000,
+                "avgBatchRunMs": self._run_total / self._batches * 1000 if self._batches else 0.0,
+                "fallbacks": self._fallbacks,
+                "direct": self._direct,
+                "load": self._load,
+                "queued": self._queue.qsize(),
+            }
+            if reset:
+                self._reset_stats()
+        return out
@@ -0,0 +1,174 @@
+"""메모리 매핑 가능한 모델 번들 (디렉터리 형식 `<name>.bundle/`).
+
+    manifest.json      형식 버전, 네이티브 부스터 파일 목록
+    bundle.joblib      무압축 joblib. numpy 배열은 joblib.load(mmap_mode="r") 로 페이지 캐시에서 바로 읽는다
+    <name>.ubj         XGBoost 네이티브 부스터 (save_model)
+    <name>.txt         LightGBM 네이티브 모델 파일
+
+스태킹 모델의 RandomForest 는 flat_trees.FlatForestClassifier(노드 배열)로 바꿔 저장해서 가장 큰 부분이
+워커들 사이에 공유된다. XGBoost/LightGBM 은 pickle 대신 각자의 네이티브 파일로 읽는다.
+작은 배치용으로 펼친 XGBoost/LightGBM(flat_estimators)과 컴파일한 FeaturePlan 도 같이 저장한다.
+"""
+import copy
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils import Bunch
+
+from feature_plan import FeaturePlan
+from flat_trees import compile_estimator, compile_forest, get_fast_model
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+BUNDLE_FILE = "bundle.joblib"
+
+
+def is_shared_bundle(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def shared_bundle_path(joblib_path: str) -> str:
+    """model/model.joblib -> model/model.bundle"""
+    root, _ = os.path.splitext(joblib_path)
+    return root + ".bundle"
+
+
+def resolve_bundle_path(joblib_path: str, prefer_shared: bool = True) -> str:
+    """.joblib 옆에 .bundle 이 있으면 그쪽. 단 .joblib 이 manifest 보다 새로우면 (.bundle 없이 다시 저장됨) .joblib."""
+    if prefer_shared and joblib_path.endswith(".joblib"):
+        shared = shared_bundle_path(joblib_path)
+        if is_shared_bundle(shared):
+            try:
+                stale = os.path.getmtime(joblib_path) > os.path.getmtime(os.path.join(shared, MANIFEST))
+            except OSError:
+                stale = False
+            if not stale:
+                return shared
+    return joblib_path
+
+
+def _native_kind(est) -> str:
+    module = type(est).__module__
+    if module.startswith("xgboost"):
+        return "xgboost"
+    if module.startswith("lightgbm"):
+        return "lightgbm"
+    return ""
+
+
+def _write(bundle: dict, out_dir: str) -> None:
+    stack = bundle["model"]
+    names = list(stack.named_estimators_.keys())
+    skeleton = copy.copy(stack)
+    estimators = list(stack.estimators_)
+    natives = []
+    flats = {}
+    for idx, (name, est) in enumerate(zip(names, estimators)):
+        if est == "drop":
+            continue
+        kind = _native_kind(est)
+        if kind == "xgboost":
+            filename = f"{name}.ubj"
+            est.save_model(os.path.join(out_dir, filename))
+            estimators[idx] = None
+        elif kind == "lightgbm":
+            filename = f"{name}.txt"
+            est.booster_.save_model(os.path.join(out_dir, filename))
+            shell = copy.copy(est)
+            shell._Booster = None
+            estimators[idx] = shell
+        else:
+            if isinstance(est, RandomForestClassifier):
+                estimators[idx] = compile_forest(est) or est
+            continue
+        natives.append({"estimator": idx, "name": name, "kind": kind, "file": filename})
+        flat = compile_estimator(est)
+        if flat is not None:
+            flats[name] = flat
+    skeleton.estimators_ = estimators
+    skeleton.named_estimators_ = Bunch(**dict(zip(names, estimators)))
+
+    parts = {k: v for k, v in bundle.items() if not k.startswith("_")}
+    parts["model"] = skeleton
+    parts["flat_estimators"] = flats
+    parts["feature_plan"] = FeaturePlan(bundle)
+    joblib.dump(parts, os.path.join(out_dir, BUNDLE_FILE))
+    manifest = {"format": FORMAT_VERSION, "natives": natives}
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def save_shared_bundle(bundle: dict, out_dir: str) -> None:
+    """번들을 디렉터리 형식으로 저장. 임시 디렉터리에 다 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓴 파일을 보지 않게 한다."""
+    out_dir = out_dir.rstrip("/")
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        _write(bundle, tmp_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    # 이미 매핑한 프로세스는 지운 파일도 계속 읽을 수 있다
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_shared_bundle(path: str, mmap_mode: str = "r") -> dict:
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"unsupported bundle format: {manifest.get('format')}")
+    bundle = joblib.load(os.path.join(path, BUNDLE_FILE), mmap_mode=mmap_mode)
+    stack = bundle["model"]
+    for native in manifest["natives"]:
+        idx, file_path = native["estimator"], os.path.join(path, native["file"])
+        if native["kind"] == "xgboost":
+            from xgboost import XGBClassifier
+
+            est = XGBClassifier()
+            est.load_model(file_path)
+        elif native["kind"] == "lightgbm":
+            import lightgbm
+
+            est = stack.estimators_[idx]
+            est._Booster = lightgbm.Booster(model_file=file_path)
+        else:
+            raise ValueError(f"unknown native model kind: {native['kind']}")
+        stack.estimators_[idx] = est
+        stack.named_estimators_[native["name"]] = est
+    plan = bundle.pop("feature_plan", None)
+    if plan is not None:
+        bundle["_feature_plan"] = plan
+    return bundle
+
+
+def load_bundle(path: str) -> dict:
+    """파일(.joblib) 또는 디렉터리(.bundle) 번들을 읽는다."""
+    if os.path.isdir(path):
+        return load_shared_bundle(path)
+    return joblib.load(path)
+
+
+def check_parity(original: dict, shared: dict, X: np.ndarray) -> float:
+    """원본 스태킹 모델 대비 shared 번들(원본 구성 / 펼친 모델) predict_proba 최대 절대 차이."""
+    if not len(X):
+        return 0.0
+    expected = original["model"].predict_proba(X)
+    diff = float(np.max(np.abs(expected - shared["model"].predict_proba(X))))
+    fast = get_fast_model(shared)
+    if fast is not None:
+        # 펼친 모델은 배치 크기에 따라 경로가 바뀌므로 한 행씩도 확인 (메타 모델 행렬곱은 배치 크기에 따라
+        # 마지막 자리가 달라질 수 있어 원본도 한 행씩 돌려 비교한다)
+        diff = max(diff, float(np.max(np.abs(expected - fast.predict_proba(X)))))
+        for i in range(min(len(X), 50)):
+            row = X[i : i + 1]
+            diff = max(diff, float(np.max(np.abs(original["model"].predict_proba(row) - fast.predict_proba(row)))))
+    return diff
@@ -0,0 +1,137 @@
+"""열 단위 바이너리 요청/응답 (/predict/columnar, /preprocess/columnar).
+
+행마다 dict 를 만들지 않고 요청 본문을 바로 numpy 열로 읽는다.
+
+    application/x-npy                    .npy 한 개. 구조화 배열(필드 이름 = 컬럼)이거나, 2차원 숫자 배열 + columns 파라미터
+    application/octet-stream             리틀 엔디언 float32(기본)/float64 행 우선 배열 + columns 파라미터 (헤더 없음)
+    application/vnd.apache.arrow.stream  Arrow IPC 스트림 (pyarrow 가 설치된 경우만)
+
+응답은 기본 JSON {"rows": n, "columns": {이름: [값...]}} 이고, Accept 에 application/x-npy 가 있으면
+구조화 배열 .npy 로 돌려준다.
+"""
+import io
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # 선택 의존성
+    pa = None
+
+MEDIA_NPY = "application/x-npy"
+MEDIA_PACKED = "application/octet-stream"
+MEDIA_ARROW = "application/vnd.apache.arrow.stream"
+MEDIA_JSON = "application/json"
+PACKED_DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+
+class ColumnarError(ValueError):
+    """요청 형식 오류. args[0] 은 응답의 error 코드."""
+
+
+def parse_columns_param(columns: Optional[str]) -> Optional[List[str]]:
+    if not columns:
+        return None
+    return [c.strip() for c in columns.split(",") if c.strip()]
+
+
+def _from_matrix(matrix: np.ndarray, columns: Optional[List[str]]) -> Dict[str, np.ndarray]:
+    if matrix.ndim != 2:
+        raise ColumnarError("expected_2d_array")
+    if not columns or len(columns) != matrix.shape[1]:
+        raise ColumnarError("columns_mismatch")
+    return {col: matrix[:, j] for j, col in enumerate(columns)}
+
+
+def _read_npy(body: bytes, columns: Optional[List[str]]) -> Dict[str, np.ndarray]:
+    try:
+        array = np.load(io.BytesIO(body), allow_pickle=False)
+    except (ValueError, EOFError, OSError) as exc:
+        raise ColumnarError("invalid_npy") from exc
+    if array.dtype.names:
+        return {name: array[name] for name in array.dtype.names}
+    return _from_matrix(array, columns)
+
+
+def _read_packed(body: bytes, columns: Optional[List[str]], dtype: str) -> Dict[str, np.ndarray]:
+    if dtype not in PACKED_DTYPES:
+        raise ColumnarError("unsupported_dtype")
+    if not columns:
+        raise ColumnarError("columns_required")
+    item = np.dtype(PACKED_DTYPES[dtype])
+    if len(body) % (item.itemsize * len(columns)):
+        raise ColumnarError("columns_mismatch")
+    return _from_matrix(np.frombuffer(body, dtype=item).reshape(-1, len(columns)), columns)
+
+
+def _read_arrow(body: bytes) -> Dict[str, np.ndarray]:
+    if pa is None:
+        raise ColumnarError("arrow_unavailable")
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as exc:
+        raise ColumnarError("invalid_arrow") from exc
+    return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+
+def read_columns(
+    body: bytes, content_type: str, columns: Optional[List[str]] = None, dtype: str = "float32"
+) -> Dict[str, np.ndarray]:
+    """요청 본문 -> {컬럼: 1차원 배열}."""
+    media = (content_type or "").split(";")[0].strip().lower()
+    if media == MEDIA_NPY:
+        out = _read_npy(body, columns)
+    elif media == MEDIA_PACKED:
+        out = _read_packed(body, columns, dtype)
+    elif media == MEDIA_ARROW:
+        out = _read_arrow(body)
+    else:
+        raise ColumnarError("unsupported_media_type")
+    lengths = {len(v) for v in out.values()}
+    if len(lengths) != 1 or not lengths.pop():
+        raise ColumnarError("no_items")
+    return out
+
+
+def float_column(values: np.ndarray) -> np.ndarray:
+    """숫자 열 -> float64 (이미 float64 면 복사하지 않음). 숫자가 아니면 ColumnarError."""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError) as exc:
+        raise ColumnarError("non_numeric_column") from exc
+
+
+def columns_matrix(data: Dict[str, np.ndarray], columns: List[str], n: int) -> np.ndarray:
+    """지정한 컬럼 순서의 (n, len(columns)) float 행렬. 없는 컬럼은 NaN."""
+    out = np.full((n, len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        if col in data:
+            out[:, j] = float_column(data[col])
+    return out
+
+
+def _to_structured(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    dtype = []
+    for name, values in arrays.items():
+        if values.dtype == object:
+            values = arrays[name] = values.astype(str)
+        dtype.append((name, values.dtype))
+    out = np.empty(n, dtype=dtype)
+    for name, values in arrays.items():
+        out[name] = values
+    return out
+
+
+def encode_columns(columns: Dict[str, np.ndarray], accept: Optional[str]) -> Tuple[bytes, str]:
+    """응답 열 -> (본문, media type)."""
+    if accept and MEDIA_NPY in accept:
+        buffer = io.BytesIO()
+        np.save(buffer, _to_structured(columns), allow_pickle=False)
+        return buffer.getvalue(), MEDIA_NPY
+    n = len(next(iter(columns.values()))) if columns else 0
+    payload = {"rows": n, "columns": {name: np.asarray(v).tolist() for name, v in columns.items()}}
+    return json.dumps(payload, default=str).encode(), MEDIA_JSON
@@ -0,0 +1,123 @@
+"""/explain: 스태킹 모델(XGB/LGBM/RF -> LogisticRegression) 불량 확률을 입력별 기여도로 나눈다.
+
+- XGBoost / LightGBM: 라이브러리 내장 TreeSHAP (pred_contribs / pred_contrib), 로그오즈 기준
+- RandomForest: 결정 경로 기여도 (Saabas, flat_trees 의 펼친 노드 배열). TreeSHAP 보다 훨씬 싸고 합은 정확하다
+- 기반 모델마다 기여도를 확률 공간으로 비례 환산한 뒤 (sigmoid(bias) + 합 = 그 모델의 확률)
+  메타 모델 계수를 곱해 더한다. base_value + 기여도 합 = 스태킹 모델의 logit(불량 확률).
+- 피처(x_columns) 기여도는 입력으로 되돌린다. 다항/추가 피처는 곱해진 기본 피처에 차수만큼 나눠 주고
+  (lithium_input^2 는 전부 lithium_input, lithium_with_temp 는 반씩), 타깃 입력과 anomaly_depth 는 따로 둔다.
+"""
+from typing import List
+
+import numpy as np
+
+from flat_trees import FlatForestClassifier, compile_forest, get_fast_model
+from preprocessing import EXTRA_POLY_INPUTS
+
+ANOMALY_GROUP = "anomaly_depth"
+
+
+class ExplainError(ValueError):
+    """설명할 수 없는 번들. args[0] 은 응답의 error 코드, args[1] 은 추가 정보(dict)."""
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _tree_shap(est, X: np.ndarray) -> np.ndarray:
+    """XGBoost / LightGBM TreeSHAP -> (n, F + 1) 로그오즈 기여도 (마지막 열이 bias)."""
+    if type(est).__module__.startswith("xgboost"):
+        import xgboost
+
+        dmatrix = xgboost.DMatrix(np.asarray(X, dtype=np.float32), missing=est.missing)
+        return est.get_booster().predict(dmatrix, pred_contribs=True, validate_features=False).astype(float)
+    return np.asarray(est.predict(X, pred_contrib=True), dtype=float)
+
+
+def _group_weights(plan) -> np.ndarray:
+    """(len(x_columns), 그룹 수) 피처 -> 입력 그룹 배분 비율. 그룹은 base + targets + anomaly_depth 순서."""
+    n_base = len(plan.base_features)
+    n_groups = len(plan.input_columns) + 1
+    li, st, tp = (plan.base_features.index(c) for c in EXTRA_POLY_INPUTS)
+    # FeaturePlan.transform 의 계산 순서 (상수항 -> 다항 -> 추가 4개 -> 타깃 -> anomaly_depth)
+    terms = [()] if plan.poly_bias else []
+    terms += list(plan.poly_terms) + [(li, li), (li, li, li), (li, st), (li, tp)]
+    terms += [(n_base + t,) for t in range(len(plan.targets_reg))] + [(n_groups - 1,)]
+    if len(terms) != plan.n_computed:
+        raise ExplainError("explain_unsupported", {"message": "feature layout does not match FeaturePlan"})
+    computed = np.zeros((len(terms), n_groups))
+    for i, term in enumerate(terms):
+        for j in term:
+            computed[i, j] += 1.0 / len(term)
+    weights = np.zeros((plan.n_features, n_groups))
+    present = plan.source >= 0
+    weights[present] = computed[plan.source[present]]
+    return weights
+
+
+class StackExplainer:
+    def __init__(self, bundle: dict, plan):
+        stack = bundle["model"]
+        methods = set(getattr(stack, "stack_method_", []))
+        if getattr(stack, "passthrough", False) or methods != {"predict_proba"} or len(stack.classes_) != 2:
+            raise ExplainError("explain_unsupported", {"message": "binary predict_proba stacking only"})
+        final = stack.final_estimator_
+        if type(final).__name__ != "LogisticRegression":
+            raise ExplainError("explain_unsupported", {"message": "final estimator must be LogisticRegression"})
+        fast = get_fast_model(bundle)
+        flats = fast.flat_estimators_ if fast is not None else [None] * len(stack.estimators_)
+
+        self.members = []  # (메타 모델 계수, 예측기, 경로 기여도 여부)
+        for coef, est, flat in zip(final.coef_[0], stack.estimators_, flats):
+            if isinstance(est, str):
+                raise ExplainError("explain_unsupported", {"message": "dropped estimators are not supported"})
+            if isinstance(flat, FlatForestClassifier) or isinstance(est, FlatForestClassifier):
+                self.members.append((float(coef), flat if flat is not None else est, True))
+            elif type(est).__name__ == "RandomForestClassifier":
+                forest = compile_forest(est)
+                if forest is None:
+                    raise ExplainError("explain_unsupported", {"message": "RandomForest could not be flattened"})
+                self.members.append((float(coef), forest, True))
+            elif type(est).__module__.startswith(("xgboost", "lightgbm")):
+                self.members.append((float(coef), est, False))
+            else:
+                raise ExplainError("explain_unsupported", {"estimator": type(est).__name__})
+        self.intercept = float(final.intercept_[0])
+        self.groups: List[str] = list(plan.input_columns) + [ANOMALY_GROUP]
+        self.group_weights = _group_weights(plan)
+
+    def explain(self, X: np.ndarray) -> tuple:
+        """스케일된 피처 행렬 -> (base_value (n,), 피처별 로그오즈 기여도 (n, len(x_columns)))."""
+        n = X.shape[0]
+        base_value = np.full(n, self.intercept)
+        contrib = np.zeros(X.shape)
+        for coef, est, by_path in self.members:
+            if by_path:
+                bias, phi = est.contributions(X)
+            else:
+                raw = _tree_shap(est, X)
+                bias_raw = raw[:, -1]
+                margin = raw.sum(axis=1)
+                bias, proba = _sigmoid(bias_raw), _sigmoid(margin)
+                # 로그오즈 기여도를 같은 비율로 줄여 확률 기여도로 (기여도 합이 0 에 가까우면 기울기)
+                span = margin - bias_raw
+                tiny = np.abs(span) < 1e-12
+                scale = np.where(tiny, proba * (1.0 - proba), (proba - bias) / np.where(tiny, 1.0, span))
+                phi = raw[:, :-1] * scale[:, None]
+            base_value += coef * bias
+            contrib += coef * phi
+        return base_value, contrib
+
+    def group(self, contrib: np.ndarray) -> np.ndarray:
+        """(n, len(x_columns)) -> (n, len(groups))."""
+        return contrib @ self.group_weights
+
+
+def get_explainer(bundle: dict, plan) -> StackExplainer:
+    """번들마다 한 번만 만들어 번들 dict 에 붙여 둔다. 설명할 수 없는 번들이면 ExplainError."""
+    explainer = bundle.get("_explainer")
+    if explainer is None:
+        explainer = StackExplainer(bundle, plan)
+        bundle["_explainer"] = explainer
+    return explainer
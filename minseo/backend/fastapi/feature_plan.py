@@ -0,0 +1,168 @@
+"""/predict 피처 계산 계획 (모델 번들 로드 시 한 번 컴파일, 요청마다 DataFrame 을 만들지 않는다).
+
+입력 dict -> (imputer) -> 다항/추가 피처 + 타깃 + anomaly_depth -> x_columns 순서 -> 스케일링 까지를
+고정 인덱스와 미리 잡은 numpy 배열로 처리한다. IsolationForest 점수도 트리를 펼친 배열(flat_trees)로 계산한다. 연산 순서는 기존 pandas 경로
+(PolynomialFeatures.transform, df_poly 추가 컬럼, pd.concat, reindex, scaler.transform)와 같아서 결과가 비트 단위로 같다.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer, SimpleImputer
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from flat_trees import FlatIsolationForest
+from preprocessing import EXTRA_POLY_INPUTS, extra_poly_features
+
+
+class FeaturePlan:
+    def __init__(self, bundle: dict):
+        self.base_features = list(bundle["base_features"])
+        self.targets_reg = list(bundle.get("targets_reg", []))
+        self.input_columns = self.base_features + self.targets_reg
+        self.imputer = bundle["imputer"]
+        self.iso = bundle["iso"]
+        self.scaler = bundle["scaler"]
+        poly = bundle["poly"]
+        extra_cols = list(bundle["extra_poly_cols"])
+        x_columns = list(bundle["x_columns"])
+        n_base = len(self.base_features)
+
+        # PolynomialFeatures 항: 차수 d 항은 (가장 작은 인덱스 피처) * (나머지 d-1 차 항) 순서로 곱해진다
+        self.poly_bias = bool(poly.include_bias)
+        self.poly_terms = []
+        for powers in poly.powers_:
+            idx = [j for j in range(n_base) for _ in range(int(powers[j]))]
+            if idx:
+                self.poly_terms.append(tuple(idx))
+        poly_names = list(poly.get_feature_names_out(self.base_features))
+
+        self.flat_iso = self._compile_iso()
+
+        li, st, tp = (self.base_features.index(c) for c in EXTRA_POLY_INPUTS)
+        self._li, self._st, self._tp = li, st, tp
+
+        # 계산 순서대로의 컬럼 이름 (df_poly -> 추가 4개 -> 타깃 -> anomaly_depth)
+        names = poly_names + extra_cols[:4] + self.targets_reg + ["anomaly_depth"]
+        position = {name: i for i, name in enumerate(names)}  # 같은 이름이면 나중 값이 남음 (df 대입과 동일)
+        self.n_features = len(x_columns)
+        self.source = np.array([position.get(c, -1) for c in x_columns], dtype=np.intp)
+        self.n_computed = len(names)
+
+        self._center = None
+        self._scale = None
+        if type(self.scaler) is RobustScaler:
+            self._center = self.scaler.center_ if self.scaler.with_centering else None
+            self._scale = self.scaler.scale_ if self.scaler.with_scaling else None
+            self._fast_scale = True
+        elif type(self.scaler) is StandardScaler:
+            self._center = self.scaler.mean_ if self.scaler.with_mean else None
+            self._scale = self.scaler.scale_ if self.scaler.with_std else None
+            self._fast_scale = True
+        else:
+            self._fast_scale = False
+
+        # 결측이 없을 때 imputer.transform 은 입력을 그대로 돌려주므로 건너뛸 수 있다
+        stats = None
+        if type(self.imputer) is IterativeImputer:
+            stats = getattr(getattr(self.imputer, "initial_imputer_", None), "statistics_", None)
+        elif type(self.imputer) is SimpleImputer:
+            stats = getattr(self.imputer, "statistics_", None)
+        self._identity_when_complete = (
+            stats is not None
+            and not getattr(self.imputer, "add_indicator", False)
+            and not np.isnan(np.asarray(stats, dtype=float)).any()
+        )
+
+    def _compile_iso(self):
+        """펼친 포레스트가 원본과 같은 값을 내는지 확인하고, 아니면 None (원본 decision_function 사용)."""
+        try:
+            flat = FlatIsolationForest(self.iso)
+            probe = flat.probe_rows()
+            if np.array_equal(flat.decision_function(probe), self.iso.decision_function(probe).astype(float)):
+                return flat
+            print("FlatIsolationForest mismatch; falling back to IsolationForest.decision_function")
+        except Exception as exc:
+            print(f"FlatIsolationForest unavailable ({exc}); falling back to IsolationForest.decision_function")
+        return None
+
+    def anomaly_depth(self, base: np.ndarray) -> np.ndarray:
+        if (
+            self.flat_iso is not None
+            and len(base) <= self.flat_iso.max_flat_rows
+            and not np.isnan(base).any()
+        ):
+            return self.flat_iso.decision_function(base)
+        return self.iso.decision_function(base).astype(float)
+
+    # -- 입력 ----------------------------------------------------------------
+
+    def missing_inputs(self, items: List[Dict[str, Any]]) -> List[str]:
+        """어느 item 에도 없는 기본 피처 (DataFrame 의 컬럼 합집합 기준과 동일)."""
+        return [c for c in self.base_features if not any(c in item for item in items)]
+
+    def input_matrix(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        out = np.empty((len(items), len(self.input_columns)), dtype=float)
+        for i, item in enumerate(items):
+            for j, col in enumerate(self.input_columns):
+                value = item.get(col)
+                out[i, j] = np.nan if value is None else value
+        return out
+
+    def impute(self, matrix: np.ndarray) -> np.ndarray:
+        if self._identity_when_complete and not np.isnan(matrix).any():
+            return matrix.copy()
+        try:
+            return self.imputer.transform(matrix)
+        except Exception:
+            return np.nan_to_num(matrix, nan=0.0)
+
+    # -- 피처/스케일링 ---------------------------------------------------------
+
+    def transform(self, imputed: np.ndarray) -> np.ndarray:
+        """imputed (n, base+targets) -> 스케일된 (n, len(x_columns)) 행렬."""
+        n_base = len(self.base_features)
+        base = imputed[:, :n_base]
+        targets = imputed[:, n_base:]
+        n = imputed.shape[0]
+
+        computed = np.empty((n, self.n_computed), dtype=float)
+        col = 0
+        if self.poly_bias:
+            computed[:, 0] = 1.0
+            col = 1
+        for term in self.poly_terms:
+            value = base[:, term[-1]]
+            for j in reversed(term[:-1]):
+                value = base[:, j] * value
+            computed[:, col] = value
+            col += 1
+        extras = extra_poly_features(base[:, self._li], base[:, self._st], base[:, self._tp])
+        for values in extras:
+            computed[:, col] = values
+            col += 1
+        computed[:, col : col + targets.shape[1]] = targets
+        col += targets.shape[1]
+        computed[:, col] = self.anomaly_depth(base)
+
+        X = np.empty((n, self.n_features), dtype=float)
+        present = self.source >= 0
+        X[:, present] = computed[:, self.source[present]]
+        X[:, ~present] = np.nan
+        if not self._fast_scale:
+            return self.scaler.transform(X)
+        if self._center is not None:
+            X -= self._center
+        if self._scale is not None:
+            X /= self._scale
+        return X
+
+
+def get_feature_plan(bundle: dict) -> FeaturePlan:
+    """번들마다 한 번만 컴파일해서 번들 dict 에 붙여 둔다."""
+    plan = bundle.get("_feature_plan")
+    if plan is None:
+        features = bundle.get("features")
+        plan = features.plan if features is not None else FeaturePlan(bundle)
+        bundle["_feature_plan"] = plan
+    return plan
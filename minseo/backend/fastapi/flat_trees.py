@@ -0,0 +1,475 @@
+"""트리 앙상블(sklearn / XGBoost / LightGBM)을 numpy 배열로 펼친 예측기.
+
+모든 트리의 노드를 한 배열로 이어 붙이고(리프는 자기 자신을 가리킴) 최대 깊이만큼 한꺼번에 한 단계씩 내려간다.
+속성이 전부 numpy 배열이라 joblib.load(mmap_mode="r") 로 읽으면 여러 프로세스가 같은 페이지를 공유한다
+(sklearn Tree 는 unpickle 때 노드를 자기 메모리로 복사하므로 공유되지 않는다).
+
+분기 비교와 합산은 각 라이브러리와 같은 자료형/순서로 해서 결과가 비트 단위로 같다.
+- sklearn : float32 입력, x <= 임계값(float64) 이면 왼쪽, 트리 값은 float64 로 트리 순서대로 누적
+- XGBoost : float32 입력, x < 임계값(float32) 이면 왼쪽, 결측은 default_left, float32 누적 후 float32 sigmoid
+- LightGBM: float64 입력, x <= 임계값 이면 왼쪽, missing_type(None/Zero/NaN) 규칙, float64 누적 후 sigmoid
+"""
+import ctypes
+import ctypes.util
+import json
+import math
+
+import numpy as np
+
+_LGBM_ZERO = 1e-35  # LightGBM kZeroThreshold
+
+
+def _load_expf():
+    """XGBoost 가 쓰는 C 라이브러리 expf (정확히 반올림되지 않아 numpy 와 1ulp 다를 수 있다). 없으면 None."""
+    try:
+        libm = ctypes.CDLL(ctypes.util.find_library("m") or "libm.so.6")
+        expf = libm.expf
+    except (OSError, AttributeError):
+        return None
+    expf.restype = ctypes.c_float
+    expf.argtypes = [ctypes.c_float]
+    return expf
+
+
+_EXPF = _load_expf()
+
+
+def _expf(z: np.ndarray) -> np.ndarray:
+    if _EXPF is None:
+        return np.exp(z.astype(np.float64)).astype(np.float32)
+    return np.fromiter((_EXPF(v) for v in z.tolist()), dtype=np.float32, count=len(z))
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """sklearn.ensemble._iforest._average_path_length 와 같은 식."""
+    n = np.asarray(n, dtype=float)
+    out = np.zeros(n.shape)
+    mask_1 = n <= 1
+    mask_2 = n == 2
+    rest = ~np.logical_or(mask_1, mask_2)
+    out[mask_2] = 1.0
+    out[rest] = 2.0 * (np.log(n[rest] - 1.0) + np.euler_gamma) - 2.0 * (n[rest] - 1.0) / n[rest]
+    return out
+
+
+class _FlatTrees:
+    """트리별 노드 배열(left/right 는 트리 안 번호, 리프는 -1)을 이어 붙여 한 번에 순회한다."""
+
+    x_dtype = np.float32
+    strict = False  # True 면 x < 임계값 이 왼쪽 (XGBoost)
+
+    def _set_nodes(self, trees: list, n_features: int) -> None:
+        """trees: (left, right, feature, threshold, missing_left, depth[, nan_as_zero, zero_missing]) 목록."""
+        lefts, rights, features, thresholds, missing, nan_zero, zero_miss, roots = [], [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            left, right, feature, threshold, missing_left, depth = tree[:6]
+            count = len(left)
+            is_leaf = np.asarray(left) == -1
+            own = np.arange(count)
+            lefts.append(np.where(is_leaf, own, left) + offset)
+            rights.append(np.where(is_leaf, own, right) + offset)
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.asarray(threshold))
+            missing.append(np.asarray(missing_left, dtype=bool))
+            if len(tree) > 6:
+                nan_zero.append(np.asarray(tree[6], dtype=bool))
+                zero_miss.append(np.asarray(tree[7], dtype=bool))
+            roots.append(offset)
+            offset += count
+            max_depth = max(max_depth, depth)
+        index_dtype = np.int32 if offset < 2**31 else np.int64
+        left = np.concatenate(lefts) if trees else np.empty(0, dtype=np.int64)
+        right = np.concatenate(rights) if trees else np.empty(0, dtype=np.int64)
+        # child[2 * node + 0] = 왼쪽, child[2 * node + 1] = 오른쪽
+        self.child = np.stack([left, right], axis=1).ravel().astype(index_dtype)
+        self.feature = (np.concatenate(features) if trees else np.empty(0)).astype(index_dtype)
+        self.threshold = np.concatenate(thresholds) if trees else np.empty(0)
+        self.missing_left = np.concatenate(missing) if trees else np.empty(0, dtype=bool)
+        self.nan_as_zero = np.concatenate(nan_zero) if nan_zero else None
+        zero = np.concatenate(zero_miss) if zero_miss else None
+        self.zero_missing = zero if zero is not None and zero.any() else None
+        self.is_leaf = left == np.arange(offset)
+        self.roots = np.array(roots, dtype=index_dtype)
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    def leaves(self, X: np.ndarray, step=None) -> np.ndarray:
+        """(n, n_trees) 각 샘플이 도달한 리프 노드 번호.
+
+        step(active, parent, child) 를 주면 한 단계 내려갈 때마다 호출한다 (active 는 샘플 * n_trees + 트리 번호).
+        """
+        Xc = np.ascontiguousarray(X, dtype=self.x_dtype)
+        n = Xc.shape[0]
+        n_trees = len(self.roots)
+        flat = Xc.ravel()
+        node = np.tile(self.roots, n).astype(np.intp)
+        has_nan = bool(np.isnan(flat).any())
+        # 아직 리프에 닿지 않은 (샘플, 트리) 만 들고 내려간다
+        active = np.flatnonzero(~self.is_leaf[node])
+        cur = node[active]
+        base = (active // n_trees) * self.n_features
+        for _ in range(self.max_depth):
+            if not active.size:
+                break
+            x = flat[base + self.feature[cur]]
+            thr = self.threshold[cur]
+            go_right = ~(x < thr) if self.strict else ~(x <= thr)
+            if self.nan_as_zero is not None:
+                # LightGBM: NaN 은 missing_type 이 NaN 이 아니면 0 으로 보고, Zero/NaN 결측은 default 방향
+                missing = np.zeros(x.shape, dtype=bool)
+                if has_nan:
+                    is_nan = np.isnan(x)
+                    as_zero = is_nan & self.nan_as_zero[cur]
+                    x = np.where(as_zero, 0.0, x)
+                    go_right = np.where(as_zero, ~(0.0 <= thr), go_right)
+                    missing |= is_nan & ~as_zero
+                if self.zero_missing is not None:
+                    missing |= self.zero_missing[cur] & (x >= -_LGBM_ZERO) & (x <= _LGBM_ZERO)
+                go_right = np.where(missing, ~self.missing_left[cur], go_right)
+            elif has_nan:
+                go_right = np.where(np.isnan(x), ~self.missing_left[cur], go_right)
+            nxt = self.child[2 * cur + go_right]
+            if step is not None:
+                step(active, cur, nxt)
+            cur = nxt
+            done = self.is_leaf[cur]
+            if done.any():
+                node[active[done]] = cur[done]
+                keep = ~done
+                active, cur, base = active[keep], cur[keep], base[keep]
+        return node.reshape(n, n_trees)
+
+    def probe_rows(self, n: int = 512, seed: int = 0) -> np.ndarray:
+        """각 피처의 분기 임계값 범위를 조금 넘게 덮는 검증용 입력."""
+        rng = np.random.default_rng(seed)
+        probe = np.empty((n, self.n_features))
+        for j in range(self.n_features):
+            used = self.threshold[~self.is_leaf & (self.feature == j)].astype(float)
+            lo, hi = (used.min(), used.max()) if used.size else (-1.0, 1.0)
+            probe[:, j] = rng.uniform(lo - (hi - lo) * 0.1, hi + (hi - lo) * 0.1, size=n)
+        return probe
+
+
+def _sklearn_tree(t, feature_map=None) -> tuple:
+    feature = np.asarray(feature_map)[np.where(t.children_left == -1, 0, t.feature)] if feature_map is not None else t.feature
+    nodes = t.__getstate__()["nodes"]
+    if "missing_go_to_left" in (nodes.dtype.names or ()):
+        missing_left = nodes["missing_go_to_left"].astype(bool)
+    else:
+        missing_left = np.zeros(t.node_count, dtype=bool)
+    return t.children_left, t.children_right, feature, t.threshold, missing_left, t.max_depth
+
+
+def _depths(left, right) -> np.ndarray:
+    """루트 깊이 0 기준 노드 깊이 (부모가 자식보다 앞 번호라는 가정 없이 BFS)."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if left[node] != -1:
+            for child in (left[node], right[node]):
+                depth[child] = depth[node] + 1
+                stack.append(child)
+    return depth
+
+
+class FlatIsolationForest(_FlatTrees):
+    """IsolationForest.decision_function 을 펼친 트리로 계산."""
+
+    max_flat_rows = 512  # 샘플 모델 기준 sklearn(100 트리) 보다 빠른 배치 크기 상한
+
+    def __init__(self, iso):
+        trees = [est.tree_ for est in iso.estimators_]
+        subsample = iso._max_features != iso.n_features_in_
+        maps = iso.estimators_features_ if subsample else [None] * len(trees)
+        self._set_nodes([_sklearn_tree(t, m) for t, m in zip(trees, maps)], iso.n_features_in_)
+        values = []
+        for t in trees:
+            depth = _depths(t.children_left, t.children_right) + 1
+            values.append(depth + _average_path_length(t.n_node_samples) - 1.0)
+        self.value = np.concatenate(values) if values else np.empty(0)
+        self.denominator = len(trees) * _average_path_length(np.array([iso._max_samples]))
+        self.offset = iso.offset_
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        contrib = self.value[self.leaves(X)]
+        depths = np.cumsum(contrib, axis=1)[:, -1] if len(self.roots) else np.zeros(n)
+        scores = 2 ** (-np.divide(depths, self.denominator, out=np.ones_like(depths), where=self.denominator != 0))
+        return -scores - self.offset
+
+
+class FlatForestClassifier(_FlatTrees):
+    """RandomForestClassifier.predict_proba (단일 출력) 를 펼친 트리로 계산."""
+
+    max_flat_rows = 128  # 샘플 모델 기준 sklearn(300 트리) 보다 빠른 배치 크기 상한
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        self._set_nodes([_sklearn_tree(t) for t in trees], forest.n_features_in_)
+        self.classes_ = forest.classes_
+        self.n_classes_ = forest.n_classes_
+        self.n_features_in_ = forest.n_features_in_
+        # 리프 값 = DecisionTreeClassifier.predict_proba 결과 (클래스 비율, 합이 0 이면 그대로)
+        values = []
+        for t in trees:
+            proba = t.value[:, 0, : self.n_classes_].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+            values.append(proba)
+        self.value = np.concatenate(values) if values else np.empty((0, self.n_classes_))
+        self.n_estimators = len(trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        n = X.shape[0]
+        if not self.n_estimators:
+            return np.zeros((n, self.n_classes_))
+        contrib = self.value[self.leaves(X)]  # (n, n_trees, n_classes)
+        total = np.cumsum(contrib, axis=1)[:, -1, :]
+        return total / self.n_estimators
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def contributions(self, X) -> tuple:
+        """결정 경로 기여도 (Saabas) -> (bias (n,), 피처별 기여도 (n, n_features)), 마지막 클래스 확률 기준.
+
+        분기마다 (자식 노드 값 - 부모 노드 값) 을 분기 피처에 더하므로 bias + 합 = predict_proba[:, -1].
+        """
+        X = np.asarray(X, dtype=float)
+        n = X.shape[0]
+        n_trees = len(self.roots)
+        value = self.value[:, -1]
+        total = np.zeros(n * self.n_features)
+
+        def step(active, parent, child):
+            index = (active // n_trees) * self.n_features + self.feature[parent]
+            total[:] += np.bincount(index, weights=value[child] - value[parent], minlength=len(total))
+
+        if n_trees:
+            self.leaves(X, step=step)
+        bias = np.full(n, value[self.roots].mean() if n_trees else 0.0)
+        return bias, total.reshape(n, self.n_features) / max(n_trees, 1)
+
+
+class FlatXGBClassifier(_FlatTrees):
+    """XGBClassifier(binary:logistic, 수치 분기).predict_proba 를 펼친 트리로 계산."""
+
+    strict = True
+    max_flat_rows = 8
+
+    def __init__(self, clf):
+        booster = clf.get_booster()
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        if learner["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"unsupported objective: {learner['objective']['name']}")
+        model = learner["gradient_booster"]["model"]
+        if int(model["gbtree_model_param"].get("num_parallel_tree", "1")) != 1:
+            raise ValueError("num_parallel_tree > 1 is not supported")
+        trees = model["trees"]
+        best = getattr(clf, "best_iteration", None)
+        if best is not None:
+            trees = trees[: best + 1]
+        parsed, values = [], []
+        for tree in trees:
+            if any(tree.get("split_type", [])):
+                raise ValueError("categorical splits are not supported")
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            right = np.asarray(tree["right_children"], dtype=np.int64)
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            depth = int(_depths(left, right).max()) if len(left) else 0
+            parsed.append((left, right, tree["split_indices"], cond, tree["default_left"], depth))
+            values.append(cond)  # 리프의 split_conditions 가 리프 값
+        self._set_nodes(parsed, int(learner["learner_model_param"]["num_feature"]))
+        self.value = np.concatenate(values) if values else np.empty(0, dtype=np.float32)
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        # ProbToMargin: -log(1/base_score - 1) (float32)
+        self.base_margin = np.float32(-math.log(float(np.float32(1.0) / np.float32(base_score) - np.float32(1.0))))
+        self.classes_ = clf.classes_
+        self.n_features_in_ = self.n_features
+
+    def predict_proba(self, X) -> np.ndarray:
+        n = np.asarray(X).shape[0]
+        contrib = self.value[self.leaves(X)]  # float32 (n, n_trees)
+        margin = np.cumsum(np.column_stack([np.full(n, self.base_margin, dtype=np.float32), contrib]), axis=1)[:, -1]
+        # common::Sigmoid: 1 / (expf(min(-x, 88.7)) + 1 + 1e-16)
+        e = _expf(np.minimum(-margin, np.float32(88.7)))
+        p = np.float32(1.0) / (e + np.float32(1.0) + np.float32(1e-16))
+        return np.vstack((np.float32(1.0) - p, p)).T
+
+
+class FlatLGBMClassifier(_FlatTrees):
+    """LGBMClassifier(binary, 수치 분기).predict_proba 를 펼친 트리로 계산."""
+
+    x_dtype = np.float64
+    max_flat_rows = 4
+
+    def __init__(self, clf):
+        booster = clf.booster_
+        dump = booster.dump_model()
+        objective = dump.get("objective", "").split()
+        if not objective or objective[0] != "binary" or dump.get("num_class", 1) != 1 or dump.get("average_output"):
+            raise ValueError(f"unsupported objective: {dump.get('objective')}")
+        self.sigmoid = 1.0
+        for token in objective[1:]:
+            if token.startswith("sigmoid:"):
+                self.sigmoid = float(token.split(":", 1)[1])
+        tree_info = dump["tree_info"]
+        best = booster.best_iteration
+        if best and best > 0:
+            tree_info = tree_info[:best]
+        parsed, values = [], []
+        for info in tree_info:
+            tree, value = self._parse(info["tree_structure"])
+            parsed.append(tree)
+            values.append(value)
+        self._set_nodes(parsed, dump["max_feature_idx"] + 1)
+        self.value = np.concatenate(values) if values else np.empty(0)
+        self.classes_ = clf.classes_
+        self.n_features_in_ = self.n_features
+
+    @staticmethod
+    def _parse(root: dict) -> tuple:
+        nodes = []  # (dict, depth)
+        index = {}
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            index[id(node)] = len(nodes)
+            nodes.append((node, depth))
+            if "leaf_value" not in node:
+                stack.append((node["right_child"], depth + 1))
+                stack.append((node["left_child"], depth + 1))
+        count = len(nodes)
+        left = np.full(count, -1, dtype=np.int64)
+        right = np.full(count, -1, dtype=np.int64)
+        feature = np.zeros(count, dtype=np.int64)
+        threshold = np.zeros(count)
+        missing_left = np.zeros(count, dtype=bool)
+        nan_as_zero = np.zeros(count, dtype=bool)
+        zero_missing = np.zeros(count, dtype=bool)
+        value = np.zeros(count)
+        for i, (node, _) in enumerate(nodes):
+            if "leaf_value" in node:
+                value[i] = node["leaf_value"]
+                continue
+            if node.get("decision_type", "<=") != "<=":
+                raise ValueError("categorical splits are not supported")
+            left[i] = index[id(node["left_child"])]
+            right[i] = index[id(node["right_child"])]
+            feature[i] = node["split_feature"]
+            threshold[i] = node["threshold"]
+            missing_left[i] = bool(node.get("default_left", False))
+            missing_type = node.get("missing_type", "None")
+            nan_as_zero[i] = missing_type != "NaN"
+            zero_missing[i] = missing_type == "Zero"
+        depth = max(d for _, d in nodes)
+        return (left, right, feature, threshold, missing_left, depth, nan_as_zero, zero_missing), value
+
+    def predict_proba(self, X) -> np.ndarray:
+        raw = np.cumsum(self.value[self.leaves(X)], axis=1)[:, -1] if len(self.roots) else np.zeros(len(X))
+        # std::exp 와 같은 값을 내도록 math.exp 사용 (np.exp 는 1ulp 다를 수 있음)
+        p = np.fromiter((1.0 / (1.0 + math.exp(-self.sigmoid * r)) for r in raw), dtype=float, count=len(raw))
+        return np.vstack((1.0 - p, p)).T
+
+
+class FlatStackingClassifier:
+    """StackingClassifier(passthrough 없음).predict_proba 를 펼친 기반 모델로 계산.
+
+    펼친 모델은 작은 배치에서 빠르고 라이브러리 구현(C/C++, 멀티스레드)은 큰 배치에서 빠르므로,
+    기반 모델마다 배치 행 수가 max_flat_rows 이하일 때만 펼친 모델을 쓴다. 메타 모델은 원본을 쓴다.
+    """
+
+    def __init__(self, stack, flat_estimators: list):
+        self.estimators_ = list(stack.estimators_)
+        self.flat_estimators_ = flat_estimators
+        self.final_estimator_ = stack.final_estimator_
+        self.classes_ = stack.classes_
+        self.stack_method_ = list(stack.stack_method_)
+        self.n_features_in_ = stack.n_features_in_
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        n = X.shape[0]
+        binary = len(self.classes_) == 2
+        meta = []
+        for est, flat, method in zip(self.estimators_, self.flat_estimators_, self.stack_method_):
+            if isinstance(est, str) and est == "drop":
+                continue
+            if flat is not None and (n <= flat.max_flat_rows or flat is est):
+                est = flat
+            preds = getattr(est, method)(X)
+            if preds.ndim == 1:
+                preds = preds.reshape(-1, 1)
+            elif method == "predict_proba" and binary:
+                preds = preds[:, 1:]
+            meta.append(preds)
+        return self.final_estimator_.predict_proba(np.concatenate(meta, axis=1))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def _compile(flat_cls, est, original_name: str):
+    try:
+        flat = flat_cls(est)
+        probe = flat.probe_rows()
+        if np.array_equal(flat.predict_proba(probe), est.predict_proba(probe)):
+            return flat
+        print(f"{flat_cls.__name__} mismatch; keeping {original_name}")
+    except Exception as exc:
+        print(f"{flat_cls.__name__} unavailable ({exc}); keeping {original_name}")
+    return None
+
+
+def compile_forest(forest):
+    """RandomForestClassifier -> FlatForestClassifier. 원본과 결과가 다르면 None."""
+    return _compile(FlatForestClassifier, forest, "RandomForestClassifier")
+
+
+def compile_estimator(est):
+    """스태킹 기반 모델 하나를 펼친 예측기로. 지원하지 않거나 결과가 다르면 None."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    if isinstance(est, (FlatForestClassifier, FlatXGBClassifier, FlatLGBMClassifier)):
+        return est
+    module = type(est).__module__
+    if isinstance(est, RandomForestClassifier):
+        return compile_forest(est)
+    if module.startswith("xgboost"):
+        return _compile(FlatXGBClassifier, est, type(est).__name__)
+    if module.startswith("lightgbm"):
+        return _compile(FlatLGBMClassifier, est, type(est).__name__)
+    return None
+
+
+def compile_stacking(stack, flat_estimators: dict = None):
+    """StackingClassifier -> FlatStackingClassifier. 지원하지 않는 구성이면 None.
+
+    flat_estimators: 이미 펼쳐 둔 기반 모델 {이름: 예측기} (번들에 저장된 것), 없는 것만 새로 펼친다.
+    """
+    if getattr(stack, "passthrough", False) or not hasattr(stack, "stack_method_"):
+        return None
+    flat_estimators = flat_estimators or {}
+    flats = []
+    for name, est in zip(stack.named_estimators_.keys(), stack.estimators_):
+        if isinstance(est, str):
+            flats.append(None)
+            continue
+        flats.append(flat_estimators.get(name) or compile_estimator(est))
+    return FlatStackingClassifier(stack, flats)
+
+
+def get_fast_model(bundle: dict):
+    """번들의 스태킹 모델을 펼친 예측기로 (번들마다 한 번만 만들어 번들 dict 에 붙여 둔다). 안 되면 None."""
+    if "_fast_model" not in bundle:
+        try:
+            bundle["_fast_model"] = compile_stacking(bundle["model"], bundle.get("flat_estimators"))
+        except Exception as exc:
+            print(f"FlatStackingClassifier unavailable ({exc}); serving the original model")
+            bundle["_fast_model"] = None
+    return bundle["_fast_model"]
@@ -1,17 +1,44 @@
 import os
 import re
-import threading
+import time
 from typing import Any, Dict, List, Optional
 
-import joblib
 import numpy as np
-import pandas as pd
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from pydantic import BaseModel
 from sklearn.experimental import enable_iterative_imputer  # noqa: F401
 from sklearn.ensemble import IsolationForest
 from sklearn.impute import IterativeImputer, SimpleImputer
 
+from batching import MicroBatcher
+from bundle_store import load_bundle, resolve_bundle_path
+from columnar import (
+    ColumnarError,
+    columns_matrix,
+    encode_columns,
+    float_column,
+    parse_columns_param,
+    read_columns,
+)
+from explain import ExplainError, get_explainer
+from feature_plan import get_feature_plan
+from flat_trees import get_fast_model
+from model_registry import ModelRegistry
+from predict_cache import PredictCache
+from simulation import SimulationError, axis_values, grid_matrix, safe_ranges
+from preprocessing import (
+    BASE_FEATURES,
+    TARGET_CLS,
+    TARGETS_REG,
+    FitCache,
+    column_values,
+    items_matrix,
+    iqr_clean,
+    normal_mask,
+)
+
 app = FastAPI()
 
 MODEL_PATH = os.getenv(
@@ -19,10 +46,42 @@ MODEL_PATH = os.getenv(
     "/home/ubuntu/kimminseo/backend/fastapi/model/model.joblib",
 )
 MODEL_DIR = os.getenv("MODEL_DIR", "/app/model")
-_model = None
-_model_mtime = None
-_model_path = MODEL_PATH
-_model_lock = threading.Lock()
+# /predict 마이크로 배칭: 한 배치 최대 행 수(1 이하면 끔), 첫 요청 후 최대 대기(ms)
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "64"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "5"))
+# 모델 레지스트리: 캐시할 번들 수 / 메모리 추정치 상한(MB, 0이면 무제한) / mtime 확인 주기(초, 0이면 끔)
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "4"))
+MODEL_CACHE_MAX_MB = int(os.getenv("MODEL_CACHE_MAX_MB", "0"))
+MODEL_REFRESH_SECONDS = float(os.getenv("MODEL_REFRESH_SECONDS", "5"))
+# model.joblib 옆에 model.bundle (메모리 매핑 형식) 이 있으면 그쪽을 읽는다
+MODEL_PREFER_SHARED = os.getenv("MODEL_PREFER_SHARED", "1") == "1"
+# 스태킹 모델을 펼친 트리 예측기(flat_trees.FlatStackingClassifier)로 계산 (0 이면 원본 모델)
+PREDICT_FAST_MODEL = os.getenv("PREDICT_FAST_MODEL", "1") == "1"
+# 시작 시 미리 읽을 model_id 목록 (쉼표 구분, 기본 모델 MODEL_PATH 는 항상 포함)
+MODEL_PRELOAD = [m.strip() for m in os.getenv("MODEL_PRELOAD", "").split(",") if m.strip()]
+# /preprocess 에서 번들 imputer 없이 새로 학습한 결과를 재사용할 최근 입력 수 (0이면 끔)
+PREPROCESS_FIT_CACHE_SIZE = int(os.getenv("PREPROCESS_FIT_CACHE_SIZE", "8"))
+# /predict 결과 캐시: 최대 행 수(0이면 끔) / 유지 시간(초) / 입력 값을 키로 쓸 때 반올림할 소수 자릿수
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))
+PREDICT_CACHE_TTL_SECONDS = float(os.getenv("PREDICT_CACHE_TTL_SECONDS", "300"))
+PREDICT_CACHE_DECIMALS = int(os.getenv("PREDICT_CACHE_DECIMALS", "6"))
+# /simulate 격자 점 수 상한 (축 값 수의 곱)
+SIMULATE_MAX_POINTS = int(os.getenv("SIMULATE_MAX_POINTS", "10000"))
+# /explain 기여도 캐시 최대 행 수 (0이면 끔, 유지 시간/반올림은 예측 캐시와 같음)
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "10000"))
+
+_fit_cache = FitCache(PREPROCESS_FIT_CACHE_SIZE)
+_predict_cache = (
+    PredictCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL_SECONDS, PREDICT_CACHE_DECIMALS)
+    if PREDICT_CACHE_SIZE > 0
+    else None
+)
+_explain_cache = (
+    PredictCache(EXPLAIN_CACHE_SIZE, PREDICT_CACHE_TTL_SECONDS, PREDICT_CACHE_DECIMALS)
+    if EXPLAIN_CACHE_SIZE > 0
+    else None
+)
+_batcher = MicroBatcher(PREDICT_BATCH_MAX_ITEMS, PREDICT_BATCH_MAX_WAIT_MS) if PREDICT_BATCH_MAX_ITEMS > 1 else None
 
 
 class PredictRequest(BaseModel):
@@ -37,6 +96,29 @@ class PreprocessRequest(BaseModel):
     model_id: Optional[str] = None
 
 
+class SimulateAxis(BaseModel):
+    feature: str
+    values: Optional[List[float]] = None
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = 21
+
+
+class SimulateRequest(BaseModel):
+    base: Dict[str, Any]
+    grid: List[SimulateAxis]
+    model_id: Optional[str] = None
+    threshold: Optional[float] = None
+
+
+class ExplainRequest(BaseModel):
+    items: List[Dict[str, Any]]
+    model_id: Optional[str] = None
+    defective_only: bool = False
+    top: int = 3
+    include_columns: bool = False
+
+
 def _resolve_model_path(model_id: Optional[str]) -> str:
     if not model_id:
         return MODEL_PATH
@@ -45,23 +127,46 @@ def _resolve_model_path(model_id: Optional[str]) -> str:
     return os.path.join(MODEL_DIR, f"{model_id}.joblib")
 
 
+def _load_bundle(path: str) -> dict:
+    """번들을 읽고 피처 계획/펼친 모델을 미리 만들어 둔다 (요청 경로에서 컴파일하지 않도록)."""
+    mtime = os.path.getmtime(path)
+    bundle = load_bundle(path)
+    bundle["_mtime"] = mtime  # 예측 캐시 키 (번들이 교체되면 바뀐다)
+    try:
+        get_feature_plan(bundle)
+        if PREDICT_FAST_MODEL:
+            get_fast_model(bundle)
+    except Exception as exc:
+        print(f"Model warm-up skipped for {path}: {exc}")
+    return bundle
+
+
+def _prefer_shared(path: str) -> str:
+    return resolve_bundle_path(path, prefer_shared=MODEL_PREFER_SHARED)
+
+
+_registry = ModelRegistry(
+    MODEL_CACHE_SIZE,
+    MODEL_CACHE_MAX_MB * 1024 * 1024,
+    MODEL_REFRESH_SECONDS,
+    loader=_load_bundle,
+    resolver=_prefer_shared,
+)
+
+
 def load_model(path: Optional[str] = None, force: bool = False) -> Optional[dict]:
-    global _model, _model_mtime, _model_path
-    target_path = path or MODEL_PATH
-    if not os.path.exists(target_path):
-        return None
-    mtime = os.path.getmtime(target_path)
-    with _model_lock:
-        if force or _model is None or _model_path != target_path or _model_mtime != mtime:
-            try:
-                loaded_model = joblib.load(target_path)
-            except Exception as exc:
-                print(f"Failed to load model from {target_path}: {exc}")
-                return _model
-            _model = loaded_model
-            _model_mtime = mtime
-            _model_path = target_path
-    return _model
+    """캐시된 번들은 파일 확인 없이 반환 (.joblib/.bundle 선택과 변경 감지는 레지스트리의 백그라운드 갱신이 담당)."""
+    return _registry.get(path or MODEL_PATH, force=force)
+
+
+def _preload_models() -> None:
+    paths = [MODEL_PATH]
+    for model_id in MODEL_PRELOAD:
+        try:
+            paths.append(_resolve_model_path(model_id))
+        except ValueError:
+            print(f"Model preload skipped (invalid model_id): {model_id}")
+    _registry.preload(paths)
 
 
 @app.get("/health")
@@ -69,6 +174,69 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/models/stats")
+def models_stats():
+    return _registry.stats()
+
+
+@app.get("/predict/stats")
+def predict_stats(reset: bool = False):
+    cache = {
+        "cache": _predict_cache.stats(reset=reset) if _predict_cache is not None else None,
+        "explainCache": _explain_cache.stats(reset=reset) if _explain_cache is not None else None,
+    }
+    if _batcher is None:
+        return {"batching": False, **cache}
+    return {"batching": True, **_batcher.stats(reset=reset), **cache}
+
+
+def _bundle_error(model_bundle: dict) -> Optional[Dict[str, Any]]:
+    keys = ["base_features", "poly", "iso", "scaler", "model", "x_columns", "imputer"]
+    if not all(model_bundle.get(k) for k in keys):
+        return {"error": "model_bundle_missing_keys"}
+    extra_poly_cols = model_bundle.get("extra_poly_cols", [])
+    if not extra_poly_cols or len(extra_poly_cols) < 4:
+        return {"error": "model_bundle_missing_keys", "missing": ["extra_poly_cols"]}
+    return None
+
+
+def _score(model_bundle: dict, plan, matrix: np.ndarray, batch: bool = True):
+    """입력 행렬 (base + targets 순서) -> (결측 보완 행렬, 불량 확률, 예측 0/1).
+
+    batch=False 면 마이크로 배처를 거치지 않고 호출 스레드에서 바로 계산한다 (/simulate 격자처럼 큰 행렬).
+    """
+    imputed = plan.impute(matrix)
+    X_scaled = plan.transform(imputed)
+    model = model_bundle["model"]
+    scorer = (get_fast_model(model_bundle) if PREDICT_FAST_MODEL else None) or model
+    if batch and _batcher is not None:
+        proba = _batcher.predict_proba(scorer, X_scaled)
+    else:
+        proba = scorer.predict_proba(X_scaled)
+    probs = proba[:, 1].astype(float)
+    preds = (probs >= model_bundle.get("threshold", 0.5)).astype(int)
+    return imputed, probs, preds
+
+
+def _score_cached(model_path: str, model_bundle: dict, plan, matrix: np.ndarray):
+    """_score 와 같은 결과. 예측 캐시에 있는 행은 건너뛰고 나머지 행만 계산한다."""
+    if _predict_cache is None:
+        return _score(model_bundle, plan, matrix)
+    version = model_bundle.get("_mtime")
+    keys, hit, probs, imputed = _predict_cache.lookup(model_path, version, matrix)
+    miss = np.flatnonzero(~hit)
+    if len(miss):
+        started = time.perf_counter()
+        miss_imputed, miss_probs, _ = _score(model_bundle, plan, matrix[miss])
+        imputed[miss] = miss_imputed
+        probs[miss] = miss_probs
+        _predict_cache.store(
+            model_path, version, [keys[i] for i in miss], miss_probs, miss_imputed, time.perf_counter() - started
+        )
+    preds = (probs >= model_bundle.get("threshold", 0.5)).astype(int)
+    return imputed, probs, preds
+
+
 @app.post("/predict")
 def predict(payload: PredictRequest):
     try:
@@ -80,22 +248,11 @@ def predict(payload: PredictRequest):
     if model_bundle is None:
         return {"error": "model_not_loaded"}
 
-    base_features = model_bundle.get("base_features")
+    error = _bundle_error(model_bundle)
+    if error is not None:
+        return error
+    base_features = model_bundle["base_features"]
     targets_reg = model_bundle.get("targets_reg", [])
-    poly = model_bundle.get("poly")
-    poly_cols = model_bundle.get("poly_cols", [])
-    extra_poly_cols = model_bundle.get("extra_poly_cols", [])
-    iso = model_bundle.get("iso")
-    scaler = model_bundle.get("scaler")
-    model = model_bundle.get("model")
-    best_threshold = model_bundle.get("threshold", 0.5)
-    x_columns = model_bundle.get("x_columns", [])
-    imputer = model_bundle.get("imputer")
-
-    if not all([base_features, poly, iso, scaler, model, x_columns, imputer]):
-        return {"error": "model_bundle_missing_keys"}
-    if not extra_poly_cols or len(extra_poly_cols) < 4:
-        return {"error": "model_bundle_missing_keys", "missing": ["extra_poly_cols"]}
 
     try:
         required_inputs = list(base_features)
@@ -118,56 +275,17 @@ def predict(payload: PredictRequest):
         else:
             return {"error": "no_input_data"}
 
-        df = pd.DataFrame(items)
-        missing_base = [c for c in required_inputs if c not in df.columns]
+        plan = get_feature_plan(model_bundle)
+        missing_base = plan.missing_inputs(items)
         if missing_base:
             return {"error": "missing_features", "missing": missing_base}
-        for col in targets_reg:
-            if col not in df.columns:
-                df[col] = np.nan
-
-        input_matrix = df[required_inputs + targets_reg].to_numpy(dtype=float)
-        try:
-            imputed = imputer.transform(input_matrix)
-        except Exception:
-            imputed = np.nan_to_num(input_matrix, nan=0.0)
 
-        base_array = imputed[:, : len(base_features)]
+        imputed, probs, preds = _score_cached(model_path, model_bundle, plan, plan.input_matrix(items))
         target_array = imputed[:, len(base_features) :]
         imputed_targets = [
             dict(zip(targets_reg, target_array[row_idx])) for row_idx in range(len(items))
         ]
 
-        anomaly_depth = iso.decision_function(base_array).astype(float)
-
-        X_poly = poly.transform(base_array)
-        runtime_poly_cols = list(poly.get_feature_names_out(base_features))
-        df_poly = pd.DataFrame(X_poly, columns=runtime_poly_cols)
-        df_poly[extra_poly_cols[0]] = base_array[:, base_features.index("lithium_input")] ** 2
-        df_poly[extra_poly_cols[1]] = base_array[:, base_features.index("lithium_input")] ** 3
-        df_poly[extra_poly_cols[2]] = (
-            base_array[:, base_features.index("lithium_input")] * base_array[:, base_features.index("sintering_temp")]
-        )
-        df_poly[extra_poly_cols[3]] = (
-            base_array[:, base_features.index("lithium_input")] * base_array[:, base_features.index("tank_pressure")]
-        )
-
-        feature_frame = pd.concat(
-            [
-                df_poly.reset_index(drop=True),
-                pd.DataFrame(target_array, columns=targets_reg),
-                pd.DataFrame({"anomaly_depth": anomaly_depth}),
-            ],
-            axis=1,
-        )
-
-        if list(feature_frame.columns) != list(x_columns):
-            feature_frame = feature_frame.reindex(columns=x_columns)
-        X_scaled = scaler.transform(feature_frame)
-
-        probs = model.predict_proba(X_scaled)[:, 1].astype(float)
-        preds = (probs >= best_threshold).astype(int)
-
         def _get_value(src: Dict[str, Any], key: str, fallback: float) -> float:
             value = src.get(key)
             if value is None:
@@ -214,108 +332,350 @@ def predict(payload: PredictRequest):
         return {"error": "predict_failed", "message": str(exc)}
 
 
-@app.post("/preprocess")
-def preprocess(payload: PreprocessRequest):
-    base_features = [
-        "lithium_input",
-        "additive_ratio",
-        "process_time",
-        "humidity",
-        "tank_pressure",
-        "sintering_temp",
-    ]
-    targets_reg = ["metal_impurity", "d50"]
-    target_cls = "quality_defect"
+@app.post("/simulate")
+def simulate(payload: SimulateRequest):
+    """기준 로트(base) 에서 파라미터 1~2개를 격자로 바꿔 가며 불량 확률 곡선/표면을 한 번에 계산한다.
+
+    safe_ranges 는 확률이 threshold(기본: 번들 임계값) 미만인 연속 구간. 2차원이면 첫 축 값마다
+    둘째 축의 구간이고, safe_box 는 임계값 미만인 점들을 감싸는 축별 [최소, 최대] 이다.
+    """
+    try:
+        model_path = _resolve_model_path(payload.model_id)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    model_bundle = load_model(model_path)
+    if model_bundle is None:
+        return {"error": "model_not_loaded"}
+    error = _bundle_error(model_bundle)
+    if error is not None:
+        return error
+
+    if not 1 <= len(payload.grid) <= 2:
+        return {"error": "invalid_grid", "message": "grid takes one or two axes"}
+    plan = get_feature_plan(model_bundle)
+    names = [axis.feature for axis in payload.grid]
+    unknown = [name for name in names if name not in plan.input_columns]
+    if unknown:
+        return {"error": "unknown_feature", "features": unknown}
+    if len(set(names)) != len(names):
+        return {"error": "duplicate_axis"}
+    missing_base = [c for c in plan.missing_inputs([payload.base]) if c not in names]
+    if missing_base:
+        return {"error": "missing_features", "missing": missing_base}
+
+    bounds = getattr(model_bundle.get("features"), "iqr_bounds", None)
+    try:
+        axes = [
+            (
+                a.feature,
+                axis_values(
+                    a.feature, a.values, a.start, a.stop, a.steps, plan.base_features, bounds, SIMULATE_MAX_POINTS
+                ),
+            )
+            for a in payload.grid
+        ]
+    except SimulationError as exc:
+        return {"error": exc.args[0], **exc.args[1]}
+    shape = [len(values) for _, values in axes]
+    points = int(np.prod(shape))
+    if points > SIMULATE_MAX_POINTS:
+        return {"error": "grid_too_large", "points": points, "max_points": SIMULATE_MAX_POINTS}
+    threshold = payload.threshold if payload.threshold is not None else model_bundle.get("threshold", 0.5)
 
+    try:
+        base_row = plan.input_matrix([payload.base])
+        # 기준 로트 자체도 같은 패스로 계산 (첫 행)
+        matrix = np.vstack([base_row, grid_matrix(base_row, plan.input_columns, axes)])
+        # 격자(최대 SIMULATE_MAX_POINTS 행)는 배처의 단일 워커 스레드를 잡지 않도록 직접 계산
+        _, probs, _ = _score(model_bundle, plan, matrix, batch=False)
+    except Exception as exc:
+        return {"error": "simulate_failed", "message": str(exc)}
+
+    surface = probs[1:].reshape(shape)
+    ok = surface < threshold
+    out = {
+        "threshold": float(threshold),
+        "base_probability": float(probs[0]),
+        "points": points,
+        "axes": [{"feature": feature, "values": values.tolist()} for feature, values in axes],
+        "probability": surface.tolist(),
+        "safe_fraction": float(ok.mean()),
+    }
+    if len(axes) == 1:
+        out["safe_ranges"] = safe_ranges(axes[0][1], ok)
+    else:
+        out["safe_ranges"] = [
+            {"value": float(value), "ranges": safe_ranges(axes[1][1], ok[i])} for i, value in enumerate(axes[0][1])
+        ]
+        index = np.nonzero(ok)
+        out["safe_box"] = (
+            {feature: [float(values[index[k]].min()), float(values[index[k]].max())]
+             for k, (feature, values) in enumerate(axes)}
+            if ok.any()
+            else None
+        )
+    return out
+
+
+def _explain_cached(model_path: str, model_bundle: dict, plan, explainer, matrix: np.ndarray, probs: np.ndarray):
+    """-> (base_value (n,), 피처별 기여도 (n, len(x_columns)), 캐시 hit 행 수). 기여도 캐시에 없는 행만 계산한다."""
+    if not len(matrix):
+        return np.empty(0), np.empty((0, plan.n_features)), 0
+    if _explain_cache is None:
+        base_value, contrib = explainer.explain(plan.transform(plan.impute(matrix)))
+        return base_value, contrib, 0
+    version = model_bundle.get("_mtime")
+    keys, hit, _, rows = _explain_cache.lookup(model_path, version, matrix, width=plan.n_features + 1)
+    miss = np.flatnonzero(~hit)
+    if len(miss):
+        started = time.perf_counter()
+        base_value, contrib = explainer.explain(plan.transform(plan.impute(matrix[miss])))
+        rows[miss] = np.column_stack([base_value, contrib])
+        _explain_cache.store(
+            model_path, version, [keys[i] for i in miss], probs[miss], rows[miss], time.perf_counter() - started
+        )
+    return rows[:, 0], rows[:, 1:], int(hit.sum())
+
+
+@app.post("/explain")
+def explain(payload: ExplainRequest):
+    """로트별 불량 확률을 입력별 기여도(스태킹 모델 로그오즈 기준)로 나눈다.
+
+    contributions 는 기본 피처 6개, other 는 타깃 입력(metal_impurity, d50)과 anomaly_depth 의 기여도이고
+    base_value + 전부의 합 = logit(probability). 양수는 불량 쪽으로 민 값이다.
+    defective_only 면 예측이 불량(1)인 행만 설명한다 (하루치 로트를 그대로 보내도 된다).
+    """
+    try:
+        model_path = _resolve_model_path(payload.model_id)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    model_bundle = load_model(model_path)
+    if model_bundle is None:
+        return {"error": "model_not_loaded"}
+    error = _bundle_error(model_bundle)
+    if error is not None:
+        return error
     if not payload.items:
+        return {"error": "no_input_data"}
+
+    plan = get_feature_plan(model_bundle)
+    missing_base = plan.missing_inputs(payload.items)
+    if missing_base:
+        return {"error": "missing_features", "missing": missing_base}
+    try:
+        explainer = get_explainer(model_bundle, plan)
+    except ExplainError as exc:
+        return {"error": exc.args[0], **exc.args[1]}
+
+    try:
+        matrix = plan.input_matrix(payload.items)
+        _, probs, preds = _score_cached(model_path, model_bundle, plan, matrix)
+        rows = np.flatnonzero(preds == 1) if payload.defective_only else np.arange(len(payload.items))
+        base_value, contrib, cached = _explain_cached(
+            model_path, model_bundle, plan, explainer, matrix[rows], probs[rows]
+        )
+    except Exception as exc:
+        return {"error": "explain_failed", "message": str(exc)}
+
+    groups = explainer.group(contrib)
+    n_base = len(plan.base_features)
+    x_columns = list(model_bundle["x_columns"])
+    results = []
+    for k, idx in enumerate(rows.tolist()):
+        values = groups[k].tolist()
+        order = np.argsort(-groups[k])[: max(payload.top, 0)]
+        result = {
+            "index": idx,
+            "lot_id": payload.items[idx].get("lot_id"),
+            "prediction": int(preds[idx]),
+            "probability": float(probs[idx]),
+            "base_value": float(base_value[k]),
+            "contributions": dict(zip(explainer.groups[:n_base], values[:n_base])),
+            "other": dict(zip(explainer.groups[n_base:], values[n_base:])),
+            "top": [{"feature": explainer.groups[j], "contribution": values[j]} for j in order.tolist()],
+        }
+        if payload.include_columns:
+            result["columns"] = dict(zip(x_columns, contrib[k].tolist()))
+        results.append(result)
+    return {
+        "threshold": float(model_bundle.get("threshold", 0.5)),
+        "explained": len(results),
+        "cached": cached,
+        "items": results,
+    }
+
+
+@app.post("/preprocess")
+def preprocess(payload: PreprocessRequest):
+    items = payload.items
+    if not items:
         return {"error": "no_items"}
 
-    model_bundle = None
     try:
         model_path = _resolve_model_path(payload.model_id)
     except ValueError as exc:
         return {"error": str(exc)}
     model_bundle = load_model(model_path)
 
-    present_targets = [c for c in targets_reg if any(c in row for row in payload.items)]
-    mice_cols = base_features + present_targets
+    present_targets = [c for c in TARGETS_REG if any(c in row for row in items)]
+    mice_cols = BASE_FEATURES + present_targets
 
-    df = pd.DataFrame(payload.items)
-    if target_cls not in df.columns:
-        df[target_cls] = 0
+    labels = column_values(items, TARGET_CLS)
+    normal = normal_mask(labels) if any(TARGET_CLS in row for row in items) else np.ones(len(items), dtype=bool)
+    imputed, anomaly_depth = _preprocess_matrix(items_matrix(items, mice_cols), normal, mice_cols, model_bundle)
 
-    for col in base_features:
-        if col not in df.columns:
-            df[col] = np.nan
+    cleaned = [dict(zip(mice_cols, values)) for values in imputed.tolist()]
+    for row, cleaned_row, depth in zip(items, cleaned, anomaly_depth.tolist()):
+        for key in (TARGET_CLS, "lot_id", "timestamp"):
+            if key in row:
+                cleaned_row[key] = row[key]
+        cleaned_row["anomaly_depth"] = depth
 
-    for col in base_features:
-        if df[col].isna().all():
-            continue
-        Q1, Q3 = df[col].quantile(0.25), df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        ext_mask = (df[target_cls] == 0) & (
-            (df[col] < Q1 - 3 * IQR) | (df[col] > Q3 + 3 * IQR)
-        )
-        df.loc[ext_mask, col] = np.nan
-        df[col] = df[col].ffill()
-        mild_mask = (df[target_cls] == 0) & (
-            (df[col] < Q1 - 1.98 * IQR) | (df[col] > Q3 + 1.98 * IQR)
-        )
-        df.loc[mild_mask, col] = np.nan
-
-    data_matrix = []
-    for _, row in df.iterrows():
-        values = []
-        for col in mice_cols:
-            value = row.get(col, None)
-            values.append(float(value) if value is not None else np.nan)
-        data_matrix.append(values)
-
-    matrix = np.array(data_matrix, dtype=float)
-    imputer = None
-    if model_bundle:
-        saved_imputer = model_bundle.get("imputer")
-        if saved_imputer is not None:
-            imputer = saved_imputer
+    return {"items": cleaned}
+
+
+def _preprocess_matrix(matrix: np.ndarray, normal: np.ndarray, mice_cols: List[str], model_bundle: Optional[dict]):
+    """(n, mice_cols) 입력 -> IQR 정제 -> 결측 보완 행렬, anomaly_depth."""
+    n_base = len(BASE_FEATURES)
+    matrix[:, :n_base] = iqr_clean(matrix[:, :n_base], normal)
+
+    imputer = model_bundle.get("imputer") if model_bundle else None
+    iso = model_bundle.get("iso") if model_bundle else None
     if imputer is None:
-        if len(payload.items) < 2:
-            imputer = SimpleImputer(strategy="median")
-        else:
-            imputer = IterativeImputer(random_state=42)
+        return _fit_preprocess(matrix, mice_cols, iso)
+    plan = get_feature_plan(model_bundle) if iso is not None else None
+    if plan is not None and plan.input_columns == mice_cols:
+        imputed = plan.impute(matrix)
+    else:
+        try:
+            imputed = imputer.transform(matrix)
+        except Exception:
+            imputed = np.nan_to_num(matrix, nan=0.0)
+    base_matrix = imputed[:, :n_base]
+    if plan is not None:
+        anomaly_depth = plan.anomaly_depth(base_matrix)
+    elif iso is not None:
+        anomaly_depth = iso.decision_function(base_matrix).astype(float)
+    else:
+        anomaly_depth = _fit_anomaly_depth(base_matrix)
+    return imputed, anomaly_depth
+
 
+def _fit_anomaly_depth(base_matrix: np.ndarray) -> np.ndarray:
+    iso = IsolationForest(contamination=0.05, random_state=42)
+    return iso.fit(base_matrix).decision_function(base_matrix).astype(float)
+
+
+def _fit_preprocess(matrix: np.ndarray, mice_cols: List[str], iso=None):
+    """번들 imputer 가 없을 때: 요청 데이터로 결측 보완/IsolationForest 를 학습 (같은 입력이면 캐시 재사용)."""
+    key = FitCache.key(matrix, mice_cols + ["iso" if iso is not None else ""])
+    cached = _fit_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        if hasattr(imputer, "transform") and model_bundle and imputer is model_bundle.get("imputer"):
-            imputed = imputer.transform(matrix)
+        if len(matrix) < 2:
+            imputer = SimpleImputer(strategy="median", keep_empty_features=True)
         else:
-            imputed = imputer.fit_transform(matrix)
+            imputer = IterativeImputer(random_state=42, keep_empty_features=True)
+        imputed = imputer.fit_transform(matrix)
     except Exception:
         imputed = np.nan_to_num(matrix, nan=0.0)
-
-    cleaned = []
-    for row_idx, row in enumerate(payload.items):
-        cleaned_row = {col: float(imputed[row_idx, col_idx]) for col_idx, col in enumerate(mice_cols)}
-        if target_cls in row:
-            cleaned_row[target_cls] = row[target_cls]
-        if "lot_id" in row:
-            cleaned_row["lot_id"] = row["lot_id"]
-        if "timestamp" in row:
-            cleaned_row["timestamp"] = row["timestamp"]
-        cleaned.append(cleaned_row)
-
-    base_matrix = np.array(
-        [[r.get(col, np.nan) for col in base_features] for r in cleaned], dtype=float
-    )
-    if model_bundle and model_bundle.get("iso") is not None:
-        iso = model_bundle["iso"]
+    base_matrix = imputed[:, : len(BASE_FEATURES)]
+    if iso is not None:
         anomaly_depth = iso.decision_function(base_matrix).astype(float)
     else:
-        iso = IsolationForest(contamination=0.05, random_state=42)
-        anomaly_depth = iso.fit(base_matrix).decision_function(base_matrix).astype(float)
+        anomaly_depth = _fit_anomaly_depth(base_matrix)
+    _fit_cache.put(key, (imputed, anomaly_depth))
+    return imputed, anomaly_depth
 
-    for idx, row in enumerate(cleaned):
-        row["anomaly_depth"] = float(anomaly_depth[idx])
 
-    return {"items": cleaned}
+# -- 열 단위 바이너리 입력 (columnar.py) ----------------------------------------
+
+
+@app.post("/predict/columnar")
+async def predict_columnar(
+    request: Request, model_id: Optional[str] = None, columns: Optional[str] = None, dtype: str = "float32"
+):
+    body = await request.body()
+    return await run_in_threadpool(
+        _predict_columnar, body, request.headers, model_id, parse_columns_param(columns), dtype
+    )
+
+
+@app.post("/preprocess/columnar")
+async def preprocess_columnar(
+    request: Request, model_id: Optional[str] = None, columns: Optional[str] = None, dtype: str = "float32"
+):
+    body = await request.body()
+    return await run_in_threadpool(
+        _preprocess_columnar, body, request.headers, model_id, parse_columns_param(columns), dtype
+    )
+
+
+def _predict_columnar(body: bytes, headers, model_id, columns, dtype):
+    try:
+        model_path = _resolve_model_path(model_id)
+        data = read_columns(body, headers.get("content-type"), columns, dtype)
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    model_bundle = load_model(model_path)
+    if model_bundle is None:
+        return {"error": "model_not_loaded"}
+    error = _bundle_error(model_bundle)
+    if error is not None:
+        return error
+
+    plan = get_feature_plan(model_bundle)
+    missing_base = [c for c in plan.base_features if c not in data]
+    if missing_base:
+        return {"error": "missing_features", "missing": missing_base}
+    n = len(next(iter(data.values())))
+    try:
+        matrix = columns_matrix(data, plan.input_columns, n)
+        imputed, probs, preds = _score_cached(model_path, model_bundle, plan, matrix)
+    except ColumnarError as exc:
+        return {"error": str(exc)}
+    except Exception as exc:
+        return {"error": "predict_failed", "message": str(exc)}
+
+    out = {"prediction": preds, "probability": probs}
+    n_base = len(plan.base_features)
+    for j, col in enumerate(plan.targets_reg, start=n_base):
+        # 입력값이 있으면 그대로, 없으면 결측 보완 값 (/predict 와 동일)
+        out[col] = np.where(np.isnan(matrix[:, j]), imputed[:, j], matrix[:, j])
+    for col in ("lot_id", "timestamp", "operator_id"):
+        if col in data:
+            out[col] = data[col]
+    content, media_type = encode_columns(out, headers.get("accept"))
+    return Response(content=content, media_type=media_type)
+
+
+def _preprocess_columnar(body: bytes, headers, model_id, columns, dtype):
+    try:
+        model_path = _resolve_model_path(model_id)
+        data = read_columns(body, headers.get("content-type"), columns, dtype)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    model_bundle = load_model(model_path)
+
+    n = len(next(iter(data.values())))
+    present_targets = [c for c in TARGETS_REG if c in data]
+    mice_cols = BASE_FEATURES + present_targets
+    try:
+        normal = float_column(data[TARGET_CLS]) == 0 if TARGET_CLS in data else np.ones(n, dtype=bool)
+        matrix = columns_matrix(data, mice_cols, n)
+    except ColumnarError as exc:
+        return {"error": str(exc)}
+    imputed, anomaly_depth = _preprocess_matrix(matrix, normal, mice_cols, model_bundle)
+
+    out = {col: imputed[:, j] for j, col in enumerate(mice_cols)}
+    for col in (TARGET_CLS, "lot_id", "timestamp"):
+        if col in data:
+            out[col] = data[col]
+    out["anomaly_depth"] = anomaly_depth
+    content, media_type = encode_columns(out, headers.get("accept"))
+    return Response(content=content, media_type=media_type)
 
 
-load_model()
+_preload_models()
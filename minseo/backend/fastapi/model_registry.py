@@ -0,0 +1,227 @@
+"""모델 번들 레지스트리 (경로별로 여러 번들을 LRU 로 들고 있고, 파일이 바뀌면 백그라운드에서 다시 읽는다).
+
+- 조회(get)는 캐시에 있으면 파일 stat 도, 전역 잠금 대기도 없이 바로 돌려준다.
+- 처음 보는 경로는 경로별 잠금으로 한 번만 읽는다 (동시에 같은 모델을 요청해도 joblib.load 1회).
+- 리프레시 스레드가 MODEL_REFRESH_SECONDS 마다 캐시된 파일의 mtime 을 보고, 바뀐 번들을 새로 읽은 뒤 교체한다.
+  읽는 동안 요청은 이전 번들로 계속 처리되고, 읽기에 실패하면 이전 번들을 유지한다.
+- resolver 를 주면 요청 경로 -> 실제로 읽을 경로(.joblib / .bundle) 선택도 처음 한 번만 하고 기억해 둔다.
+  선택이 바뀌는지는 리프레시 스레드가 다시 확인하고, 새 쪽을 다 읽은 뒤에 바꾼다.
+- 개수(max_models) 또는 메모리 추정치 합(max_bytes) 을 넘으면 가장 오래 안 쓴 번들부터 내린다.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import joblib
+
+
+def _artifact_bytes(path: str) -> int:
+    """파일 크기, 디렉터리 번들이면 안의 파일 크기 합."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _rss_bytes() -> Optional[int]:
+    """현재 프로세스 RSS (리눅스 /proc 기준, 없으면 None)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Entry:
+    __slots__ = ("bundle", "mtime", "file_bytes", "memory_bytes", "load_ms", "loaded_at", "loads", "hits")
+
+    def __init__(self):
+        self.bundle = None
+        self.mtime = None
+        self.file_bytes = 0
+        self.memory_bytes = None
+        self.load_ms = 0.0
+        self.loaded_at = 0.0
+        self.loads = 0
+        self.hits = 0
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        max_models: int,
+        max_bytes: int,
+        refresh_seconds: float,
+        loader: Callable = joblib.load,
+        resolver: Optional[Callable] = None,
+    ):
+        self.max_models = max(1, max_models)
+        self.max_bytes = max(0, max_bytes)
+        self.refresh_seconds = refresh_seconds
+        self._loader = loader
+        self._resolver = resolver
+        self._resolved: dict = {}  # 요청 경로 -> resolver 가 고른 경로 (읽기에 성공한 것만)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()  # _entries 구조 변경용 (짧게만 잡는다)
+        self._path_locks: dict = {}
+        self._thread = None
+        self.evictions = 0
+        self.refreshes = 0
+        self.last_error = None
+
+    # -- 조회 ---------------------------------------------------------------
+
+    def get(self, path: str, force: bool = False) -> Optional[dict]:
+        requested = path
+        path = self._resolved.get(requested, requested) if self._resolver is not None else requested
+        entry = self._entries.get(path)
+        if entry is not None and not force:
+            entry.hits += 1
+            with self._lock:
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+            return entry.bundle
+        self._ensure_refresher()
+        if self._resolver is None:
+            return self._load(path, force=force)
+        path = self._resolver(requested)
+        bundle = self._load(path, force=force)
+        if bundle is not None:
+            self._resolved[requested] = path
+        return bundle
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def _load(self, path: str, force: bool = False, only_cached: bool = False) -> Optional[dict]:
+        """path 를 읽어 캐시에 넣는다. 같은 경로의 동시 로드는 하나로 합친다."""
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is None and only_cached:
+                # 갱신 도중 LRU 에서 내려간 번들은 다시 올리지 않는다
+                return None
+            try:
+                current = os.path.getmtime(path)
+            except OSError:
+                return entry.bundle if entry else None
+            if entry is not None and not force and entry.mtime == current:
+                return entry.bundle
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            try:
+                bundle = self._loader(path)
+            except Exception as exc:
+                self.last_error = f"{path}: {exc}"
+                print(f"Failed to load model from {path}: {exc}")
+                return entry.bundle if entry else None
+            load_ms = (time.perf_counter() - started) * 1000
+            rss_after = _rss_bytes()
+
+            new = _Entry()
+            new.bundle = bundle
+            new.mtime = current
+            new.file_bytes = _artifact_bytes(path)
+            # 다른 스레드도 메모리를 쓰므로 RSS 증가분은 근사치 (못 재면 파일 크기로 대신)
+            if rss_before is not None and rss_after is not None and rss_after > rss_before:
+                new.memory_bytes = rss_after - rss_before
+            else:
+                new.memory_bytes = new.file_bytes
+            new.load_ms = load_ms
+            new.loaded_at = time.time()
+            new.loads = (entry.loads if entry else 0) + 1
+            new.hits = entry.hits if entry else 0
+            with self._lock:
+                self._entries[path] = new  # 기존 키면 LRU 위치 유지 (백그라운드 갱신은 사용으로 치지 않음)
+                if not only_cached:
+                    self._entries.move_to_end(path)
+                self._evict()
+            return bundle
+
+    def _evict(self) -> None:
+        """_lock 을 잡은 상태에서 호출. 방금 넣은(가장 최근) 번들은 남긴다."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or (self.max_bytes and sum(e.memory_bytes or 0 for e in self._entries.values()) > self.max_bytes)
+        ):
+            path, _ = self._entries.popitem(last=False)
+            self._path_locks.pop(path, None)
+            self.evictions += 1
+
+    def preload(self, paths: list) -> None:
+        for path in paths:
+            if os.path.exists(path):
+                self.get(path)
+            else:
+                print(f"Model preload skipped (not found): {path}")
+
+    # -- 백그라운드 갱신 -------------------------------------------------------
+
+    def _ensure_refresher(self) -> None:
+        if self.refresh_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refresh_loop, name="model-refresh", daemon=True)
+                self._thread.start()
+
+    def refresh_once(self) -> int:
+        """캐시된 번들 중 파일이 바뀐 것을 다시 읽는다. 다시 읽은 개수를 반환."""
+        reloaded = 0
+        for requested, current in list(self._resolved.items()):
+            if current not in self._entries:
+                continue
+            path = self._resolver(requested)
+            # 경로 선택이 바뀌면 (예: .bundle 없이 .joblib 만 다시 저장) 새 쪽을 읽은 뒤에 바꾼다
+            if path != current and self._load(path) is not None:
+                self._resolved[requested] = path
+                reloaded += 1
+        for path, entry in list(self._entries.items()):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime != entry.mtime:
+                self._load(path, only_cached=True)
+                if self._entries.get(path) is not entry:
+                    reloaded += 1
+        self.refreshes += reloaded
+        return reloaded
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh_once()
+            except Exception as exc:
+                self.last_error = str(exc)
+                print(f"model refresh failed: {exc}")
+
+    # -- 지표 ---------------------------------------------------------------
+
+    def stats(self) -> dict:
+        entries = list(self._entries.items())
+        return {
+            "maxModels": self.max_models,
+            "maxBytes": self.max_bytes,
+            "refreshSeconds": self.refresh_seconds,
+            "cached": len(entries),
+            "memoryBytes": sum(e.memory_bytes or 0 for _, e in entries),
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "lastError": self.last_error,
+            "models": [
+                {
+                    "path": path,
+                    "mtime": e.mtime,
+                    "fileBytes": e.file_bytes,
+                    "memoryBytes": e.memory_bytes,
+                    "loadMs": round(e.load_ms, 3),
+                    "loadedAt": e.loaded_at,
+                    "loads": e.loads,
+                    "hits": e.hits,
+                }
+                for path, e in reversed(entries)
+            ],
+        }
@@ -0,0 +1,242 @@
+"""메모리에 다 올리지 않는 학습 데이터 준비 (train_model.py --out-of-core).
+
+CSV 를 dtype 을 고정한 청크(측정값 float32)로 두 번 읽고, 결과는 디스크의 .npy 에 이어 쓴다.
+
+    scan      행 수/라벨 수 + 열별 저수지 표본(reservoir sample)으로 IQR 용 Q1/Q3 근사
+    clean     청크마다 IQR 정제 (ffill 은 청크 경계를 넘어 이어짐) -> inputs.npy (float32, base + targets)
+    features  inputs.npy 의 표본 행으로 FeatureTransformer 를 맞춘 뒤 (스케일러 중앙값/IQR 도 표본 기준)
+              inputs.npy 를 청크로 변환 -> 분할(train/blend/test)별 X_<split>.npy (float32) + y_<split>.npy
+
+학습은 np.load(mmap_mode="r") 로 연 X_train.npy 를 부스팅 모델에 그대로 넘긴다 (XGBoost/LightGBM 은 읽으면서
+히스토그램 bin 으로 압축해 들고 있는다). 값이 표본 크기보다 적으면 분위수는 정확한 값과 같다.
+CSV 는 시간순으로 저장돼 있다고 본다 (정렬하지 않고, 시간이 거꾸로 가는 행 수만 알린다).
+"""
+import json
+import os
+from contextlib import nullcontext
+from typing import Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from preprocessing import BASE_FEATURES, TARGET_CLS, TARGETS_REG, FeatureTransformer, iqr_clean_chunk
+
+SPLITS = ("train", "blend", "test")
+MANIFEST = "dataset.json"
+
+
+class Reservoir:
+    """열별 균등 표본 (Algorithm R, 결측은 세지 않음). 표본 크기는 열마다 size 로 고정."""
+
+    def __init__(self, n_cols: int, size: int, seed: int = 42):
+        self.size = size
+        self.values = np.full((size, n_cols), np.nan)
+        self.seen = np.zeros(n_cols, dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, X: np.ndarray) -> None:
+        for j in range(X.shape[1]):
+            col = X[:, j]
+            col = col[~np.isnan(col)]
+            seen = int(self.seen[j])
+            fill = min(len(col), max(self.size - seen, 0))
+            self.values[seen:seen + fill, j] = col[:fill]
+            rest = col[fill:]
+            if len(rest):
+                # i 번째 값(0부터)은 [0, i] 에서 뽑은 칸이 표본 안이면 그 칸을 덮어쓴다
+                index = seen + fill + np.arange(len(rest))
+                slots = (self.rng.random(len(rest)) * (index + 1)).astype(np.int64)
+                keep = slots < self.size
+                self.values[slots[keep], j] = rest[keep]
+            self.seen[j] += len(col)
+
+    def bounds(self) -> np.ndarray:
+        """열마다 (Q1, Q3) 근사. 값이 없는 열은 NaN."""
+        out = np.full((self.values.shape[1], 2), np.nan)
+        for j in range(self.values.shape[1]):
+            n = min(int(self.seen[j]), self.size)
+            if n:
+                out[j] = np.quantile(self.values[:n, j], [0.25, 0.75])
+        return out
+
+
+def _read_chunks(csv_path: str, columns: list, chunk_size: int):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    usecols = columns + (["timestamp"] if "timestamp" in header else [])
+    dtype = {c: "float32" for c in columns}
+    yield from pd.read_csv(csv_path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+
+
+def _timestamps(chunk: pd.DataFrame) -> Optional[np.ndarray]:
+    if "timestamp" not in chunk.columns:
+        return None
+    ts = pd.to_datetime(chunk["timestamp"], errors="coerce").to_numpy("datetime64[ns]").astype(np.int64)
+    return ts[ts != np.iinfo(np.int64).min]  # NaT 제외
+
+
+class NpyWriter:
+    """행을 차례로 이어 쓰는 .npy (행 수는 미리 알아야 한다). memmap 과 달리 쓴 페이지가 프로세스 RSS 에 남지 않는다."""
+
+    def __init__(self, path: str, dtype, shape: tuple):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self.rows = 0
+        self._file = open(path, "wb")
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": shape}
+        np.lib.format.write_array_header_1_0(self._file, header)
+
+    def write(self, rows: np.ndarray) -> None:
+        self._file.write(np.ascontiguousarray(rows, dtype=self.dtype).tobytes())
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._file.close()
+        if self.rows != self.shape[0]:
+            raise RuntimeError(f"{self.path}: wrote {self.rows} rows, expected {self.shape[0]}")
+
+
+class OutOfCoreDataset:
+    """build_dataset 결과 디렉터리 (분할별 X/y .npy + 맞춘 FeatureTransformer)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.features = joblib.load(os.path.join(path, "features.joblib"))
+
+    def load(self, split: str):
+        """(X, y) 메모리 매핑 배열."""
+        return (
+            np.load(os.path.join(self.path, f"X_{split}.npy"), mmap_mode="r"),
+            np.load(os.path.join(self.path, f"y_{split}.npy"), mmap_mode="r"),
+        )
+
+
+def build_dataset(
+    csv_path: str,
+    out_dir: str,
+    chunk_size: int = 100_000,
+    sample_rows: int = 200_000,
+    test_size: float = 0.2,
+    blend_rows: int = 200_000,
+    log=None,
+    stage=None,
+) -> OutOfCoreDataset:
+    """CSV -> out_dir 의 디스크 데이터셋. out_dir 에 같은 설정으로 만든 결과가 있으면 그대로 연다.
+
+    blend 는 스태킹 최종 모델(LogisticRegression)용 분할로, 전체의 10% 와 blend_rows 중 작은 쪽이다.
+    """
+    log = log or (lambda message: None)
+    stage = stage or (lambda name: nullcontext())
+    if os.path.exists(os.path.join(out_dir, MANIFEST)):
+        log(f"🗂️ 디스크 데이터셋 재사용 -> {out_dir}")
+        return OutOfCoreDataset(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    base, targets, target_cls = list(BASE_FEATURES), list(TARGETS_REG), TARGET_CLS
+    inputs = base + targets
+    columns = inputs + [target_cls]
+
+    with stage("scan"):
+        log(f"📏 1차 스캔 (청크 {chunk_size}행, float32)...")
+        reservoir = Reservoir(len(base), sample_rows)
+        n = positives = unlabeled = backwards = 0
+        last_ts = np.iinfo(np.int64).min
+        for chunk in _read_chunks(csv_path, columns, chunk_size):
+            labels = chunk[target_cls].to_numpy()
+            labeled = ~np.isnan(labels)
+            unlabeled += int((~labeled).sum())
+            n += int(labeled.sum())
+            positives += int((labels[labeled] == 1).sum())
+            reservoir.add(chunk.loc[labeled, base].to_numpy(dtype=float))
+            ts = _timestamps(chunk[labeled])
+            if ts is not None and len(ts):
+                running = np.maximum.accumulate(np.concatenate(([last_ts], ts)))
+                backwards += int((ts < running[:-1]).sum())
+                last_ts = int(running[-1])
+        bounds = reservoir.bounds()
+        if not n:
+            raise ValueError("No labeled rows in CSV")
+        log(f"  {n}행 (불량 {positives}), 라벨 없는 행 {unlabeled}개 제외")
+        if backwards:
+            log(f"⚠️ timestamp 가 앞 행보다 이른 행 {backwards}개 (out-of-core 모드는 파일 순서대로 처리)")
+
+    with stage("clean"):
+        log("🧹 IQR 1.98(MICE) / 3.0(ffill) 청크 정제 중...")
+        # 분할: 행마다 test(2) / blend(1) / train(0)
+        blend_frac = min(0.1, blend_rows / n)
+        split_rng = np.random.default_rng(42)
+        counts = np.zeros(len(SPLITS), dtype=np.int64)
+        writers = [
+            NpyWriter(os.path.join(out_dir, "inputs.npy"), np.float32, (n, len(inputs))),
+            NpyWriter(os.path.join(out_dir, "labels.npy"), np.int8, (n,)),
+            NpyWriter(os.path.join(out_dir, "split.npy"), np.int8, (n,)),
+        ]
+        carry = np.full(len(base), np.nan)
+        for chunk in _read_chunks(csv_path, columns, chunk_size):
+            chunk = chunk[chunk[target_cls].notna()]
+            labels = chunk[target_cls].to_numpy()
+            cleaned, carry = iqr_clean_chunk(chunk[base].to_numpy(dtype=float), labels == 0, bounds, carry)
+            u = split_rng.random(len(chunk))
+            codes = np.where(u < test_size, 2, np.where(u < test_size + blend_frac, 1, 0))
+            counts += np.bincount(codes, minlength=len(SPLITS))
+            writers[0].write(np.hstack([cleaned, chunk[targets].to_numpy(dtype=float)]))
+            writers[1].write(labels)
+            writers[2].write(codes)
+        for writer in writers:
+            writer.close()
+        X_in = np.load(os.path.join(out_dir, "inputs.npy"), mmap_mode="r")
+        y_all = np.load(os.path.join(out_dir, "labels.npy"), mmap_mode="r")
+        split = np.load(os.path.join(out_dir, "split.npy"), mmap_mode="r")
+
+    with stage("fit_features"):
+        rng = np.random.default_rng(42)
+        sample_idx = np.sort(rng.choice(n, size=min(n, sample_rows), replace=False))
+        log(f"🎯 표본 {len(sample_idx)}행으로 MICE/다항/Isolation Forest/스케일러 학습")
+        sample = pd.DataFrame(np.asarray(X_in[sample_idx], dtype=float), columns=inputs)
+        features = FeatureTransformer(base, targets, target_cls).fit_cleaned_sample(sample, log=log)
+        features.iqr_bounds = bounds
+        del sample
+
+    with stage("write_dataset"):
+        log("💾 피처 변환 후 분할별 float32 데이터셋 기록 중...")
+        X_out, y_out = {}, {}
+        for code, name in enumerate(SPLITS):
+            X_out[name] = NpyWriter(
+                os.path.join(out_dir, f"X_{name}.npy"), np.float32, (int(counts[code]), len(features.x_columns))
+            )
+            y_out[name] = NpyWriter(os.path.join(out_dir, f"y_{name}.npy"), np.int8, (int(counts[code]),))
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            X = features.transform(np.asarray(X_in[start:stop], dtype=float))
+            codes = np.asarray(split[start:stop])
+            labels = np.asarray(y_all[start:stop])
+            for code, name in enumerate(SPLITS):
+                mask = codes == code
+                X_out[name].write(X[mask])
+                y_out[name].write(labels[mask])
+        for name in SPLITS:
+            X_out[name].close()
+            y_out[name].close()
+        del X_in, y_all, split
+
+    joblib.dump(features, os.path.join(out_dir, "features.joblib"))
+    manifest = {
+        "rows": n,
+        "positives": positives,
+        "splits": {name: int(counts[code]) for code, name in enumerate(SPLITS)},
+        "iqr_bounds": bounds.tolist(),
+        # 마지막(가장 늦은) timestamp. --refresh 는 이 뒤의 행만 읽는다
+        "watermark": str(pd.Timestamp(last_ts)) if last_ts != np.iinfo(np.int64).min else None,
+        "chunk_size": chunk_size,
+        "sample_rows": sample_rows,
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    log(f"  분할 행 수: {manifest['splits']}")
+    return OutOfCoreDataset(out_dir)
@@ -0,0 +1,118 @@
+"""/predict 결과 캐시 (같은 로트 파라미터를 반복해서 보내는 목록 화면/what-if 패널용).
+
+키는 (모델 경로, 번들 mtime, 소수 decimals 자리로 반올림한 입력 행 base + targets). 값은 불량 확률과
+결측 보완된 입력 행이다. 예측 0/1 은 번들 임계값으로 매번 다시 계산한다.
+
+- 행 단위로 찾으므로 배치 요청은 일부만 맞아도 나머지 행만 계산한다.
+- 전체 행 수 max_rows 를 넘으면 가장 오래 안 쓴 행부터 내리고, ttl_seconds 가 지난 행은 miss 로 본다.
+- 같은 모델 경로에 mtime 이 다른 번들이 오면(레지스트리가 번들을 교체) 그 모델의 이전 행을 모두 지운다.
+- 절약 시간은 miss 행을 계산하는 데 든 평균 시간 x hit 행 수로 추정한다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+import numpy as np
+
+
+class PredictCache:
+    def __init__(self, max_rows: int, ttl_seconds: float, decimals: int):
+        self.max_rows = max(1, max_rows)
+        self.ttl = ttl_seconds
+        self.decimals = decimals
+        self._entries: OrderedDict = OrderedDict()  # (model, row key) -> (만료 시각, 확률, 결측 보완 행)
+        self._versions: dict = {}  # model -> 지금 캐시에 있는 번들 mtime
+        self._lock = threading.Lock()
+        self.invalidations = 0
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._miss_seconds = 0.0
+        self._lookup_seconds = 0.0
+
+    def row_keys(self, matrix: np.ndarray) -> List[bytes]:
+        # + 0.0 은 -0.0 을 0.0 으로 맞춘다
+        rounded = np.ascontiguousarray(np.round(matrix, self.decimals) + 0.0)
+        return [row.tobytes() for row in rounded]
+
+    def _invalidate(self, model: Hashable, version) -> None:
+        """_lock 을 잡은 상태에서 호출."""
+        if model in self._versions and self._versions[model] != version:
+            for key in [k for k in self._entries if k[0] == model]:
+                del self._entries[key]
+            self.invalidations += 1
+        self._versions[model] = version
+
+    def lookup(self, model: Hashable, version, matrix: np.ndarray, width: Optional[int] = None):
+        """-> (행 키, hit 마스크, 확률(miss 는 NaN), 저장된 행 행렬(miss 는 NaN)).
+
+        저장된 행은 기본이 결측 보완 입력 행이고, width 를 주면 그 폭의 다른 값 행이다 (/explain 기여도).
+        """
+        started = time.perf_counter()
+        keys = self.row_keys(matrix)
+        hit = np.zeros(len(keys), dtype=bool)
+        probs = np.full(len(keys), np.nan)
+        imputed = np.full((len(keys), matrix.shape[1] if width is None else width), np.nan)
+        now = time.monotonic()
+        with self._lock:
+            self._invalidate(model, version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get((model, key))
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._entries[(model, key)]
+                    self._expired += 1
+                    continue
+                self._entries.move_to_end((model, key))
+                hit[i] = True
+                probs[i] = entry[1]
+                imputed[i] = entry[2]
+            self._hits += int(hit.sum())
+            self._misses += len(keys) - int(hit.sum())
+            self._lookup_seconds += time.perf_counter() - started
+        return keys, hit, probs, imputed
+
+    def store(self, model: Hashable, version, keys: List[bytes], probs: np.ndarray, imputed: np.ndarray,
+              seconds: float) -> None:
+        """miss 행 결과 저장. seconds 는 이 행들을 계산하는 데 걸린 시간 (절약 시간 추정용)."""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._miss_seconds += seconds
+            if self._versions.get(model) != version:
+                # 계산하는 동안 번들이 바뀌었다
+                return
+            for key, prob, row in zip(keys, probs.tolist(), imputed):
+                self._entries[(model, key)] = (expires, prob, row.copy())
+                self._entries.move_to_end((model, key))
+            while len(self._entries) > self.max_rows:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self, reset: bool = False) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            row_ms = self._miss_seconds / self._misses * 1000 if self._misses else 0.0
+            out = {
+                "maxRows": self.max_rows,
+                "ttlSeconds": self.ttl,
+                "decimals": self.decimals,
+                "rows": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRate": self._hits / lookups if lookups else 0.0,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "invalidations": self.invalidations,
+                "avgMissRowMs": row_ms,
+                "lookupMs": self._lookup_seconds * 1000,
+                "savedMsEstimate": max(0.0, self._hits * row_ms - self._lookup_seconds * 1000),
+            }
+            if reset:
+                self._reset_stats()
+        return out
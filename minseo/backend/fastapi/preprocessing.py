@@ -0,0 +1,319 @@
+"""공정 데이터 전처리 / 피처 변환 (학습 train_model 과 서빙 main 이 같이 쓴다).
+
+IQR 규칙: 양품(quality_defect == 0) 행에서 Q1/Q3 기준 3.0*IQR 밖은 결측으로 만든 뒤 앞 값으로 채우고(ffill),
+그 다음 1.98*IQR 밖은 결측으로 남겨 MICE(IterativeImputer)가 채우게 한다. Q1/Q3 는 결측을 뺀 선형 보간 분위수
+(pandas Series.quantile 와 같은 값)이다.
+
+FeatureTransformer 는 학습 때 맞춘 imputer/다항 피처/IsolationForest/스케일러를 한 객체로 묶어 번들에 저장한다.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer
+from sklearn.preprocessing import PolynomialFeatures, RobustScaler
+
+BASE_FEATURES = [
+    "lithium_input",
+    "additive_ratio",
+    "process_time",
+    "humidity",
+    "tank_pressure",
+    "sintering_temp",
+]
+TARGETS_REG = ["metal_impurity", "d50"]
+TARGET_CLS = "quality_defect"
+IQR_EXTREME = 3.0
+IQR_MILD = 1.98
+
+
+def column_values(items: List[Dict[str, Any]], col: str) -> list:
+    return [item.get(col) for item in items]
+
+
+def to_float_column(values: list) -> np.ndarray:
+    """None -> NaN 인 float 배열."""
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def items_matrix(items: List[Dict[str, Any]], columns: List[str]) -> np.ndarray:
+    """dict 목록 -> (n, len(columns)) float 행렬 (없는 키/None 은 NaN)."""
+    out = np.empty((len(items), len(columns)), dtype=float)
+    for j, col in enumerate(columns):
+        out[:, j] = to_float_column(column_values(items, col))
+    return out
+
+
+def normal_mask(labels: list) -> np.ndarray:
+    """양품 행 (라벨 == 0). 라벨이 없는 행(None/NaN)은 양품으로 보지 않는다."""
+    return np.array([v == 0 for v in labels], dtype=bool)
+
+
+def ffill(col: np.ndarray) -> np.ndarray:
+    """앞 값으로 결측 채우기 (첫 값 이전의 결측은 그대로)."""
+    idx = np.where(np.isnan(col), 0, np.arange(len(col)))
+    np.maximum.accumulate(idx, out=idx)
+    return col[idx]
+
+
+def iqr_bounds(X: np.ndarray) -> np.ndarray:
+    """열마다 (Q1, Q3). 전부 결측인 열은 NaN."""
+    bounds = np.full((X.shape[1], 2), np.nan)
+    for j in range(X.shape[1]):
+        col = X[:, j]
+        valid = ~np.isnan(col)
+        if valid.any():
+            bounds[j] = np.quantile(col[valid], [0.25, 0.75])
+    return bounds
+
+
+def iqr_clean_chunk(X: np.ndarray, normal: np.ndarray, bounds: np.ndarray, carry: np.ndarray):
+    """미리 구한 (Q1, Q3) 로 IQR 규칙 적용 -> (새 행렬, 다음 청크로 넘길 열별 마지막 값).
+
+    ffill 은 이전 청크의 마지막 값(carry, 없으면 NaN)부터 이어서 채운다.
+    """
+    out = np.array(X, dtype=float, copy=True)
+    carry = np.array(carry, dtype=float, copy=True)
+    for j in range(out.shape[1]):
+        q1, q3 = bounds[j]
+        if np.isnan(q1):
+            continue
+        iqr = q3 - q1
+        col = out[:, j]
+        col[normal & ((col < q1 - IQR_EXTREME * iqr) | (col > q3 + IQR_EXTREME * iqr))] = np.nan
+        col = ffill(np.concatenate(([carry[j]], col)))[1:]
+        if len(col):
+            carry[j] = col[-1]
+        col[normal & ((col < q1 - IQR_MILD * iqr) | (col > q3 + IQR_MILD * iqr))] = np.nan
+        out[:, j] = col
+    return out, carry
+
+
+def iqr_clean(X: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    """열마다 IQR 규칙 적용한 새 행렬 (전부 결측인 열은 그대로)."""
+    X = np.asarray(X, dtype=float)
+    out, _ = iqr_clean_chunk(X, normal, iqr_bounds(X), np.full(X.shape[1], np.nan))
+    return out
+
+
+class FitCache:
+    """같은 입력 행렬로 새로 학습한 전처리 결과(결측 보완 + anomaly_depth) 를 재사용하는 작은 LRU.
+
+    번들이 없을 때 /preprocess 는 요청 데이터로 IterativeImputer/IsolationForest 를 학습하므로,
+    같은 구간을 다시 보내는 폴링에서는 학습을 건너뛸 수 있다.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(matrix: np.ndarray, columns: List[str]) -> str:
+        digest = hashlib.blake2b(np.ascontiguousarray(matrix).tobytes(), digest_size=16)
+        digest.update(repr((matrix.shape, columns)).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: tuple) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+EXTRA_POLY_COLS = [
+    "lithium_input_sq",
+    "lithium_input_cub",
+    "lithium_with_temp",
+    "lithium_with_pressure",
+]
+
+# extra_poly_features 의 입력 순서
+EXTRA_POLY_INPUTS = ("lithium_input", "sintering_temp", "tank_pressure")
+
+
+def extra_poly_features(lithium: np.ndarray, temp: np.ndarray, pressure: np.ndarray) -> tuple:
+    """EXTRA_POLY_COLS 순서의 추가 피처 (lithium_input 가중치 강화)."""
+    return lithium ** 2, lithium ** 3, lithium * temp, lithium * pressure
+
+
+class FeatureTransformer:
+    """학습/서빙 공용 피처 변환: IQR 정제 -> MICE -> 다항/추가 피처 -> anomaly_depth -> 스케일링.
+
+    학습은 fit_transform(df) 로 전체 데이터프레임에 맞추고, 서빙은 같은 객체(번들의 "features")를
+    feature_plan.FeaturePlan 으로 컴파일해 작은 배치를 numpy 로 변환한다 (transform).
+    """
+
+    def __init__(self, base_features=None, targets_reg=None, target_cls: str = TARGET_CLS):
+        self.base_features = list(base_features or BASE_FEATURES)
+        self.targets_reg = list(TARGETS_REG if targets_reg is None else targets_reg)
+        self.target_cls = target_cls
+        self.extra_poly_cols = list(EXTRA_POLY_COLS)
+        self.imputer = None
+        self.poly = None
+        self.poly_cols: List[str] = []
+        self.iso = None
+        self.scaler = None
+        self.x_columns: List[str] = []
+        self.iqr_bounds = None  # 학습 때 IQR 규칙에 쓴 열별 (Q1, Q3)
+        self._plan = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_plan"] = None
+        return state
+
+    @classmethod
+    def from_bundle(cls, bundle: dict) -> "FeatureTransformer":
+        """features 객체가 없는 이전 번들의 개별 키로 만든다."""
+        features = cls(bundle["base_features"], bundle.get("targets_reg", []))
+        for key in ("imputer", "poly", "poly_cols", "extra_poly_cols", "iso", "scaler", "x_columns"):
+            if key in bundle:
+                setattr(features, key, bundle[key])
+        return features
+
+    def bundle_parts(self) -> dict:
+        """번들 dict 의 개별 키 (이 객체를 모르는 서버/도구도 읽을 수 있게 같이 저장한다)."""
+        return {
+            "scaler": self.scaler,
+            "imputer": self.imputer,
+            "poly": self.poly,
+            "poly_cols": list(self.poly_cols),
+            "extra_poly_cols": list(self.extra_poly_cols),
+            "iso": self.iso,
+            "base_features": list(self.base_features),
+            "targets_reg": list(self.targets_reg),
+            "x_columns": list(self.x_columns),
+        }
+
+    # -- 학습 ------------------------------------------------------------------
+
+    def fit_inputs(self, df: pd.DataFrame, log=None) -> pd.DataFrame:
+        """시간순 정렬 + IQR 정제 + MICE(imputer 학습) 까지 한 데이터프레임. df 는 수정된다."""
+        log = log or (lambda message: None)
+        base, targets, target_cls = self.base_features, self.targets_reg, self.target_cls
+        missing = [c for c in base + targets + [target_cls] if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+            df = df.sort_values("timestamp").reset_index(drop=True)
+
+        log("🧹 IQR 1.98(MICE) / 3.0(ffill) 전처리 중...")
+        X_base = df[base].to_numpy(dtype=float)
+        self.iqr_bounds = iqr_bounds(X_base)
+        df[base], _ = iqr_clean_chunk(
+            X_base, (df[target_cls] == 0).to_numpy(), self.iqr_bounds, np.full(len(base), np.nan)
+        )
+        return self._fit_imputer(df, log)
+
+    def _fit_imputer(self, df: pd.DataFrame, log) -> pd.DataFrame:
+        log("🤖 MICE 결측치 정밀 복구 중...")
+        cols = self.base_features + self.targets_reg
+        self.imputer = IterativeImputer(random_state=42)
+        df[cols] = self.imputer.fit_transform(df[cols])
+        return df
+
+    def fit_transform(self, df: pd.DataFrame, log=None):
+        """학습 데이터프레임 -> (스케일된 피처 DataFrame, 라벨 Series). df 는 수정된다."""
+        log = log or (lambda message: None)
+        df = self.fit_inputs(df, log=log)
+        return self._fit_features(df, log), df[self.target_cls].reset_index(drop=True)
+
+    def fit_cleaned_sample(self, sample: pd.DataFrame, log=None) -> "FeatureTransformer":
+        """IQR 정제까지 끝난 표본 행으로 imputer/다항 피처/iso/스케일러를 맞춘다 (전체가 메모리에 안 들어갈 때).
+
+        스케일러의 중앙값/IQR 도 표본 기준의 근사값이 된다. 전체 행 변환은 transform 으로 한다.
+        """
+        log = log or (lambda message: None)
+        sample = self._fit_imputer(sample.reset_index(drop=True), log)
+        self._fit_features(sample, log)
+        return self
+
+    def _fit_features(self, df: pd.DataFrame, log) -> pd.DataFrame:
+        base, targets = self.base_features, self.targets_reg
+
+        log("🔄 피처 확장 및 lithium_input 가중치 강화 중...")
+        self.poly = PolynomialFeatures(degree=2, include_bias=False)
+        X_poly = self.poly.fit_transform(df[base])
+        df_poly = pd.DataFrame(X_poly, columns=self.poly.get_feature_names_out(base), index=df.index)
+        extras = extra_poly_features(*(df[c].values for c in EXTRA_POLY_INPUTS))
+        for col, values in zip(self.extra_poly_cols, extras):
+            df_poly[col] = values
+        self.poly_cols = list(df_poly.columns)
+
+        log("🔍 Isolation Forest 이상치 점수(Score) 추출 중...")
+        self.iso = IsolationForest(contamination=0.05, random_state=42)
+        self.iso.fit(df[base])
+        df["anomaly_depth"] = self.iso.decision_function(df[base]).astype(float)
+
+        X = pd.concat(
+            [
+                df_poly.reset_index(drop=True),
+                df[targets].reset_index(drop=True),
+                df[["anomaly_depth"]].reset_index(drop=True),
+            ],
+            axis=1,
+        )
+        self.x_columns = list(X.columns)
+        self.scaler = RobustScaler()
+        X_scaled = pd.DataFrame(self.scaler.fit_transform(X), columns=X.columns)
+        self._plan = None
+        return X_scaled
+
+    def fit(self, df: pd.DataFrame, log=None) -> "FeatureTransformer":
+        self.fit_transform(df, log=log)
+        return self
+
+    def clean_inputs(self, df: pd.DataFrame) -> np.ndarray:
+        """새 학습 행(시간순)을 학습 때 IQR 경계로 정제한 (n, base + targets) 행렬 (transform 입력).
+
+        경계를 저장하지 않은 이전 번들이면 df 자체의 분위수를 쓴다.
+        """
+        X_base = df[self.base_features].to_numpy(dtype=float)
+        bounds = getattr(self, "iqr_bounds", None)
+        if bounds is None:
+            bounds = iqr_bounds(X_base)
+        normal = (df[self.target_cls] == 0).to_numpy()
+        cleaned, _ = iqr_clean_chunk(X_base, normal, bounds, np.full(len(self.base_features), np.nan))
+        return np.hstack([cleaned, df[self.targets_reg].to_numpy(dtype=float)])
+
+    # -- 서빙 ------------------------------------------------------------------
+
+    @property
+    def plan(self):
+        """서빙용으로 컴파일한 feature_plan.FeaturePlan (처음 쓸 때 한 번 만든다)."""
+        if self._plan is None:
+            from feature_plan import FeaturePlan  # feature_plan 이 이 모듈을 쓰므로 여기서 import
+
+            self._plan = FeaturePlan(self.bundle_parts())
+        return self._plan
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, base+targets) 원본 입력 -> 결측 보완 -> 스케일된 (n, len(x_columns)) 행렬."""
+        plan = self.plan
+        return plan.transform(plan.impute(matrix))
+
+    def transform_items(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        return self.transform(self.plan.input_matrix(items))
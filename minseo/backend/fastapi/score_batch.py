@@ -0,0 +1,333 @@
+"""이력 데이터 일괄 예측 (CSV 또는 DB preprocessing 테이블을 청크 단위로 읽어 프로세스 풀에서 점수 계산).
+
+번들 전체 파이프라인(imputer -> 다항/추가 피처 -> iso -> scaler -> 모델)을 /predict 와 같은 FeaturePlan/펼친 모델로
+계산하고, 결과 CSV 에 청크 순서대로 이어 쓴다. 청크마다 체크포인트(<output>.ckpt.json)를 남겨 --resume 으로 이어서
+돌릴 수 있다. 동시에 메모리에 있는 청크는 워커 수 * 2 개를 넘지 않는다.
+
+    python score_batch.py --csv data/data_sample.csv --output out/predictions.csv
+    python score_batch.py --table preprocessing --order-by timestamp --output out/predictions.csv --resume
+"""
+import argparse
+import datetime
+import decimal
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bundle_store import MANIFEST, load_bundle, resolve_bundle_path
+from feature_plan import get_feature_plan
+from flat_trees import get_fast_model
+
+ID_COLUMNS = ["lot_id", "timestamp", "operator_id"]
+
+# 번들 추정기들은 DataFrame 으로 학습됐고 여기서는 numpy 로 넣는다 (청크마다 같은 경고가 반복되지 않게)
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+_bundle = None
+
+
+def log(message: str) -> None:
+    print(f"[{time.strftime('%H:%M:%S')}] {message}")
+
+
+# -- 워커 ----------------------------------------------------------------------
+
+
+def _init_worker(bundle_path: str, threads: int) -> None:
+    global _bundle
+    _bundle = load_bundle(bundle_path)
+    get_feature_plan(_bundle)
+    get_fast_model(_bundle)
+    if threads > 0:
+        from threadpoolctl import threadpool_limits
+
+        # 프로세스마다 BLAS/OpenMP 스레드를 나눠 써서 과구독을 막는다
+        threadpool_limits(threads)
+
+
+def score_matrix(bundle: dict, matrix: np.ndarray) -> np.ndarray:
+    """(n, base + targets) 입력 -> 불량 확률."""
+    plan = get_feature_plan(bundle)
+    X = plan.transform(plan.impute(matrix))
+    scorer = get_fast_model(bundle) or bundle["model"]
+    return scorer.predict_proba(X)[:, 1].astype(float)
+
+
+def _score_chunk(matrix: np.ndarray) -> np.ndarray:
+    return score_matrix(_bundle, matrix)
+
+
+# -- 입력 ----------------------------------------------------------------------
+
+
+def iter_csv(path: str, chunk_size: int, skip_rows: int) -> Iterator[pd.DataFrame]:
+    skip = range(1, skip_rows + 1) if skip_rows else None
+    yield from pd.read_csv(path, chunksize=chunk_size, skiprows=skip)
+
+
+def _primary_key(cur, table: str) -> list:
+    cur.execute(f"SHOW KEYS FROM `{table}` WHERE Key_name = 'PRIMARY'")
+    columns = [d[0] for d in cur.description]
+    rows = sorted(cur.fetchall(), key=lambda r: r[columns.index("Seq_in_index")])
+    return [r[columns.index("Column_name")] for r in rows]
+
+
+def _key_value(value):
+    """체크포인트(JSON)에 남길 키 값. 날짜/시각은 MySQL 이 그대로 비교할 수 있는 문자열로."""
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    return value
+
+
+def iter_table(
+    table: str,
+    order_by: str,
+    chunk_size: int,
+    key: Optional[List[str]] = None,
+    last: Optional[list] = None,
+    after: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """서버 쪽 커서(SSCursor)로 스트리밍. (order_by, 키) 순으로 정렬해 순서가 매번 같다.
+
+    키는 key, 없으면 테이블의 기본키. 청크마다 마지막 행의 [order_by, *키] 값을 chunk.attrs["last"] 에 붙이고,
+    last 가 있으면 그 뒤부터 읽는다 (WHERE (order_by, 키) > (...), OFFSET 없이 인덱스로 바로 찾아간다).
+    after 가 있으면 order_by 값이 그보다 큰 행만 읽는다 (train_model --refresh 의 watermark).
+    """
+    try:
+        import pymysql
+        import pymysql.cursors
+    except ImportError as exc:
+        raise RuntimeError("pymysql is required for --table") from exc
+    for name in (table, order_by, *(key or [])):
+        if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+            raise ValueError(f"invalid identifier: {name}")
+    conn = pymysql.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("PROCESS_DB_NAME") or os.getenv("DB_NAME", "factory"),
+        cursorclass=pymysql.cursors.SSCursor,
+        connect_timeout=10,
+    )
+    try:
+        with conn.cursor() as cur:
+            keys = [c for c in (key or _primary_key(cur, table)) if c != order_by]
+            if not keys:
+                log(f"{table} has no primary key; rows tied on {order_by} have no fixed order (pass --key)")
+            order = [order_by] + keys
+            order_sql = ", ".join(f"`{c}`" for c in order)
+            where = []
+            params: list = []
+            if after is not None:
+                where.append(f"`{order_by}` > %s")
+                params.append(after)
+            if last is not None:
+                if len(last) != len(order):
+                    raise ValueError(f"checkpoint key {last} does not match ({order_sql})")
+                where.append(f"({order_sql}) > ({', '.join(['%s'] * len(order))})")
+                params.extend(last)
+            sql = f"SELECT * FROM `{table}`"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += f" ORDER BY {order_sql}"
+            cur.execute(sql, params or None)
+            columns = [d[0] for d in cur.description]
+            positions = [columns.index(c) for c in order]
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = pd.DataFrame.from_records(rows, columns=columns)
+                chunk.attrs["last"] = [_key_value(rows[-1][i]) for i in positions]
+                yield chunk
+    finally:
+        conn.close()
+
+
+# -- 체크포인트 -------------------------------------------------------------------
+
+
+def _checkpoint_path(output: str) -> str:
+    return output + ".ckpt.json"
+
+
+def _read_checkpoint(output: str, source: str, model: str) -> Optional[dict]:
+    try:
+        with open(_checkpoint_path(output), encoding="utf-8") as f:
+            ckpt = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if ckpt.get("source") != source or ckpt.get("model") != model:
+        log(f"Checkpoint is for {ckpt.get('source')} / {ckpt.get('model')}; starting over")
+        return None
+    return ckpt
+
+
+def model_version(bundle: dict, bundle_path: str) -> str:
+    """체크포인트에 남길 모델 식별값: 번들의 training["version"], 없으면 (이전 번들) 파일 mtime."""
+    version = (bundle.get("training") or {}).get("version")
+    if version:
+        return str(version)
+    path = os.path.join(bundle_path, MANIFEST) if os.path.isdir(bundle_path) else bundle_path
+    return f"mtime:{os.path.getmtime(path)}"
+
+
+def _write_checkpoint(output: str, ckpt: dict) -> None:
+    path = _checkpoint_path(output)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(ckpt, f)
+    os.replace(tmp, path)
+
+
+# -- 실행 ----------------------------------------------------------------------
+
+
+def run(
+    source: Iterator[pd.DataFrame],
+    source_name: str,
+    model_path: str,
+    output: str,
+    workers: int,
+    ckpt: Optional[dict] = None,
+) -> dict:
+    """청크를 순서대로 점수 계산해 output 에 이어 쓴다.
+
+    ckpt 가 있으면 source 는 이미 쓴 행 다음부터여야 한다 (CSV 는 ckpt["rows"] 행 건너뛰기, 테이블은 ckpt["last"] 키 뒤).
+    청크에 attrs["last"] 가 있으면 (iter_table) 그 청크를 쓴 뒤 체크포인트에 남긴다.
+    """
+    global _bundle
+    bundle_path = resolve_bundle_path(model_path)
+    _bundle = load_bundle(bundle_path)
+    plan = get_feature_plan(_bundle)
+    threshold = _bundle.get("threshold", 0.5)
+    version = model_version(_bundle, bundle_path)
+    if ckpt is not None and ckpt.get("model_version") != version:
+        # 같은 경로에 다시 학습/갱신된 모델: 이어 쓰면 두 모델의 점수가 한 파일에 섞인다
+        raise SystemExit(
+            f"Checkpoint was written with model version {ckpt.get('model_version')}, but {model_path} is now "
+            f"{version}; rerun without --resume to score from the start"
+        )
+    if ckpt is not None and ckpt.get("complete"):
+        log(f"Already complete ({ckpt['rows']} rows) -> {output}")
+        return ckpt
+
+    ckpt = ckpt or {"source": source_name, "model": os.path.abspath(model_path), "model_version": version,
+                    "rows": 0, "chunks": 0, "bytes": 0, "complete": False}
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    out = open(output, "r+b" if ckpt["bytes"] else "wb")
+    out.truncate(ckpt["bytes"])  # 마지막 체크포인트 뒤에 반쯤 쓴 청크는 버린다
+    out.seek(ckpt["bytes"])
+
+    pool = None
+    if workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(
+            workers, mp_context=mp.get_context("spawn"), initializer=_init_worker, initargs=(bundle_path, threads)
+        )
+    else:
+        get_fast_model(_bundle)
+
+    started = time.perf_counter()
+    rows_scored = 0
+    pending = deque()
+
+    def _flush_one() -> None:
+        nonlocal rows_scored
+        ids, last, future = pending.popleft()
+        probs = future.result() if pool is not None else future
+        result = ids.assign(prediction=(probs >= threshold).astype(int), probability=probs)
+        out.write(result.to_csv(index=False, header=ckpt["bytes"] == 0).encode("utf-8"))
+        out.flush()
+        os.fsync(out.fileno())
+        ckpt["bytes"] = out.tell()
+        ckpt["rows"] += len(result)
+        ckpt["chunks"] += 1
+        if last is not None:
+            ckpt["last"] = last
+        rows_scored += len(result)
+        _write_checkpoint(output, ckpt)
+        if ckpt["chunks"] % 10 == 0:
+            elapsed = time.perf_counter() - started
+            log(f"{ckpt['rows']} rows scored ({rows_scored / elapsed:.0f} rows/s)")
+
+    try:
+        for chunk in source:
+            if chunk.empty:
+                # 마지막 청크까지 쓰고 complete 를 기록하기 전에 멈춘 경우 건너뛸 행만 남는다
+                continue
+            missing = [c for c in plan.base_features if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing required columns: {missing}")
+            matrix = np.full((len(chunk), len(plan.input_columns)), np.nan)
+            for j, col in enumerate(plan.input_columns):
+                if col in chunk.columns:
+                    matrix[:, j] = chunk[col].to_numpy(dtype=float)
+            ids = chunk[[c for c in ID_COLUMNS if c in chunk.columns]].reset_index(drop=True)
+            last = chunk.attrs.get("last")
+            if pool is not None:
+                pending.append((ids, last, pool.submit(_score_chunk, matrix)))
+                if len(pending) >= workers * 2:
+                    _flush_one()
+            else:
+                pending.append((ids, last, _score_chunk(matrix)))
+                _flush_one()
+        while pending:
+            _flush_one()
+        ckpt["complete"] = True
+        _write_checkpoint(output, ckpt)
+    finally:
+        out.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    log(f"Scored {rows_scored} rows in {elapsed:.1f}s ({rows_scored / max(elapsed, 1e-9):.0f} rows/s), "
+        f"{ckpt['rows']} total -> {output}")
+    return ckpt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV file shaped like data/data_sample.csv")
+    source.add_argument("--table", help="DB table (e.g. preprocessing), read with DB_HOST/DB_USER/... env")
+    parser.add_argument("--order-by", default="timestamp", help="DB column that fixes the row order for resume")
+    parser.add_argument("--key", nargs="+", help="Unique DB column(s) that break order-by ties (default: primary key)")
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--output", required=True, help="Output CSV (lot_id/timestamp/operator_id, prediction, probability)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--resume", action="store_true", help="Continue from <output>.ckpt.json")
+    args = parser.parse_args()
+
+    if args.csv:
+        source_name = f"csv:{os.path.abspath(args.csv)}"
+    else:
+        source_name = f"table:{args.table}:{','.join([args.order_by] + (args.key or []))}"
+    ckpt = _read_checkpoint(args.output, source_name, os.path.abspath(args.model)) if args.resume else None
+    if ckpt and ckpt["rows"] and not ckpt.get("complete"):
+        log(f"Resuming after {ckpt['rows']} rows" + (f" (key {ckpt['last']})" if ckpt.get("last") else ""))
+
+    if args.csv:
+        chunks = iter_csv(args.csv, args.chunk_size, ckpt["rows"] if ckpt else 0)
+    else:
+        last = ckpt.get("last") if ckpt and ckpt["rows"] else None
+        chunks = iter_table(args.table, args.order_by, args.chunk_size, key=args.key, last=last)
+    run(chunks, source_name, args.model, args.output, args.workers, ckpt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""/predict 마이크로 배칭 비교: 동시 단건 요청을 그대로 실행 vs MicroBatcher (결과 동일성 확인 + 처리량).
+
+    python scripts/bench_batching.py --model model/model.joblib --csv data/data_sample.csv --clients 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batching import MicroBatcher  # noqa: E402
+from feature_plan import FeaturePlan  # noqa: E402
+
+
+def _run_clients(fn, rows: np.ndarray, clients: int) -> tuple:
+    """clients 개 스레드가 rows 를 한 행씩 나눠 호출. (경과 초, 행별 결과)"""
+    out = [None] * len(rows)
+
+    def worker(offset: int) -> None:
+        for i in range(offset, len(rows), clients):
+            out[i] = fn(rows[i : i + 1])
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, np.concatenate(out, axis=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--max-items", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    bundle = joblib.load(args.model)
+    model = bundle["model"]
+    plan = FeaturePlan(bundle)
+    cols = bundle["base_features"] + bundle["targets_reg"]
+    df = pd.read_csv(args.csv).head(args.rows)
+    X = plan.transform(plan.impute(df[cols].to_numpy(dtype=float)))
+
+    single_s, single = _run_clients(model.predict_proba, X, args.clients)
+    batcher = MicroBatcher(args.max_items, args.max_wait_ms)
+    batched_s, batched = _run_clients(lambda x: batcher.predict_proba(model, x), X, args.clients)
+
+    diff = float(np.max(np.abs(single - batched)))
+    print(f"parity ({len(X)} rows): max abs diff {diff:.3g}")
+    if diff > 1e-12:
+        sys.exit(1)
+    print(f"{args.clients} clients  direct {len(X) / single_s:8.1f} req/s   batched {len(X) / batched_s:8.1f} req/s"
+          f"   x{single_s / batched_s:.1f}")
+    stats = batcher.stats()
+    print(f"batches {stats['batches']}  avg {stats['avgBatchRequests']:.1f} req/batch  "
+          f"queue wait avg {stats['avgQueueWaitMs']:.2f} ms / max {stats['maxQueueWaitMs']:.2f} ms  "
+          f"histogram {stats['batchSizeHistogram']}")
+
+
+if __name__ == "__main__":
+    main()
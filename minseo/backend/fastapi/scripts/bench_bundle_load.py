@@ -0,0 +1,82 @@
+"""번들 형식별 워커 메모리/로드 시간 비교: model.joblib (프로세스마다 사본) vs model.bundle (mmap 공유).
+
+워커 N 개를 띄워 각자 번들을 읽고 한 번 예측한 뒤, /proc/self/smaps_rollup 의 RSS / PSS / Private 를 보고한다.
+PSS 는 공유 페이지를 공유하는 프로세스 수로 나눈 값이라 워커 수가 늘수록 공유 효과가 보인다 (리눅스 전용).
+
+    python scripts/bench_bundle_load.py --joblib model/model.joblib --bundle model/model.bundle --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _smaps() -> dict:
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(":") in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    out[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        pass
+    return out
+
+
+def _worker(path: str, start: mp.Barrier, done: mp.Barrier, results) -> None:
+    import numpy as np
+
+    from bundle_store import load_bundle
+    import sklearn.ensemble  # noqa: F401  (임포트 시간은 로드 시간에서 뺀다)
+    import xgboost  # noqa: F401
+    import lightgbm  # noqa: F401
+
+    start.wait()
+    before = _smaps()
+    started = time.perf_counter()
+    bundle = load_bundle(path)
+    load_s = time.perf_counter() - started
+    model = bundle["model"]
+    model.predict_proba(np.zeros((1, len(bundle["x_columns"]))))
+    done.wait()  # 모든 워커가 읽은 뒤에 재야 PSS 에 공유가 반영된다
+    after = _smaps()
+    results.put({"load": load_s, **{k: after.get(k, 0) - before.get(k, 0) for k in after}})
+    done.wait()
+
+
+def _run(path: str, workers: int) -> list:
+    ctx = mp.get_context("spawn")
+    start, done = ctx.Barrier(workers), ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, start, done, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--joblib", default="model/model.joblib")
+    parser.add_argument("--bundle", default="model/model.bundle")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    for label, path in (("joblib", args.joblib), ("bundle", args.bundle)):
+        rows = _run(path, args.workers)
+        avg = {k: sum(r.get(k, 0) for r in rows) / len(rows) for k in rows[0]}
+        private = avg.get("Private_Clean", 0) + avg.get("Private_Dirty", 0)
+        print(f"{label:<7} {args.workers} workers  load {avg['load'] * 1000:7.1f} ms  "
+              f"rss +{avg.get('Rss', 0) / mb:6.1f} MB  pss +{avg.get('Pss', 0) / mb:6.1f} MB  "
+              f"private +{private / mb:6.1f} MB  (per worker)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""/predict, /preprocess JSON(items) vs 열 단위 바이너리(/predict/columnar, /preprocess/columnar) 결과/시간 비교.
+
+같은 CSV 행을 JSON dict 목록, 구조화 .npy, packed float64(+columns) 로 보내 HTTP 왕복 시간과 결과 동일성을 본다.
+(packed float32 는 입력 자체가 반올림되므로 결정 변화 수만 보고한다.)
+
+    python scripts/bench_columnar.py --model model/model.joblib --csv data/data_sample.csv --rows 10000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NUMERIC = [
+    "lithium_input",
+    "additive_ratio",
+    "process_time",
+    "humidity",
+    "tank_pressure",
+    "sintering_temp",
+    "metal_impurity",
+    "d50",
+    "quality_defect",
+]
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000
+
+
+def _npy(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ.setdefault("MODEL_REFRESH_SECONDS", "0")
+    from fastapi.testclient import TestClient
+
+    import main as server
+
+    client = TestClient(server.app)
+    df = pd.read_csv(args.csv).head(args.rows)
+    items = [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+             for row in df.to_dict(orient="records")]
+    numeric = df[NUMERIC].to_numpy(dtype=float)
+    structured = np.empty(len(df), dtype=[(c, "<f8") for c in NUMERIC] + [("lot_id", f"U{df['lot_id'].astype(str).str.len().max()}")])
+    for c in NUMERIC:
+        structured[c] = df[c].to_numpy(dtype=float)
+    structured["lot_id"] = df["lot_id"].astype(str).to_numpy()
+    columns = ",".join(NUMERIC)
+    requests = {
+        "npy": dict(content=_npy(structured), headers={"content-type": "application/x-npy"}),
+        "float64": dict(content=numeric.astype("<f8").tobytes(), headers={"content-type": "application/octet-stream"},
+                        params={"columns": columns, "dtype": "float64"}),
+        "float32": dict(content=numeric.astype("<f4").tobytes(), headers={"content-type": "application/octet-stream"},
+                        params={"columns": columns}),
+    }
+
+    failed = False
+    for endpoint, key in (("/predict", "probability"), ("/preprocess", "anomaly_depth")):
+        response, json_ms = _timed(lambda: client.post(endpoint, json={"items": items}))
+        expected = np.array([row[key] for row in response.json()["items"]])
+        print(f"{endpoint:<12} json     {len(items)} rows  {json_ms:8.1f} ms")
+        for label, request in requests.items():
+            response, ms = _timed(lambda: client.post(endpoint + "/columnar", **request))
+            actual = np.array(response.json()["columns"][key], dtype=float)
+            if label == "float32":
+                note = f"max abs diff {np.max(np.abs(actual - expected)):.3g} (rounded inputs)"
+            else:
+                same = np.array_equal(actual, expected)
+                failed |= not same
+                note = f"identical={same}"
+            print(f"{endpoint:<12} {label:<8} {len(items)} rows  {ms:8.1f} ms  x{json_ms / ms:.1f}  {note}")
+        response, ms = _timed(lambda: client.post(endpoint + "/columnar", headers={
+            **requests["npy"]["headers"], "accept": "application/x-npy"}, content=requests["npy"]["content"]))
+        result = np.load(io.BytesIO(response.content), allow_pickle=False)
+        same = np.array_equal(result[key], expected)
+        failed |= not same
+        print(f"{endpoint:<12} npy->npy {len(items)} rows  {ms:8.1f} ms  x{json_ms / ms:.1f}  identical={same}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
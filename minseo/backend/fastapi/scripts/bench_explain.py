@@ -0,0 +1,85 @@
+"""/explain 확인: 기여도 합 = logit(확률), 한 번에 보내기 vs 로트마다 호출, 반복 호출(기여도 캐시) 시간.
+
+CSV 앞 --rows 행을 하루치 로트로 보고 defective_only 로 불량 예측 로트만 설명한다.
+로트마다 보내는 쪽과 첫 배치 호출은 기여도 캐시를 비운 상태(번들 mtime 갱신)에서 잰다.
+
+    python scripts/bench_explain.py --model model/model.joblib --csv data/data_sample.csv --rows 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--single", type=int, default=20, help="로트마다 호출해 볼 로트 수")
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ["MODEL_REFRESH_SECONDS"] = "0"
+    os.environ["MODEL_PREFER_SHARED"] = "0"  # mtime 을 바꿀 파일이 --model 하나가 되게
+    from fastapi.testclient import TestClient
+
+    import main as server
+
+    client = TestClient(server.app)
+    df = pd.read_csv(args.csv).head(args.rows)
+    items = [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+             for row in df.to_dict(orient="records")]
+
+    def fresh():
+        os.utime(args.model)
+        server._registry.refresh_once()
+
+    def post(rows):
+        return client.post("/explain", json={"items": rows, "defective_only": True}).json()
+
+    client.post("/explain", json={"items": items[:1]})  # 번들 로드 + 설명기 준비
+    fresh()
+    cold, cold_ms = _timed(lambda: post(items))
+    warm, warm_ms = _timed(lambda: post(items))
+    n = cold["explained"]
+    print(f"{len(items)} lots -> {n} defective  /explain cold {cold_ms:8.1f} ms ({cold_ms / max(n, 1):.2f} ms/lot)  "
+          f"cached {warm_ms:8.1f} ms  cached rows {warm['cached']}")
+
+    gaps = []
+    for result in cold["items"]:
+        p = result["probability"]
+        total = result["base_value"] + sum(result["contributions"].values()) + sum(result["other"].values())
+        gaps.append(abs(total - np.log(p / (1 - p))))
+    same = [r["contributions"] for r in cold["items"]] == [r["contributions"] for r in warm["items"]]
+    print(f"max |base_value + sum - logit(p)| {max(gaps, default=0.0):.3g}  cached identical={same}")
+
+    defective = [items[r["index"]] for r in cold["items"]][: args.single]
+    fresh()
+    _, batch_ms = _timed(lambda: post(defective))
+    fresh()
+    _, loop_ms = _timed(lambda: [post([item]) for item in defective])
+    print(f"{len(defective)} lots  one call {batch_ms:8.1f} ms  one call per lot {loop_ms:8.1f} ms  "
+          f"x{loop_ms / batch_ms:.1f}")
+
+    if cold["items"]:
+        top = cold["items"][0]
+        print(f"lot {top['lot_id']} p={top['probability']:.3f}  top "
+              + ", ".join(f"{t['feature']} {t['contribution']:+.3f}" for t in top["top"]))
+    if max(gaps, default=0.0) > 1e-5 or not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""/predict 피처 경로 비교: 기존 pandas 경로 vs FeaturePlan (비트 단위 동일성 확인 + 지연 측정).
+
+    python scripts/bench_feature_plan.py --model model/model.joblib --csv data/data_sample.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_plan import FeaturePlan  # noqa: E402
+
+
+def legacy_features(bundle: dict, items: list) -> np.ndarray:
+    """기존 main.predict 의 DataFrame 피처 경로 (비교 기준)."""
+    base_features = bundle["base_features"]
+    targets_reg = bundle["targets_reg"]
+    poly, iso, scaler = bundle["poly"], bundle["iso"], bundle["scaler"]
+    extra_poly_cols, x_columns, imputer = bundle["extra_poly_cols"], bundle["x_columns"], bundle["imputer"]
+
+    df = pd.DataFrame(items)
+    for col in targets_reg:
+        if col not in df.columns:
+            df[col] = np.nan
+    input_matrix = df[base_features + targets_reg].to_numpy(dtype=float)
+    try:
+        imputed = imputer.transform(input_matrix)
+    except Exception:
+        imputed = np.nan_to_num(input_matrix, nan=0.0)
+    base_array = imputed[:, : len(base_features)]
+    target_array = imputed[:, len(base_features) :]
+    anomaly_depth = iso.decision_function(base_array).astype(float)
+    X_poly = poly.transform(base_array)
+    df_poly = pd.DataFrame(X_poly, columns=list(poly.get_feature_names_out(base_features)))
+    li = base_array[:, base_features.index("lithium_input")]
+    df_poly[extra_poly_cols[0]] = li ** 2
+    df_poly[extra_poly_cols[1]] = li ** 3
+    df_poly[extra_poly_cols[2]] = li * base_array[:, base_features.index("sintering_temp")]
+    df_poly[extra_poly_cols[3]] = li * base_array[:, base_features.index("tank_pressure")]
+    frame = pd.concat(
+        [
+            df_poly.reset_index(drop=True),
+            pd.DataFrame(target_array, columns=targets_reg),
+            pd.DataFrame({"anomaly_depth": anomaly_depth}),
+        ],
+        axis=1,
+    )
+    if list(frame.columns) != list(x_columns):
+        frame = frame.reindex(columns=x_columns)
+    return scaler.transform(frame)
+
+
+def plan_features(plan: FeaturePlan, items: list) -> np.ndarray:
+    return plan.transform(plan.impute(plan.input_matrix(items)))
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=2000, help="rows checked for parity")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    bundle = joblib.load(args.model)
+    plan = FeaturePlan(bundle)
+    df = pd.read_csv(args.csv).head(args.rows)
+    cols = bundle["base_features"] + bundle["targets_reg"]
+    items = [{c: (None if pd.isna(v) else float(v)) for c, v in zip(cols, row)} for row in df[cols].itertuples(index=False)]
+
+    expected = legacy_features(bundle, items)
+    actual = plan_features(plan, items)
+    same = expected.shape == actual.shape and np.array_equal(expected, actual, equal_nan=True)
+    print(f"parity ({len(items)} rows, {sum(any(v is None for v in it.values()) for it in items)} with NaN): "
+          f"{'bit-identical' if same else 'MISMATCH'}")
+    if not same:
+        diff = np.nanmax(np.abs(expected - actual))
+        print(f"max abs diff: {diff}")
+        sys.exit(1)
+
+    complete = next(it for it in items if all(v is not None for v in it.values()))
+    for label, batch in (("1 row", [complete]), ("100 rows", items[:100])):
+        legacy_us = _timeit(lambda: legacy_features(bundle, batch), args.repeat)
+        plan_us = _timeit(lambda: plan_features(plan, batch), args.repeat)
+        print(f"{label:<10} legacy {legacy_us:10.1f} us   plan {plan_us:10.1f} us   x{legacy_us / plan_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
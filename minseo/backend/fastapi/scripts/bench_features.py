@@ -0,0 +1,85 @@
+"""FeatureTransformer 학습(fit_transform) / 서빙(transform) 시간 + 학습-서빙 피처 동일성 확인.
+
+CSV 전체로 fit_transform 한 스케일 피처 행렬과, 같은 행의 결측 보완 값을 서빙 경로(transform_items, 번들 저장 후
+다시 읽은 객체)에 넣은 결과가 비트 단위로 같은지 본다. 서빙 쪽은 이전 /predict 의 pandas 경로
+(DataFrame + PolynomialFeatures.transform + pd.concat + scaler.transform)와 배치 크기별로 시간을 비교한다.
+
+    python scripts/bench_features.py --csv data/data_sample.csv
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing import FeatureTransformer  # noqa: E402
+
+
+def pandas_transform(features: FeatureTransformer, items: list) -> np.ndarray:
+    """이전 /predict 피처 계산 (DataFrame 경로, 비교용)."""
+    base, targets = features.base_features, features.targets_reg
+    df = pd.DataFrame(items)
+    imputed = features.imputer.transform(df[base + targets].to_numpy(dtype=float))
+    df_imp = pd.DataFrame(imputed, columns=base + targets)
+    df_poly = pd.DataFrame(features.poly.transform(df_imp[base]), columns=features.poly.get_feature_names_out(base))
+    li = df_imp["lithium_input"].values
+    df_poly[features.extra_poly_cols[0]] = li ** 2
+    df_poly[features.extra_poly_cols[1]] = li ** 3
+    df_poly[features.extra_poly_cols[2]] = li * df_imp["sintering_temp"].values
+    df_poly[features.extra_poly_cols[3]] = li * df_imp["tank_pressure"].values
+    df_poly["anomaly_depth"] = features.iso.decision_function(df_imp[base].to_numpy()).astype(float)
+    X = pd.concat([df_poly, df_imp[targets]], axis=1).reindex(columns=features.x_columns)
+    return features.scaler.transform(X)
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    features = FeatureTransformer()
+    started = time.perf_counter()
+    X_train, _ = features.fit_transform(df.copy())
+    print(f"fit_transform {len(df)} rows: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # 번들에 저장했다 읽은 객체로 서빙 경로를 돌린다
+    buffer = io.BytesIO()
+    joblib.dump({"features": features}, buffer)
+    buffer.seek(0)
+    served = joblib.load(buffer)["features"]
+
+    # 학습 때 결측 보완된 입력 (base + targets) 을 그대로 서빙 입력으로 쓴다
+    cols = served.base_features + served.targets_reg
+    imputed = FeatureTransformer().fit_inputs(df.copy())[cols].to_numpy(dtype=float)
+    items = [dict(zip(cols, row)) for row in imputed.tolist()]
+    actual = served.transform_items(items)
+    diff = float(np.max(np.abs(actual - X_train.to_numpy())))
+    print(f"train/serve feature parity: max abs diff {diff:.3g}")
+
+    for size in (1, 16, 256, 4096):
+        batch = items[:size]
+        fast_ms = _timeit(lambda: served.transform_items(batch), args.repeat)
+        pandas_ms = _timeit(lambda: pandas_transform(served, batch), args.repeat)
+        print(f"transform {size:>5} rows  pandas {pandas_ms:8.2f} ms   plan {fast_ms:8.2f} ms   x{pandas_ms / fast_ms:.1f}")
+    if diff != 0.0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
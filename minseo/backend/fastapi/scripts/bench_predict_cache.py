@@ -0,0 +1,82 @@
+"""/predict 결과 캐시 효과 확인 (같은 로트 목록 반복 / 일부만 겹치는 배치 / 번들 교체 시 무효화).
+
+같은 요청을 캐시 없이(첫 호출) / 캐시로(반복 호출) 보냈을 때 시간과 결과 차이, 반쯤 새 행이 섞인 배치의
+부분 hit, 모델 파일 mtime 이 바뀐 뒤 레지스트리 갱신으로 캐시가 비워지는지 본다.
+
+    python scripts/bench_predict_cache.py --model model/model.joblib --csv data/data_sample.csv --rows 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ["MODEL_REFRESH_SECONDS"] = "0"
+    os.environ["MODEL_PREFER_SHARED"] = "0"  # mtime 을 바꿀 파일이 --model 하나가 되게
+    from fastapi.testclient import TestClient
+
+    import main as server
+
+    client = TestClient(server.app)
+    df = pd.read_csv(args.csv)
+    items = [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+             for row in df.to_dict(orient="records")]
+    batch = items[: args.rows]
+
+    def post(rows):
+        return client.post("/predict", json={"items": rows}).json()["items"]
+
+    cold, cold_ms = _timed(lambda: post(batch))
+    warm_ms = []
+    for _ in range(args.repeat):
+        warm, ms = _timed(lambda: post(batch))
+        warm_ms.append(ms)
+    cold_p = np.array([r["probability"] for r in cold])
+    warm_p = np.array([r["probability"] for r in warm])
+    same_pred = [r["prediction"] for r in cold] == [r["prediction"] for r in warm]
+    print(f"{len(batch)} rows  cold {cold_ms:8.1f} ms  cached {np.median(warm_ms):8.1f} ms  "
+          f"x{cold_ms / np.median(warm_ms):.1f}  max abs diff {np.max(np.abs(cold_p - warm_p)):.3g}  "
+          f"same predictions={same_pred}")
+
+    mixed = batch[: args.rows // 2] + items[args.rows : args.rows + args.rows // 2]
+    _, mixed_ms = _timed(lambda: post(mixed))
+    print(f"{len(mixed)} rows  half cached {mixed_ms:8.1f} ms")
+
+    stats = client.get("/predict/stats").json()["cache"]
+    print(f"hits {stats['hits']}  misses {stats['misses']}  hit rate {stats['hitRate']:.1%}  "
+          f"saved ~{stats['savedMsEstimate']:.0f} ms")
+
+    # 번들 교체: mtime 을 바꾸고 레지스트리 갱신 -> 다음 요청에서 이전 행이 비워진다
+    rows_before = stats["rows"]
+    os.utime(args.model)
+    server._registry.refresh_once()
+    _, ms = _timed(lambda: post(batch))
+    stats = client.get("/predict/stats").json()["cache"]
+    print(f"after bundle swap: {len(batch)} rows {ms:8.1f} ms  cached rows {rows_before} -> {stats['rows']}  "
+          f"invalidations {stats['invalidations']}")
+    if not same_pred or stats["invalidations"] < 1:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""/preprocess 결과 동일성 확인 + 처리 시간 비교 (이전 DataFrame/iterrows 구현 vs 열 단위 numpy 구현).
+
+CSV 행을 JSON 요청과 같은 dict 목록(NaN -> None)으로 만들어, 번들이 있을 때(저장된 imputer/iso)와 없을 때
+(요청 데이터로 학습) 모두 비교한다. 번들 없는 경우의 두 번째 호출은 FitCache 재사용 시간이다.
+
+    python scripts/bench_preprocess.py --model model/model.joblib --csv data/data_sample.csv --rows 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.ensemble import IsolationForest
+from sklearn.impute import IterativeImputer, SimpleImputer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_preprocess(items, model_bundle):
+    """이전 /preprocess 구현 (비교용 사본)."""
+    base_features = [
+        "lithium_input",
+        "additive_ratio",
+        "process_time",
+        "humidity",
+        "tank_pressure",
+        "sintering_temp",
+    ]
+    targets_reg = ["metal_impurity", "d50"]
+    target_cls = "quality_defect"
+
+    present_targets = [c for c in targets_reg if any(c in row for row in items)]
+    mice_cols = base_features + present_targets
+
+    df = pd.DataFrame(items)
+    if target_cls not in df.columns:
+        df[target_cls] = 0
+    for col in base_features:
+        if col not in df.columns:
+            df[col] = np.nan
+    for col in base_features:
+        if df[col].isna().all():
+            continue
+        Q1, Q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        ext_mask = (df[target_cls] == 0) & ((df[col] < Q1 - 3 * IQR) | (df[col] > Q3 + 3 * IQR))
+        df.loc[ext_mask, col] = np.nan
+        df[col] = df[col].ffill()
+        mild_mask = (df[target_cls] == 0) & ((df[col] < Q1 - 1.98 * IQR) | (df[col] > Q3 + 1.98 * IQR))
+        df.loc[mild_mask, col] = np.nan
+
+    data_matrix = []
+    for _, row in df.iterrows():
+        values = []
+        for col in mice_cols:
+            value = row.get(col, None)
+            values.append(float(value) if value is not None else np.nan)
+        data_matrix.append(values)
+    matrix = np.array(data_matrix, dtype=float)
+
+    imputer = model_bundle.get("imputer") if model_bundle else None
+    try:
+        if imputer is not None:
+            imputed = imputer.transform(matrix)
+        elif len(items) < 2:
+            imputed = SimpleImputer(strategy="median").fit_transform(matrix)
+        else:
+            imputed = IterativeImputer(random_state=42).fit_transform(matrix)
+    except Exception:
+        imputed = np.nan_to_num(matrix, nan=0.0)
+
+    cleaned = []
+    for row_idx, row in enumerate(items):
+        cleaned_row = {col: float(imputed[row_idx, col_idx]) for col_idx, col in enumerate(mice_cols)}
+        if target_cls in row:
+            cleaned_row[target_cls] = row[target_cls]
+        if "lot_id" in row:
+            cleaned_row["lot_id"] = row["lot_id"]
+        if "timestamp" in row:
+            cleaned_row["timestamp"] = row["timestamp"]
+        cleaned.append(cleaned_row)
+
+    base_matrix = np.array([[r.get(col, np.nan) for col in base_features] for r in cleaned], dtype=float)
+    if model_bundle and model_bundle.get("iso") is not None:
+        anomaly_depth = model_bundle["iso"].decision_function(base_matrix).astype(float)
+    else:
+        iso = IsolationForest(contamination=0.05, random_state=42)
+        anomaly_depth = iso.fit(base_matrix).decision_function(base_matrix).astype(float)
+    for idx, row in enumerate(cleaned):
+        row["anomaly_depth"] = float(anomaly_depth[idx])
+    return {"items": cleaned}
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ.setdefault("MODEL_REFRESH_SECONDS", "0")
+    import main as server
+
+    df = pd.read_csv(args.csv).head(args.rows)
+    items = [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+             for row in df.to_dict(orient="records")]
+
+    failed = False
+    cases = (("bundle", None, server.load_model()), ("no bundle", "__missing__", None))
+    for label, model_id, bundle in cases:
+        request = server.PreprocessRequest(items=items, model_id=model_id)
+        expected, legacy_ms = _timed(lambda: legacy_preprocess(items, bundle))
+        actual, new_ms = _timed(lambda: server.preprocess(request))
+        same = json.dumps(expected) == json.dumps(actual)
+        failed |= not same
+        line = f"{label:<10} {len(items)} rows  legacy {legacy_ms:8.1f} ms  vectorized {new_ms:8.1f} ms"
+        if model_id is not None:
+            _, cached_ms = _timed(lambda: server.preprocess(request))
+            line += f"  cached {cached_ms:8.1f} ms"
+        print(f"{line}  identical={same}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""/simulate (격자 한 번에 계산) vs 격자 점마다 /predict 호출 시간/결과 비교.
+
+CSV 의 한 행을 기준 로트로 두고 1차원(lithium_input) / 2차원(lithium_input x sintering_temp) 격자를 돌린다.
+점마다 보내는 /predict 는 예측 캐시를 끄고 잰다.
+
+    python scripts/bench_simulate.py --model model/model.joblib --csv data/data_sample.csv --steps 41
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--row", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=41)
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = os.path.abspath(args.model)
+    os.environ.setdefault("MODEL_REFRESH_SECONDS", "0")
+    os.environ["PREDICT_CACHE_SIZE"] = "0"
+    from fastapi.testclient import TestClient
+
+    import main as server
+
+    client = TestClient(server.app)
+    row = pd.read_csv(args.csv).iloc[args.row].to_dict()
+    base = {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+    df = pd.read_csv(args.csv)
+    axes = {
+        "lithium_input": (float(df["lithium_input"].quantile(0.01)), float(df["lithium_input"].quantile(0.99))),
+        "sintering_temp": (float(df["sintering_temp"].quantile(0.01)), float(df["sintering_temp"].quantile(0.99))),
+    }
+
+    failed = False
+    for names in (["lithium_input"], ["lithium_input", "sintering_temp"]):
+        grid = [{"feature": n, "start": axes[n][0], "stop": axes[n][1], "steps": args.steps} for n in names]
+        result, sim_ms = _timed(lambda: client.post("/simulate", json={"base": base, "grid": grid}).json())
+        surface = np.asarray(result["probability"])
+        values = [np.asarray(axis["values"]) for axis in result["axes"]]
+        mesh = np.meshgrid(*values, indexing="ij")
+        points = [dict(base, **{n: float(m.ravel()[i]) for n, m in zip(names, mesh)}) for i in range(surface.size)]
+
+        def one_by_one():
+            return [client.post("/predict", json={"data": p}).json()["probability"] for p in points]
+
+        expected, loop_ms = _timed(one_by_one)
+        diff = float(np.max(np.abs(surface.ravel() - np.asarray(expected))))
+        failed |= diff > 1e-9
+        print(f"{'x'.join(names):<30} {surface.size:5d} points  /simulate {sim_ms:8.1f} ms  "
+              f"/predict x{surface.size} {loop_ms:9.1f} ms  x{loop_ms / sim_ms:.0f}  max abs diff {diff:.3g}  "
+              f"safe fraction {result['safe_fraction']:.2f}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""펼친 스태킹 모델(FlatStackingClassifier) 결과 동일성 확인 + 배치 크기별 지연 비교.
+
+원본 번들(model.joblib)의 StackingClassifier 와, 학습 때 만든 model.bundle(또는 --bundle 없으면 그 자리에서 펼친 모델)의
+predict_proba 를 배치 크기별로 비교한다. 펼친 모델은 배치 크기에 따라 기반 모델 경로가 바뀌므로 여러 크기로 나눠 본다.
+메타 모델 행렬곱은 배치 크기에 따라 마지막 자리가 달라질 수 있어 원본도 같은 크기로 나눠 돌린다.
+
+    python scripts/check_fast_model.py --model model/model.joblib --bundle model/model.bundle --csv data/data_sample.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bundle_store import load_shared_bundle  # noqa: E402
+from feature_plan import FeaturePlan  # noqa: E402
+from flat_trees import get_fast_model  # noqa: E402
+
+
+def _chunked(fn, X: np.ndarray, size: int) -> np.ndarray:
+    return np.vstack([fn(X[i : i + size]) for i in range(0, len(X), size)])
+
+
+def _timeit(fn, x: np.ndarray, repeat: int) -> float:
+    fn(x)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(x)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.joblib")
+    parser.add_argument("--bundle", default=None, help="model.bundle directory (default: flatten --model in place)")
+    parser.add_argument("--csv", default=os.path.join("data", "data_sample.csv"))
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    original = joblib.load(args.model)
+    fast_bundle = load_shared_bundle(args.bundle) if args.bundle else dict(original)
+    fast = get_fast_model(fast_bundle)
+    if fast is None:
+        print("model cannot be flattened")
+        sys.exit(1)
+    print("estimators: " + ", ".join(
+        f"{type(f).__name__ if f is not None else type(e).__name__}" for e, f in zip(fast.estimators_, fast.flat_estimators_)
+    ))
+
+    plan = FeaturePlan(original)
+    cols = original["base_features"] + original["targets_reg"]
+    X = plan.transform(plan.impute(pd.read_csv(args.csv).head(args.rows)[cols].to_numpy(dtype=float)))
+    model = original["model"]
+    threshold = original.get("threshold", 0.5)
+
+    failed = False
+    for size in (1, 4, 16, 64, 256, len(X)):
+        rows = X[: min(len(X), 100)] if size == 1 else X
+        expected = _chunked(model.predict_proba, rows, size)
+        actual = _chunked(fast.predict_proba, rows, size)
+        diff = float(np.max(np.abs(expected - actual)))
+        flips = int(np.sum((expected[:, 1] >= threshold) != (actual[:, 1] >= threshold)))
+        print(f"batch {size:>5}: {len(rows)} rows  max abs diff {diff:.3g}  decision flips {flips}")
+        failed |= diff != 0.0
+
+    for size in (1, 16, 64, 256):
+        x = X[:size]
+        base_ms = _timeit(model.predict_proba, x, args.repeat)
+        fast_ms = _timeit(fast.predict_proba, x, args.repeat)
+        print(f"{size:>4} rows  stacking {base_ms:8.2f} ms   flat {fast_ms:8.2f} ms   x{base_ms / fast_ms:.1f}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
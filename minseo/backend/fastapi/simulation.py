@@ -0,0 +1,77 @@
+"""what-if 민감도 스윕 (/simulate): 기준 로트 한 행 + 파라미터 격자 1~2개 -> 격자 전체 입력 행렬.
+
+격자 축 값은 values 로 주거나 start/stop/steps 로 주고, 둘 다 없으면 학습 때 IQR 경계
+(Q1 - 1.98*IQR ~ Q3 + 1.98*IQR, MICE 로 넘기기 전 정상으로 본 범위)를 쓴다. 음수가 없는 피처는 0 부터.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from preprocessing import IQR_MILD
+
+
+class SimulationError(ValueError):
+    """요청 오류. args[0] 은 응답의 error 코드, args[1] 은 추가 정보(dict)."""
+
+
+def axis_values(
+    feature: str,
+    values: Optional[Sequence[float]],
+    start: Optional[float],
+    stop: Optional[float],
+    steps: int,
+    base_features: List[str],
+    iqr_bounds: Optional[np.ndarray],
+    max_points: int,
+) -> np.ndarray:
+    """축 하나의 값 (오름차순). 값 수가 max_points 를 넘으면 배열을 만들기 전에 grid_too_large."""
+    if values is not None and len(values) == 0:
+        raise SimulationError("empty_axis", {"feature": feature})
+    count = len(values) if values is not None else steps
+    if count > max_points:
+        raise SimulationError("grid_too_large", {"feature": feature, "points": count, "max_points": max_points})
+    if values is not None:
+        out = np.asarray(values, dtype=float)
+    else:
+        if start is None or stop is None:
+            if iqr_bounds is None or feature not in base_features:
+                raise SimulationError("axis_range_missing", {"feature": feature})
+            q1, q3 = iqr_bounds[base_features.index(feature)]
+            iqr = q3 - q1
+            # Q1 이 0 이상인 (음수가 없는) 피처는 0 아래로 내려가지 않게
+            start = max(q1 - IQR_MILD * iqr, 0.0 if q1 >= 0 else -np.inf) if start is None else start
+            stop = q3 + IQR_MILD * iqr if stop is None else stop
+        if steps < 2:
+            raise SimulationError("invalid_steps", {"feature": feature, "steps": steps})
+        out = np.linspace(float(start), float(stop), steps)
+    if not np.all(np.isfinite(out)):
+        raise SimulationError("non_finite_axis", {"feature": feature})
+    return np.sort(out)
+
+
+def grid_matrix(base_row: np.ndarray, input_columns: List[str], axes: List[tuple]) -> np.ndarray:
+    """base_row (input_columns 순서 1행) 를 격자 점 수만큼 복제하고 축 컬럼을 격자 값으로 채운 행렬.
+
+    axes 는 [(feature, values), ...]. 행 순서는 np.meshgrid(indexing="ij") 의 ravel 순서 (첫 축이 바깥).
+    """
+    mesh = np.meshgrid(*(values for _, values in axes), indexing="ij")
+    n = mesh[0].size
+    matrix = np.repeat(base_row.reshape(1, -1), n, axis=0)
+    for (feature, _), grid in zip(axes, mesh):
+        matrix[:, input_columns.index(feature)] = grid.ravel()
+    return matrix
+
+
+def safe_ranges(values: np.ndarray, ok: np.ndarray) -> List[List[float]]:
+    """ok 가 연속으로 참인 구간마다 [처음 값, 마지막 값] (values 오름차순)."""
+    ranges = []
+    start = None
+    for i, flag in enumerate(ok.tolist()):
+        if flag and start is None:
+            start = i
+        elif not flag and start is not None:
+            ranges.append([float(values[start]), float(values[i - 1])])
+            start = None
+    if start is not None:
+        ranges.append([float(values[start]), float(values[-1])])
+    return ranges
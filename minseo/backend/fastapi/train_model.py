@@ -1,32 +1,76 @@
 import argparse
+import copy
+import hashlib
+import json
+import multiprocessing as mp
 import os
+import shutil
+import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
 
+import imblearn
 import joblib
 import numpy as np
 import pandas as pd
+import sklearn
 from imblearn.combine import SMOTETomek
 from lightgbm import LGBMClassifier
-from sklearn.ensemble import IsolationForest, RandomForestClassifier, StackingClassifier
-from sklearn.experimental import enable_iterative_imputer  # noqa: F401
-from sklearn.impute import IterativeImputer
+from sklearn.ensemble import RandomForestClassifier, StackingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
     accuracy_score,
+    average_precision_score,
     confusion_matrix,
     f1_score,
     precision_score,
     recall_score,
 )
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import PolynomialFeatures, RobustScaler
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from xgboost import XGBClassifier
 
+from bundle_store import check_parity, load_shared_bundle, save_shared_bundle, shared_bundle_path
+from out_of_core import build_dataset
+from preprocessing import FeatureTransformer
+from score_batch import iter_table
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# 학습 캐시 형식이 바뀌면 올린다
+CACHE_VERSION = 1
+
+# --out-of-core: RandomForest 트리 하나가 부트스트랩으로 보는 최대 행 수 (트리 크기/메모리 상한)
+OOC_RF_MAX_SAMPLES = 200_000
+# --out-of-core: 테스트 분할 확률 예측 청크 크기
+OOC_PREDICT_CHUNK = 100_000
+# --refresh: 기존 XGB/LGBM 부스터에 이어서 학습할 라운드 수
+REFRESH_ROUNDS = 50
+# --refresh: 새 행 중 임계값 재계산용으로 떼어 두는 최신 구간 비율 (다음 refresh 때 학습에 들어간다)
+REFRESH_HOLDOUT_FRAC = 0.2
+# --refresh: holdout 불량 행이 이보다 적으면 임계값을 바꾸지 않는다
+REFRESH_MIN_HOLDOUT_POSITIVES = 20
+
 
 def log(message: str) -> None:
     print(f"[{time.strftime('%H:%M:%S')}] {message}")
 
 
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """지금까지의 최대 RSS (MB). resource 모듈이 없으면 None."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux 는 KB, macOS 는 바이트
+    return usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
 def _resolve_csv_path(path: str) -> str:
     if os.path.exists(path):
         return path
@@ -38,149 +82,259 @@ def _resolve_csv_path(path: str) -> str:
     raise FileNotFoundError(f"CSV not found: {path}")
 
 
-def _preprocess(df: pd.DataFrame):
-    base_features = [
-        "lithium_input",
-        "additive_ratio",
-        "process_time",
-        "humidity",
-        "tank_pressure",
-        "sintering_temp",
-    ]
-    targets_reg = ["metal_impurity", "d50"]
-    target_cls = "quality_defect"
-
-    missing = [c for c in base_features + targets_reg + [target_cls] if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required columns: {missing}")
-
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-        df = df.sort_values("timestamp").reset_index(drop=True)
-
-    log("🧹 IQR 1.98(MICE) / 3.0(ffill) 전처리 중...")
-    for col in base_features:
-        Q1, Q3 = df[col].quantile(0.25), df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        ext_mask = (df[target_cls] == 0) & (
-            (df[col] < Q1 - 3 * IQR) | (df[col] > Q3 + 3 * IQR)
-        )
-        df.loc[ext_mask, col] = np.nan
-        df[col] = df[col].ffill()
-        mild_mask = (df[target_cls] == 0) & (
-            (df[col] < Q1 - 1.98 * IQR) | (df[col] > Q3 + 1.98 * IQR)
-        )
-        df.loc[mild_mask, col] = np.nan
-
-    log("🤖 MICE 결측치 정밀 복구 중...")
-    imputer = IterativeImputer(random_state=42)
-    df[base_features + targets_reg] = imputer.fit_transform(df[base_features + targets_reg])
-
-    log("🔄 피처 확장 및 lithium_input 가중치 강화 중...")
-    poly = PolynomialFeatures(degree=2, include_bias=False)
-    X_poly = poly.fit_transform(df[base_features])
-    poly_cols = poly.get_feature_names_out(base_features)
-    df_poly = pd.DataFrame(X_poly, columns=poly_cols, index=df.index)
-
-    extra_cols = [
-        "lithium_input_sq",
-        "lithium_input_cub",
-        "lithium_with_temp",
-        "lithium_with_pressure",
-    ]
-    df_poly[extra_cols[0]] = df["lithium_input"].values ** 2
-    df_poly[extra_cols[1]] = df["lithium_input"].values ** 3
-    df_poly[extra_cols[2]] = df["lithium_input"].values * df["sintering_temp"].values
-    df_poly[extra_cols[3]] = df["lithium_input"].values * df["tank_pressure"].values
-
-    log("🔍 Isolation Forest 이상치 점수(Score) 추출 중...")
-    iso = IsolationForest(contamination=0.05, random_state=42)
-    iso.fit(df[base_features])
-    df["anomaly_depth"] = iso.decision_function(df[base_features]).astype(float)
-
-    meta_cols = ["lot_id", "timestamp", "operator_id", target_cls]
-    meta = {}
-    for col in meta_cols:
-        if col in df.columns:
-            meta[col] = df[col].reset_index(drop=True)
-        else:
-            meta[col] = pd.Series([None] * len(df))
-
-    df_final = pd.concat(
-        [
-            pd.DataFrame(meta),
-            df_poly.reset_index(drop=True),
-            df[targets_reg].reset_index(drop=True),
-            df[["anomaly_depth"]].reset_index(drop=True),
-        ],
-        axis=1,
-    )
-
-    return df_final, {
-        "imputer": imputer,
-        "poly": poly,
-        "poly_cols": list(df_poly.columns),
-        "extra_poly_cols": extra_cols,
-        "iso": iso,
-        "base_features": base_features,
-        "targets_reg": targets_reg,
-        "target_cls": target_cls,
+class StageTimer:
+    """단계별 벽시계 시간 + 단계가 끝난 시점까지의 최대 RSS (끝에 표로 출력)."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - started, peak_rss_mb()))
+
+    def report(self) -> None:
+        total = sum(seconds for _, seconds, _ in self.stages) or 1e-9
+        log("⏱️ 단계별 소요 시간 / 최대 RSS")
+        for name, seconds, rss in self.stages:
+            rss_text = f"{rss:9.0f} MB" if rss is not None else ""
+            log(f"  {name:<18} {seconds:8.2f}s  {seconds / total:6.1%}  {rss_text}")
+        log(f"  {'total':<18} {total:8.2f}s")
+        rss, children = peak_rss_mb(), peak_rss_mb(children=True)
+        if rss is not None:
+            log(f"📈 최대 RSS: {rss:.0f} MB (자식 프로세스 최대 {children:.0f} MB)")
+
+
+def _data_key(csv_path: str, *parts) -> str:
+    """캐시 키: CSV 내용 + 전처리 코드 + 라이브러리 버전 + 분할/샘플링 설정."""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "preprocessing.py"), "rb") as f:
+        digest.update(f.read())
+    digest.update(repr((CACHE_VERSION, sklearn.__version__, imblearn.__version__, np.__version__, parts)).encode())
+    return digest.hexdigest()[:24]
+
+
+def _cached(cache_dir: Optional[str], name: str, build):
+    """cache_dir/name.joblib 이 있으면 읽고, 없으면 build() 결과를 저장한다 (cache_dir 가 None 이면 항상 build)."""
+    if not cache_dir:
+        return build(), False
+    path = os.path.join(cache_dir, f"{name}.joblib")
+    if os.path.exists(path):
+        try:
+            return joblib.load(path), True
+        except Exception as exc:
+            log(f"Cache unreadable ({exc}); rebuilding {path}")
+    value = build()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(value, tmp)
+    os.replace(tmp, path)
+    return value, False
+
+
+def _training_info(mode: str, watermark: Optional[str], rows: int, **extra) -> dict:
+    """번들 "training" 메타데이터. version 은 저장 시각 문자열이라 항상 커진다 (버전 파일 이름/model_id 로도 쓴다)."""
+    return {
+        "version": time.strftime("%Y%m%d-%H%M%S"),
+        "mode": mode,
+        "watermark": watermark,
+        "rows": rows,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **extra,
     }
 
 
-def build_and_train(csv_path: str, output_path: str) -> None:
+def _watermark(timestamps) -> Optional[str]:
+    """가장 늦은 timestamp (문자열). 없으면 None."""
+    latest = pd.to_datetime(timestamps, errors="coerce").max()
+    return None if pd.isna(latest) else str(latest)
+
+
+def _balance(X, y):
+    return SMOTETomek(random_state=42).fit_resample(X, y)
+
+
+def sweep_threshold(y_true, y_probs, target_recall: float = 0.95, thresholds=None) -> float:
+    """재현율이 target_recall 에 가장 가까운 임계값 (같으면 작은 값).
+
+    양성 확률을 정렬해 두고 임계값마다 '확률 >= 임계값' 인 양성 수를 searchsorted 로 한 번에 센다.
+    recall_score 를 임계값마다 부르던 루프와 같은 값을 낸다.
+    """
+    if thresholds is None:
+        thresholds = np.arange(0.05, 0.8, 0.005)
+    y_true = np.asarray(y_true)
+    positives = np.sort(np.asarray(y_probs)[y_true == 1])
+    tp = len(positives) - np.searchsorted(positives, thresholds, side="left")
+    # 양성이 없으면 recall_score 처럼 재현율 0
+    recall = tp / len(positives) if len(positives) else np.zeros(len(thresholds))
+    diff = np.abs(recall - target_recall)
+    best = int(np.argmin(diff))
+    return thresholds[best] if diff[best] < 1.0 else 0.5
+
+
+DEFAULT_PARAMS = {
+    "xgb": {"n_estimators": 400, "learning_rate": 0.05, "max_depth": 6, "random_state": 42},
+    "lgbm": {"n_estimators": 400, "verbose": -1, "random_state": 42},
+    "rf": {"n_estimators": 300, "class_weight": "balanced", "random_state": 42},
+}
+ESTIMATOR_CLASSES = {"xgb": XGBClassifier, "lgbm": LGBMClassifier, "rf": RandomForestClassifier}
+
+# --search 후보 (기본값 위에 덮어쓴다)
+SEARCH_SPACE = {
+    "xgb": [
+        {},
+        {"max_depth": 4},
+        {"max_depth": 8},
+        {"learning_rate": 0.1, "n_estimators": 200},
+    ],
+    "lgbm": [
+        {},
+        {"num_leaves": 15},
+        {"num_leaves": 63},
+        {"learning_rate": 0.05},
+    ],
+    "rf": [
+        {},
+        {"min_samples_leaf": 3},
+        {"max_features": 0.5},
+    ],
+}
+
+
+def _make_estimator(name: str, overrides: Optional[dict] = None, n_jobs: Optional[int] = None):
+    params = {**DEFAULT_PARAMS[name], **(overrides or {})}
+    if n_jobs is not None:
+        params["n_jobs"] = n_jobs
+    return ESTIMATOR_CLASSES[name](**params)
+
+
+def _base_estimators(best: Optional[dict] = None) -> list:
+    best = best or {}
+    return [(name, _make_estimator(name, best.get(name))) for name in DEFAULT_PARAMS]
+
+
+_fold_cache = {}
+
+
+def _score_candidate(task: tuple) -> tuple:
+    """워커: (폴드 파일, 폴드 번호, 모델 이름, 후보 번호, 파라미터) -> 검증 폴드 average precision."""
+    folds_path, fold, name, idx, overrides = task
+    if folds_path not in _fold_cache:
+        _fold_cache.clear()
+        _fold_cache[folds_path] = joblib.load(folds_path)
+    X_bal, y_bal, X_val, y_val = _fold_cache[folds_path][fold]
+    est = _make_estimator(name, overrides, n_jobs=1)
+    est.fit(X_bal, y_bal)
+    return name, idx, fold, float(average_precision_score(y_val, est.predict_proba(X_val)[:, 1]))
+
+
+def search_estimators(X_train, y_train, cache_dir: str, key: str, workers: int, n_folds: int = 3) -> dict:
+    """기반 모델별 후보를 층화 K-폴드(폴드마다 SMOTETomek, 디스크 캐시)로 평가해 평균 AP 가 가장 높은 파라미터."""
+
+    def build_folds():
+        folds = []
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+        for train_idx, val_idx in splitter.split(X_train, y_train):
+            X_bal, y_bal = _balance(X_train.iloc[train_idx], y_train.iloc[train_idx])
+            folds.append((X_bal, y_bal, X_train.iloc[val_idx], y_train.iloc[val_idx]))
+        return folds
+
+    _, hit = _cached(cache_dir, f"folds{n_folds}-{key}", build_folds)
+    log(f"🗂️ 폴드 {n_folds}개 ({'캐시' if hit else '새로 생성'})")
+    folds_path = os.path.join(cache_dir, f"folds{n_folds}-{key}.joblib")
+    tasks = [
+        (folds_path, fold, name, idx, overrides)
+        for name, candidates in SEARCH_SPACE.items()
+        for idx, overrides in enumerate(candidates)
+        for fold in range(n_folds)
+    ]
+    scores = {}
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+        for name, idx, _, score in pool.map(_score_candidate, tasks):
+            scores.setdefault((name, idx), []).append(score)
+
+    best = {}
+    for name, candidates in SEARCH_SPACE.items():
+        means = [float(np.mean(scores[(name, idx)])) for idx in range(len(candidates))]
+        for idx, mean in enumerate(means):
+            log(f"  {name:<5} {json.dumps(candidates[idx]):<45} AP {mean:.4f}")
+        best[name] = candidates[int(np.argmax(means))]
+        log(f"✅ {name} 선택: {json.dumps(best[name])}")
+    return best
+
+
+def build_and_train(
+    csv_path: str,
+    output_path: str,
+    shared: bool = True,
+    search: bool = False,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+) -> None:
+    timer = StageTimer()
     resolved_csv = _resolve_csv_path(csv_path)
-    log(f"Loading CSV -> {resolved_csv}")
-    df = pd.read_csv(resolved_csv)
-
-    df_final, tools = _preprocess(df)
-    base_features = tools["base_features"]
-    targets_reg = tools["targets_reg"]
-    target_cls = tools["target_cls"]
+    with timer.stage("load_csv"):
+        log(f"Loading CSV -> {resolved_csv}")
+        df = pd.read_csv(resolved_csv)
+        key = _data_key(resolved_csv, 0.2, 42) if cache_dir else ""
 
-    X = df_final.drop(["lot_id", "timestamp", "operator_id", target_cls], axis=1)
-    y = df_final[target_cls]
+    with timer.stage("preprocess"):
+        def _fit_features():
+            features = FeatureTransformer()
+            X_scaled, y = features.fit_transform(df, log=log)
+            return features, X_scaled, y
 
-    scaler = RobustScaler()
-    X_scaled = pd.DataFrame(scaler.fit_transform(X), columns=X.columns)
+        (features, X_scaled, y), hit = _cached(cache_dir, f"features-{key}", _fit_features)
+        if hit:
+            log("🗂️ 전처리 결과 캐시 사용")
 
     X_train, X_test, y_train, y_test = train_test_split(
         X_scaled, y, test_size=0.2, stratify=y, random_state=42
     )
 
-    log("🧬 데이터 밸런싱 및 스태킹 모델링 중...")
-    smt = SMOTETomek(random_state=42)
-    X_train_bal, y_train_bal = smt.fit_resample(X_train, y_train)
-
-    estimators = [
-        (
-            "xgb",
-            XGBClassifier(
-                n_estimators=400, learning_rate=0.05, max_depth=6, random_state=42
-            ),
-        ),
-        ("lgbm", LGBMClassifier(n_estimators=400, verbose=-1, random_state=42)),
-        (
-            "rf",
-            RandomForestClassifier(
-                n_estimators=300, class_weight="balanced", random_state=42
-            ),
-        ),
-    ]
-    stack_clf = StackingClassifier(
-        estimators=estimators, final_estimator=LogisticRegression(), n_jobs=-1
-    )
-    stack_clf.fit(X_train_bal, y_train_bal)
+    with timer.stage("balance"):
+        log("🧬 데이터 밸런싱 및 스태킹 모델링 중...")
+        (X_train_bal, y_train_bal), hit = _cached(cache_dir, f"balanced-{key}", lambda: _balance(X_train, y_train))
+        if hit:
+            log("🗂️ SMOTETomek 결과 캐시 사용")
+
+    best_params = None
+    if search:
+        with timer.stage("search"):
+            # 워커들이 폴드를 파일로 읽으므로 캐시를 끈 경우에도 임시 디렉터리에 둔다
+            search_dir = cache_dir or tempfile.mkdtemp(prefix="train-folds-")
+            try:
+                best_params = search_estimators(X_train, y_train, search_dir, key, workers or os.cpu_count() or 1)
+            finally:
+                if not cache_dir:
+                    shutil.rmtree(search_dir, ignore_errors=True)
+
+    with timer.stage("fit_stack"):
+        stack_clf = StackingClassifier(
+            estimators=_base_estimators(best_params), final_estimator=LogisticRegression(), n_jobs=-1
+        )
+        stack_clf.fit(X_train_bal, y_train_bal)
+
+    with timer.stage("threshold"):
+        y_probs = stack_clf.predict_proba(X_test)[:, 1]
+        best_th = sweep_threshold(y_test, y_probs)
 
-    y_probs = stack_clf.predict_proba(X_test)[:, 1]
-    best_th, min_diff = 0.5, 1.0
-    for th in np.arange(0.05, 0.8, 0.005):
-        diff = abs(recall_score(y_test, (y_probs >= th)) - 0.95)
-        if diff < min_diff:
-            min_diff, best_th = diff, th
+    _log_scores(y_test, y_probs, best_th)
+    watermark = _watermark(df["timestamp"]) if "timestamp" in df.columns else None
+    training = _training_info("full", watermark, len(df))
+    _save_bundle(stack_clf, best_th, features, output_path, shared, X_test.to_numpy(), timer, training)
+    timer.report()
 
+
+def _log_scores(y_test, y_probs, best_th: float) -> None:
     y_pred_final = (y_probs >= best_th).astype(int)
-    tn, fp, fn, tp = confusion_matrix(y_test, y_pred_final).ravel()
+    tn, fp, fn, tp = confusion_matrix(y_test, y_pred_final, labels=[0, 1]).ravel()
     log("=" * 60)
     log(f"🔥 [최종 성적표] (임계값: {best_th:.4f})")
     log(
@@ -191,24 +345,264 @@ def build_and_train(csv_path: str, output_path: str) -> None:
     )
     log(f"혼동행렬: tn={tn}, fp={fp}, fn={fn}, tp={tp}")
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    joblib.dump(
-        {
-            "model": stack_clf,
-            "scaler": scaler,
-            "threshold": best_th,
-            "imputer": tools["imputer"],
-            "poly": tools["poly"],
-            "poly_cols": tools["poly_cols"],
-            "extra_poly_cols": tools["extra_poly_cols"],
-            "iso": tools["iso"],
-            "base_features": base_features,
-            "targets_reg": targets_reg,
-            "x_columns": list(X.columns),
-        },
-        output_path,
-    )
-    log(f"Saved model bundle -> {output_path}")
+
+def _dump_atomic(bundle: dict, path: str) -> None:
+    """임시 파일에 쓴 뒤 교체 (서버의 mtime 감시가 반쯤 쓴 파일을 읽지 않게)."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+
+
+def _save_bundle(
+    model,
+    threshold: float,
+    features,
+    output_path: str,
+    shared: bool,
+    X_check,
+    timer,
+    training: dict,
+    keep_version: bool = False,
+) -> None:
+    """joblib 번들 + (shared 면) 메모리 매핑 번들 저장. X_check 는 두 번들 예측 동일성 확인용 행렬.
+
+    keep_version 이면 <output 이름>-<version>.joblib 사본도 남긴다 (model_id 로 불러 비교/되돌리기용).
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    bundle = {
+        "model": model,
+        "threshold": threshold,
+        **features.bundle_parts(),
+        "features": features,
+        "training": training,
+    }
+    with timer.stage("save"):
+        if keep_version:
+            versioned = f"{os.path.splitext(output_path)[0]}-{training['version']}.joblib"
+            _dump_atomic(bundle, versioned)
+            log(f"Saved versioned bundle -> {versioned}")
+        _dump_atomic(bundle, output_path)
+        log(f"Saved model bundle -> {output_path} (version {training['version']}, watermark {training['watermark']})")
+
+    if not shared:
+        # 서빙은 .bundle 이 있으면 그쪽을 먼저 고르므로, 이전 학습이 남긴 것은 지워야 새 .joblib 이 쓰인다
+        stale = shared_bundle_path(output_path)
+        if os.path.exists(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+            log(f"Removed stale shared bundle -> {stale}")
+        return
+    with timer.stage("shared_bundle"):
+        shared_path = shared_bundle_path(output_path)
+        save_shared_bundle(bundle, shared_path)
+        diff = check_parity(bundle, load_shared_bundle(shared_path), X_check)
+        log(f"Saved shared (mmap) bundle -> {shared_path} (parity max abs diff: {diff:.3g})")
+        if diff != 0.0:
+            # 서빙이 잘못된 번들을 고르지 않도록 지운다
+            shutil.rmtree(shared_path, ignore_errors=True)
+            raise RuntimeError(f"shared bundle parity check failed: {diff}")
+
+
+def _out_of_core_estimators(n_train: int, positives: int) -> list:
+    """디스크 데이터셋용 기반 모델. SMOTETomek 대신 클래스 가중치로 불균형을 맞춘다."""
+    ratio = (n_train - positives) / max(positives, 1)
+    overrides = {
+        "xgb": {"scale_pos_weight": ratio},
+        "lgbm": {"class_weight": "balanced"},
+        "rf": {"max_samples": min(1.0, OOC_RF_MAX_SAMPLES / max(n_train, 1))},
+    }
+    return [(name, _make_estimator(name, overrides[name])) for name in DEFAULT_PARAMS]
+
+
+def build_and_train_out_of_core(
+    csv_path: str,
+    output_path: str,
+    shared: bool = True,
+    cache_dir: Optional[str] = None,
+    chunk_size: int = 100_000,
+    sample_rows: int = 200_000,
+) -> None:
+    """CSV 전체를 메모리에 올리지 않는 학습 (out_of_core.build_dataset -> 디스크 .npy 에서 학습).
+
+    기반 모델은 train 분할(메모리 매핑)로 학습하고, 최종 LogisticRegression 은 따로 떼어 둔 blend 분할의
+    기반 모델 예측으로 맞춘다 (cv="prefit"). 임계값/성적표는 test 분할을 청크로 예측해 계산한다.
+    """
+    timer = StageTimer()
+    resolved_csv = _resolve_csv_path(csv_path)
+    log(f"Out-of-core training -> {resolved_csv}")
+    if cache_dir:
+        key = _data_key(resolved_csv, "out-of-core", chunk_size, sample_rows)
+        work_dir = os.path.join(cache_dir, f"ooc-{key}")
+    else:
+        work_dir = tempfile.mkdtemp(prefix="train-ooc-")
+    try:
+        data = build_dataset(resolved_csv, work_dir, chunk_size, sample_rows, log=log, stage=timer.stage)
+        features = data.features
+        X_train, y_train = data.load("train")
+        X_blend, y_blend = data.load("blend")
+        X_test, y_test = data.load("test")
+
+        with timer.stage("fit_members"):
+            estimators = _out_of_core_estimators(len(y_train), int(np.count_nonzero(y_train)))
+            for name, est in estimators:
+                log(f"🌲 {name} 학습 ({len(y_train)}행, 디스크 데이터셋)")
+                est.fit(X_train, y_train)
+
+        with timer.stage("fit_blend"):
+            log(f"🧬 최종 LogisticRegression 학습 (blend {len(y_blend)}행)")
+            stack_clf = StackingClassifier(estimators=estimators, final_estimator=LogisticRegression(), cv="prefit")
+            stack_clf.fit(np.asarray(X_blend), np.asarray(y_blend))
+
+        with timer.stage("threshold"):
+            y_probs = np.concatenate([
+                stack_clf.predict_proba(X_test[start:start + OOC_PREDICT_CHUNK])[:, 1]
+                for start in range(0, len(y_test), OOC_PREDICT_CHUNK)
+            ])
+            y_test = np.asarray(y_test)
+            best_th = sweep_threshold(y_test, y_probs)
+
+        _log_scores(y_test, y_probs, best_th)
+        X_check = np.asarray(X_test[:OOC_PREDICT_CHUNK], dtype=float)
+        training = _training_info("out-of-core", data.manifest.get("watermark"), data.manifest["rows"])
+        _save_bundle(stack_clf, best_th, features, output_path, shared, X_check, timer, training)
+    finally:
+        if not cache_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    timer.report()
+
+
+def _rows_after(watermark: str, csv_path: Optional[str], table: Optional[str], chunk_size: int) -> pd.DataFrame:
+    """timestamp 가 watermark 보다 늦은 행만 청크로 읽어 모은다 (시간순 정렬)."""
+    if table:
+        chunks = iter_table(table, "timestamp", chunk_size, after=watermark)
+    else:
+        chunks = pd.read_csv(_resolve_csv_path(csv_path), chunksize=chunk_size)
+    cutoff = pd.Timestamp(watermark)
+    parts = []
+    for chunk in chunks:
+        ts = pd.to_datetime(chunk["timestamp"], errors="coerce")
+        newer = (ts > cutoff).to_numpy()
+        if newer.any():
+            parts.append(chunk[newer].assign(timestamp=ts[newer]))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True).sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def _continue_boosting(est, X, y, rounds: int):
+    """XGB/LGBM 기반 모델을 기존 부스터에서 rounds 라운드 더 학습한 새 추정기. 그 밖의 모델은 None.
+
+    새 행은 SMOTETomek 없이 넣으므로 클래스 가중치로 불균형을 맞춘다.
+    """
+    positives = int(np.count_nonzero(y))
+    if isinstance(est, XGBClassifier):
+        ratio = (len(y) - positives) / max(positives, 1)
+        new = XGBClassifier(**{**est.get_params(), "n_estimators": rounds, "scale_pos_weight": ratio})
+        new.fit(X, y, xgb_model=est.get_booster())
+        return new
+    if isinstance(est, LGBMClassifier):
+        new = LGBMClassifier(**{**est.get_params(), "n_estimators": rounds, "class_weight": "balanced"})
+        new.fit(X, y, init_model=est.booster_)
+        return new
+    return None
+
+
+def refresh_model(
+    model_path: str,
+    output_path: str,
+    csv_path: Optional[str] = None,
+    table: Optional[str] = None,
+    since: Optional[str] = None,
+    rounds: int = REFRESH_ROUNDS,
+    holdout_frac: float = REFRESH_HOLDOUT_FRAC,
+    shared: bool = True,
+    chunk_size: int = 100_000,
+) -> bool:
+    """기존 번들을 watermark 이후의 새 행으로 갱신한다. 갱신했으면 True.
+
+    전처리(imputer/iso/스케일러, IQR 경계)는 그대로 두고, XGB/LGBM 은 부스팅을 rounds 라운드 이어서 학습한다.
+    RandomForest 와 최종 LogisticRegression 은 유지한다. 새 행 중 가장 최근 holdout_frac 구간은 학습에 넣지 않고
+    임계값 재계산에 쓰며, watermark 를 그 앞까지만 올려 다음 refresh 때 학습에 들어가게 한다 (rolling holdout).
+    새 번들은 <output>-<version>.joblib 으로도 남기고, output 을 원자적으로 교체해 서버의 mtime 감시가 읽게 한다.
+    """
+    timer = StageTimer()
+    with timer.stage("load_bundle"):
+        bundle = joblib.load(model_path)
+        info = bundle.get("training") or {}
+        watermark = since or info.get("watermark")
+        if not watermark:
+            raise ValueError(f"{model_path} has no training watermark; pass --since")
+        features = bundle.get("features") or FeatureTransformer.from_bundle(bundle)
+
+    with timer.stage("load_rows"):
+        log(f"📥 {watermark} 이후 행 읽는 중 ({'table ' + table if table else csv_path})")
+        df = _rows_after(watermark, csv_path, table, chunk_size)
+        if len(df):
+            df = df[df[features.target_cls].notna()].reset_index(drop=True)
+        # holdout 은 update 구간의 마지막 timestamp 보다 늦은 행부터 (같은 시각이 둘로 나뉘지 않게)
+        cut = len(df) - int(len(df) * holdout_frac)
+        ts = df["timestamp"].to_numpy() if len(df) else np.array([])
+        while 0 < cut < len(df) and ts[cut] == ts[cut - 1]:
+            cut += 1
+        update, holdout = df.iloc[:cut], df.iloc[cut:]
+        y_update = update[features.target_cls].to_numpy(dtype=int) if len(update) else np.array([], dtype=int)
+        log(f"  새 행 {len(df)}개: 학습 {len(update)} / holdout {len(holdout)}")
+    if len(np.unique(y_update)) < 2:
+        log("새 행에 양품/불량이 모두 있지 않아 갱신하지 않습니다.")
+        timer.report()
+        return False
+
+    with timer.stage("transform"):
+        # 기존 모델이 DataFrame 으로 학습됐으면 같은 컬럼 이름으로 넣는다
+        named = hasattr(bundle["model"], "feature_names_in_")
+
+        def _features(rows: pd.DataFrame):
+            X = features.transform(features.clean_inputs(rows))
+            return pd.DataFrame(X, columns=features.x_columns) if named else X
+
+        X_update = _features(update)
+        X_holdout = _features(holdout) if len(holdout) else None
+        y_holdout = holdout[features.target_cls].to_numpy(dtype=int)
+
+    with timer.stage("boost"):
+        stack = copy.deepcopy(bundle["model"])
+        rounds_done = {}
+        for idx, name in enumerate(stack.named_estimators_.keys()):
+            new = _continue_boosting(stack.estimators_[idx], X_update, y_update, rounds)
+            if new is None:
+                continue
+            log(f"🌱 {name}: +{rounds} 라운드 ({len(update)}행)")
+            stack.estimators_[idx] = new
+            stack.named_estimators_[name] = new
+            rounds_done[name] = rounds
+
+    with timer.stage("threshold"):
+        threshold = bundle.get("threshold", 0.5)
+        if X_holdout is not None:
+            old_probs = bundle["model"].predict_proba(X_holdout)[:, 1]
+            probs = stack.predict_proba(X_holdout)[:, 1]
+            if len(np.unique(y_holdout)) == 2:
+                log(f"📊 holdout AP: 이전 {average_precision_score(y_holdout, old_probs):.4f}"
+                    f" -> 갱신 {average_precision_score(y_holdout, probs):.4f}")
+            if int(y_holdout.sum()) >= REFRESH_MIN_HOLDOUT_POSITIVES:
+                threshold = sweep_threshold(y_holdout, probs)
+            else:
+                log(f"holdout 불량 {int(y_holdout.sum())}개 < {REFRESH_MIN_HOLDOUT_POSITIVES}; 임계값 {threshold:.4f} 유지")
+    if X_holdout is not None:
+        _log_scores(y_holdout, probs, threshold)
+
+    training = _training_info(
+        "refresh",
+        _watermark(update["timestamp"]),
+        info.get("rows", 0) + len(update),
+        parent=info.get("version"),
+        rows_added=len(update),
+        holdout_rows=len(holdout),
+        rounds=rounds_done,
+    )
+    X_check = np.asarray(X_holdout if X_holdout is not None else X_update, dtype=float)[:OOC_PREDICT_CHUNK]
+    _save_bundle(stack, threshold, features, output_path, shared, X_check, timer, training, keep_version=True)
+    timer.report()
+    return True
 
 
 def main() -> None:
@@ -223,9 +617,112 @@ def main() -> None:
         default="model/model.joblib",
         help="Output model bundle path (default: model/model.joblib)",
     )
+    parser.add_argument(
+        "--no-shared",
+        action="store_true",
+        help="Skip writing the memory-mappable <output>.bundle directory",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Cross-validated parameter search over the base estimators before fitting the stack",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for --search (default: CPU count)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache for preprocessed/balanced data keyed by data hash (default: <output dir>/.train_cache)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the training cache",
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Stream the CSV in chunks into an on-disk float32 dataset and train from it (for CSVs larger than RAM)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100_000,
+        help="Rows per CSV chunk for --out-of-core (default: 100000)",
+    )
+    parser.add_argument(
+        "--sample-rows",
+        type=int,
+        default=200_000,
+        help="Sample size for --out-of-core quantiles and imputer/scaler fitting (default: 200000)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Update --model with rows newer than its watermark (continued boosting) instead of retraining",
+    )
+    parser.add_argument(
+        "--model",
+        default=None,
+        help="Bundle to refresh with --refresh (default: --output)",
+    )
+    parser.add_argument(
+        "--table",
+        default=None,
+        help="Read --refresh rows from this DB table (DB_HOST/DB_USER/... env) instead of --csv",
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Override the bundle watermark for --refresh (timestamp; rows after it are ingested)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=REFRESH_ROUNDS,
+        help=f"Boosting rounds added per XGB/LGBM member with --refresh (default: {REFRESH_ROUNDS})",
+    )
     args = parser.parse_args()
-
-    build_and_train(args.csv, args.output)
+    if args.out_of_core and args.search:
+        parser.error("--search is not supported with --out-of-core")
+    if args.refresh:
+        refresh_model(
+            args.model or args.output,
+            args.output,
+            csv_path=args.csv,
+            table=args.table,
+            since=args.since,
+            rounds=args.rounds,
+            shared=not args.no_shared,
+            chunk_size=args.chunk_size,
+        )
+        return
+
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or os.path.join(os.path.dirname(args.output) or ".", ".train_cache")
+    if args.out_of_core:
+        build_and_train_out_of_core(
+            args.csv,
+            args.output,
+            shared=not args.no_shared,
+            cache_dir=cache_dir,
+            chunk_size=args.chunk_size,
+            sample_rows=args.sample_rows,
+        )
+        return
+    build_and_train(
+        args.csv,
+        args.output,
+        shared=not args.no_shared,
+        search=args.search,
+        workers=args.workers,
+        cache_dir=cache_dir,
+    )
 
 
 if __name__ == "__main__":